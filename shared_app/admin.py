@@ -1,19 +1,66 @@
+import json
+
 from django.contrib import admin
-from .models import Client, Domain
+from django.utils.html import format_html
+from starterapp.admin_performance import PerformanceModeAdminMixin
+from .models import Client, Domain, SlowQuery
 
 class DomainInline(admin.TabularInline):
     model = Domain
     extra = 1
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('tenant')
+
 @admin.register(Client)
-class ClientAdmin(admin.ModelAdmin):
-    list_display = ('name', 'schema_name', 'created_on')
+class ClientAdmin(PerformanceModeAdminMixin, admin.ModelAdmin):
+    list_display = ('name', 'schema_name', 'is_pooled', 'domain_list', 'created_on')
+    list_filter = ('is_pooled',)
     search_fields = ('name', 'schema_name')
 
     inlines = [DomainInline]
 
+    def get_queryset(self, request):
+        # Client.objects leaves pooled tenants out
+        queryset = Client.all_tenants.prefetch_related('domains')
+        ordering = self.get_ordering(request)
+        return queryset.order_by(*ordering) if ordering else queryset
+
+    @admin.display(description='Domains')
+    def domain_list(self, obj):
+        # Reads the prefetched domains; calling .filter()/.order_by() here would query per row
+        return ', '.join(domain.domain for domain in obj.domains.all())
+
 @admin.register(Domain)
-class DomainAdmin(admin.ModelAdmin):
+class DomainAdmin(PerformanceModeAdminMixin, admin.ModelAdmin):
     list_display = ('domain', 'tenant', 'is_primary')
+    list_select_related = ('tenant',)
     list_filter = ('is_primary',)
     search_fields = ('domain',)
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('schema_name', 'short_sql', 'calls', 'mean', 'max_ms', 'last_route', 'last_seen')
+    list_filter = ('schema_name',)
+    search_fields = ('sql', 'last_route', 'last_request_id')
+    readonly_fields = (
+        'schema_name', 'fingerprint', 'sql', 'calls', 'total_ms', 'max_ms',
+        'last_route', 'last_request_id', 'last_seen', 'formatted_plan',
+    )
+    exclude = ('plan',)
+
+    def has_add_permission(self, request):
+        # Rows are only written by the slow-query log
+        return False
+
+    @admin.display(description='SQL')
+    def short_sql(self, obj):
+        return obj.sql[:120]
+
+    @admin.display(description='Mean ms', ordering='total_ms')
+    def mean(self, obj):
+        return f'{obj.mean_ms:.1f}'
+
+    @admin.display(description='Plan')
+    def formatted_plan(self, obj):
+        return format_html('<pre>{}</pre>', json.dumps(obj.plan, indent=2)) if obj.plan else '-'
@@ -1,23 +1,97 @@
-from ninja import NinjaAPI, Schema
-from typing import List
+from ninja import Schema
+from typing import List, Optional
+from django.core.exceptions import ValidationError
+from django.shortcuts import get_object_or_404
 from .models import Client, Domain
+from .lifecycle import (
+    enqueue_job, get_job, validate_clone_target, validate_move_target, validate_rename_target,
+)
+from starterapp.auth import StaffTokenAuth, api_auth
+from starterapp.openapi import CachedSchemaNinjaAPI
 
-api = NinjaAPI(title="Shared API", urls_namespace="shared_api")
+api = CachedSchemaNinjaAPI(title="Shared API", urls_namespace="shared_api", auth=api_auth())
+# Clone, rename, drop and promote, and their jobs, always need a staff token
+staff_auth = StaffTokenAuth()
 
 class ClientSchema(Schema):
     id: int
     name: str
     schema_name: str
+    is_pooled: bool
 
 class DomainSchema(Schema):
     id: int
     domain: str
     tenant_id: int
 
+class CloneClientSchema(Schema):
+    schema_name: str
+    name: str
+    domain: str
+
+class RenameClientSchema(Schema):
+    schema_name: Optional[str] = None
+    domain: Optional[str] = None
+    # Keep serving the tenant under its previous domains as well
+    keep_old_domains: bool = True
+
+class JobSchema(Schema):
+    id: str
+    kind: str
+    status: str
+    events: List[dict]
+    error: Optional[str] = None
+
+class ErrorSchema(Schema):
+    detail: str
+
+@api.exception_handler(ValidationError)
+def validation_error_handler(request, exc):
+    return api.create_response(request, {"detail": "; ".join(exc.messages)}, status=400)
+
 @api.get("/clients", response=List[ClientSchema])
 def list_clients(request):
-    return Client.objects.all()
+    return Client.all_tenants.all()
+
+@api.post("/clients/{client_id}/clone", response={202: JobSchema}, auth=staff_auth)
+def clone_client(request, client_id: int, payload: CloneClientSchema):
+    # Queued for run_lifecycle_jobs; poll /jobs/{id} for progress
+    source = get_object_or_404(Client, id=client_id)
+    validate_clone_target(payload.schema_name, payload.domain)
+    return 202, enqueue_job('clone', source, schema_name=payload.schema_name, name=payload.name, domain=payload.domain)
+
+@api.post("/clients/{client_id}/rename", response={202: JobSchema}, auth=staff_auth)
+def rename_client(request, client_id: int, payload: RenameClientSchema):
+    # Done once every worker has dropped the tenant it had cached; poll /jobs/{id}
+    client = get_object_or_404(Client.all_tenants, id=client_id)
+    rename = payload.schema_name and payload.schema_name != client.schema_name
+    if rename:
+        validate_rename_target(client, payload.schema_name)
+    if payload.domain:
+        validate_move_target(client, payload.domain)
+    return 202, enqueue_job('rename', client, schema_name=payload.schema_name if rename else None,
+                            domain=payload.domain, keep_old_domains=payload.keep_old_domains)
+
+@api.delete("/clients/{client_id}", response={202: JobSchema}, auth=staff_auth)
+def delete_client(request, client_id: int):
+    # The tenant is no longer resolved once the job starts; its tables are dropped in the background
+    # when no worker has it cached any more
+    client = get_object_or_404(Client.all_tenants, id=client_id)
+    return 202, enqueue_job('drop', client)
+
+@api.post("/clients/{client_id}/promote", response={202: JobSchema}, auth=staff_auth)
+def promote_client(request, client_id: int):
+    # Moves a pooled tenant into its own schema in the background; it stays online throughout
+    client = get_object_or_404(Client.all_tenants, id=client_id, is_pooled=True)
+    return 202, enqueue_job('promote', client)
+
+@api.get("/jobs/{job_id}", response={200: JobSchema, 404: ErrorSchema}, auth=staff_auth)
+def get_client_job(request, job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        return 404, {"detail": "Job not found."}
+    return job
 
 @api.get("/domains", response=List[DomainSchema])
 def list_domains(request):
-    return Domain.objects.all()
\ No newline at end of file
+    return Domain.objects.all()
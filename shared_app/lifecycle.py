@@ -0,0 +1,747 @@
+"""
+Tenant lifecycle operations: clone, drop, rename, move and promote.
+
+clone_tenant copies a schema's structure with django-tenants' clone_schema
+function (NODATA mode) and streams the data table by table with binary COPY,
+reading from one connection and writing to another through an in-memory pipe.
+Nothing is materialised in Python and nothing goes through the ORM.
+
+drop_tenant deletes the Client row, so the tenant is no longer resolved, and
+renames the schema out of the way once every worker has dropped the tenant it
+had cached. The tables are then dropped a few at a time, each batch in its own
+transaction, instead of a single DROP SCHEMA ... CASCADE that holds locks on
+every object of the schema at once.
+
+Workers cache resolved tenants for TENANT_CACHE_SECONDS (see
+starterapp.tenant_resolution), and only the process making a change clears its
+cache. Drop, rename, move and promote therefore clear it and wait that long
+before they destroy what stale entries point at, or before they report done.
+
+promote_tenant moves a pooled tenant (Client.is_pooled), whose rows live in the
+shared pool schema, into a schema of its own while it keeps being served.
+
+Every operation reports progress through an optional callback that receives one
+dict per step (see progress_event).
+
+The shared API queues operations as LifecycleJob rows, which run_lifecycle_jobs
+runs outside the web workers, where a worker recycle cannot kill them halfway.
+"""
+import queue
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+from django_tenants.clone import CloneSchema
+from django_tenants.postgresql_backend.base import _check_schema_name
+from django_tenants.utils import schema_exists, schema_rename
+
+from starterapp.tenant_resolution import TENANT_CACHE_SECONDS, clear_tenant_cache
+
+from .models import Client, Domain, LifecycleJob
+
+# Chunks of COPY output buffered between the reading and the writing connection
+COPY_PIPE_CHUNKS = 256
+# Tables dropped per transaction by drop_tenant
+DROP_BATCH_SIZE = 10
+# Schemas being dropped are renamed to <prefix><timestamp>_<old name>
+DROP_SCHEMA_PREFIX = '_drop_'
+# Comment on the schema of a deleted tenant until it is renamed to its tombstone
+DROPPING_COMMENT = 'shared_app: dropping'
+# Seconds promote_tenant waits after the switch for requests already routed to the pool
+PROMOTE_DRAIN_SECONDS = 5
+# How long promote_tenant waits for the lock that holds back writes to the pool
+PROMOTE_LOCK_TIMEOUT = '5s'
+# Pooled rows deleted per transaction once a tenant has left the pool
+POOL_DELETE_BATCH_SIZE = 5000
+# Seconds between writes to a running job's row, so polls can tell it is alive
+JOB_HEARTBEAT_SECONDS = 10
+# A running job whose row has not been written for this long is reported failed
+JOB_HEARTBEAT_TIMEOUT = 120
+# Seconds run_lifecycle_jobs waits between checks for queued jobs
+JOB_POLL_SECONDS = 2
+
+
+def progress_event(step, started, rows=None, size=None, **extra):
+    """Builds a progress dict, with throughput when rows or bytes are known."""
+    seconds = time.perf_counter() - started
+    event = {'step': step, 'seconds': round(seconds, 3), **extra}
+    if rows is not None:
+        event['rows'] = rows
+        event['rows_per_second'] = round(rows / seconds) if seconds else None
+    if size is not None:
+        event['bytes'] = size
+        event['bytes_per_second'] = round(size / seconds) if seconds else None
+    return event
+
+
+def _report(progress, event):
+    if progress is not None:
+        progress(event)
+
+
+# --- Clone ---
+
+class CopyPipe:
+    """
+    File-like object that connects `COPY ... TO STDOUT` on one connection with
+    `COPY ... FROM STDIN` on another. The writer blocks when COPY_PIPE_CHUNKS
+    chunks are pending, so memory use stays bounded whatever the table size.
+    """
+
+    def __init__(self, max_chunks=COPY_PIPE_CHUNKS):
+        self._chunks = queue.Queue(max_chunks)
+        self._pending = b''
+        self._finished = False
+        self.error = None
+        self.aborted = False
+        self.bytes = 0
+
+    def write(self, data):
+        data = bytes(data)
+        while True:
+            if self.aborted:
+                raise CloneAborted("The writing side of the copy stopped.")
+            try:
+                self._chunks.put(data, timeout=1)
+                break
+            except queue.Full:
+                continue
+        self.bytes += len(data)
+        return len(data)
+
+    def close_writer(self, error=None):
+        """Marks the end of the data; error is re-raised on the reading side."""
+        self.error = error
+        if not self.aborted:
+            self._chunks.put(None)
+
+    def read(self, size=-1):
+        while not self._pending:
+            if self._finished:
+                return b''
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._finished = True
+                return b''
+            self._pending = chunk
+        if size is None or size < 0:
+            size = len(self._pending)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+    def raise_for_error(self):
+        if self.error is not None:
+            raise self.error
+
+
+class CloneAborted(Exception):
+    pass
+
+
+def clone_tenant(source, schema_name, name, domain, progress=None):
+    """
+    Creates a new tenant named name, served under domain, whose schema_name is a
+    copy of source's schema: structure, data and sequence positions. The data is
+    read in a single REPEATABLE READ transaction, so it is a consistent snapshot.
+
+    Returns the new Client.
+    """
+    started = time.perf_counter()
+    validate_clone_target(schema_name, domain)
+
+    connection.set_schema_to_public()
+    CloneSchema().clone_schema(source.schema_name, schema_name, clone_mode='NODATA')
+    _report(progress, progress_event('structure', started, schema=schema_name))
+
+    try:
+        rows, size = copy_schema_data(source.schema_name, schema_name, progress=progress)
+        connection.set_schema_to_public()
+        with transaction.atomic():
+            tenant = Client(schema_name=schema_name, name=name)
+            # The schema already exists; don't run the tenant migrations into it
+            tenant.auto_create_schema = False
+            tenant.save()
+            Domain.objects.create(tenant=tenant, domain=domain, is_primary=True)
+    except BaseException:
+        connection.set_schema_to_public()
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {connection.ops.quote_name(schema_name)} CASCADE")
+        raise
+
+    _report(progress, progress_event('done', started, rows=rows, size=size, schema=schema_name))
+    return tenant
+
+
+def validate_clone_target(schema_name, domain):
+    _check_schema_name(schema_name)
+    if schema_exists(schema_name):
+        raise ValidationError(f"Schema '{schema_name}' already exists.")
+    if Domain.objects.filter(domain=domain).exists():
+        raise ValidationError(f"Domain '{domain}' is already in use.")
+
+
+def copy_schema_data(source_schema, target_schema, progress=None):
+    """
+    Streams the rows of every table of source_schema into the table of the same
+    name in target_schema, then moves the target's sequences to the source's
+    positions. Returns (rows, bytes) copied.
+    """
+    started = time.perf_counter()
+    connection.set_schema(source_schema)
+    tables = copyable_tables()
+    pipes = [CopyPipe() for _ in tables]
+
+    reader = threading.Thread(
+        target=_copy_out, args=(source_schema, tables, pipes), name=f'copy-{source_schema}', daemon=True,
+    )
+    reader.start()
+    quote = connection.ops.quote_name
+    total_rows = total_bytes = 0
+    try:
+        connection.set_schema(target_schema)
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Django's foreign keys are deferrable, so the table order doesn't matter
+            cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+            for (table, columns), pipe in zip(tables, pipes):
+                table_started = time.perf_counter()
+                cursor.copy_expert(
+                    f"COPY {quote(table)} ({columns}) FROM STDIN WITH (FORMAT binary)", pipe,
+                )
+                pipe.raise_for_error()
+                total_rows += cursor.rowcount
+                total_bytes += pipe.bytes
+                _report(progress, progress_event('table', table_started, rows=cursor.rowcount, size=pipe.bytes, table=table))
+            _copy_sequence_positions(cursor, source_schema)
+    except BaseException:
+        for pipe in pipes:
+            pipe.aborted = True
+        raise
+    finally:
+        reader.join()
+        connection.set_schema_to_public()
+
+    _report(progress, progress_event('data', started, rows=total_rows, size=total_bytes))
+    return total_rows, total_bytes
+
+
+def copyable_tables():
+    """
+    Returns [(table, quoted column list)] for the tables of the current schema
+    that hold rows: plain tables and partitions, but not partitioned parents.
+    Generated columns are left out; COPY FROM cannot write them.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, array_agg(a.attname ORDER BY a.attnum) "
+            "FROM pg_class c JOIN pg_attribute a ON a.attrelid = c.oid "
+            "WHERE c.relnamespace = current_schema()::regnamespace AND c.relkind = 'r' "
+            "AND a.attnum > 0 AND NOT a.attisdropped AND a.attgenerated = '' "
+            "GROUP BY c.relname ORDER BY c.relname"
+        )
+        return [(table, ', '.join(quote(column) for column in columns)) for table, columns in cursor.fetchall()]
+
+
+def _copy_out(schema_name, tables, pipes):
+    # Runs in its own thread, and so on its own connection
+    quote = connection.ops.quote_name
+    remaining = list(pipes)
+    try:
+        connection.set_schema(schema_name)
+        with connection.cursor() as cursor:
+            cursor.execute("BEGIN ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            for (table, columns), pipe in zip(tables, pipes):
+                cursor.copy_expert(f"COPY {quote(table)} ({columns}) TO STDOUT WITH (FORMAT binary)", pipe)
+                remaining.remove(pipe)
+                pipe.close_writer()
+            cursor.execute("COMMIT")
+    except Exception as exc:
+        for pipe in remaining:
+            pipe.close_writer(error=exc)
+    finally:
+        connection.close()
+
+
+def _copy_sequence_positions(cursor, source_schema):
+    quote = connection.ops.quote_name
+    cursor.execute(
+        "SELECT sequencename, last_value FROM pg_sequences "
+        "WHERE schemaname = %s AND last_value IS NOT NULL",
+        [source_schema],
+    )
+    for sequence, last_value in cursor.fetchall():
+        cursor.execute("SELECT setval(%s, %s, true)", [quote(sequence), last_value])
+
+
+# --- Drop ---
+
+def drop_tenant(tenant, batch_size=DROP_BATCH_SIZE, pause=0, progress=None, wait=True):
+    """
+    Deletes tenant and its domains, then drops its schema batch_size tables at a
+    time, sleeping pause seconds between batches. Returns the number of tables
+    dropped. A pooled tenant's rows are deleted from the pool instead (see
+    drop_pooled_tenant).
+
+    Workers that still have the tenant cached keep being served from the intact
+    schema until their entry expires; the schema keeps its name, so no new
+    tenant can take it over meanwhile. Only then is it renamed to its tombstone.
+    wait=False skips the wait, for tenants that take no traffic.
+    """
+    if tenant.is_pooled:
+        # No schema to drop; batch_size counts tables, not pooled rows
+        return drop_pooled_tenant(tenant, pause=pause, progress=progress, wait=wait)
+    started = time.perf_counter()
+    schema_name = tenant.schema_name
+    quote = connection.ops.quote_name
+    connection.set_schema_to_public()
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Found by pending_drops() if the drop is interrupted before the rename
+            cursor.execute(f"COMMENT ON SCHEMA {quote(schema_name)} IS %s", [DROPPING_COMMENT])
+        # auto_drop_schema is off, so this only deletes the rows
+        tenant.delete()
+    _report(progress, progress_event('detached', started, schema=schema_name))
+    if wait:
+        wait_for_tenant_caches(progress)
+    return drop_schema_in_batches(schema_name, batch_size=batch_size, pause=pause, progress=progress)
+
+
+def drop_schema_in_batches(schema_name, batch_size=DROP_BATCH_SIZE, pause=0, progress=None):
+    started = time.perf_counter()
+    quote = connection.ops.quote_name
+    if not schema_name.startswith(DROP_SCHEMA_PREFIX):
+        # Frees the name at once; the batches below may take a while
+        doomed = tombstone_name(schema_name)
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER SCHEMA {quote(schema_name)} RENAME TO {quote(doomed)}")
+        schema_name = doomed
+    with connection.cursor() as cursor:
+        # Partitions first: dropping a parent would take all of them in one go
+        cursor.execute(
+            "SELECT relname FROM pg_class "
+            "WHERE relnamespace = to_regnamespace(%s) AND relkind IN ('r', 'p') "
+            "ORDER BY relispartition DESC, relname",
+            [schema_name],
+        )
+        tables = [row[0] for row in cursor.fetchall()]
+
+    for start in range(0, len(tables), batch_size):
+        batch = tables[start:start + batch_size]
+        batch_started = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            names = ', '.join(f'{quote(schema_name)}.{quote(table)}' for table in batch)
+            cursor.execute(f"DROP TABLE IF EXISTS {names} CASCADE")
+        _report(progress, progress_event(
+            'batch', batch_started, tables=len(batch), dropped=start + len(batch), total=len(tables),
+        ))
+        if pause:
+            time.sleep(pause)
+
+    with connection.cursor() as cursor:
+        # Only sequences, functions and the like are left
+        cursor.execute(f"DROP SCHEMA IF EXISTS {quote(schema_name)} CASCADE")
+    _report(progress, progress_event('done', started, tables=len(tables), schema=schema_name))
+    return len(tables)
+
+
+def tombstone_name(schema_name):
+    return f'{DROP_SCHEMA_PREFIX}{timezone.now():%Y%m%d%H%M%S}_{schema_name}'[:63]
+
+
+def pending_drops():
+    """Schemas left behind by a drop that was interrupted after the tenant was deleted."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nspname FROM pg_namespace WHERE nspname LIKE %s OR obj_description(oid, 'pg_namespace') = %s "
+            "ORDER BY nspname",
+            [DROP_SCHEMA_PREFIX.replace('_', r'\_') + '%', DROPPING_COMMENT],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def wait_for_tenant_caches(progress=None):
+    """
+    Clears this process's tenant cache and waits until every other worker's
+    entries resolved before a change have expired (TENANT_CACHE_SECONDS).
+    """
+    started = time.perf_counter()
+    clear_tenant_cache()
+    time.sleep(TENANT_CACHE_SECONDS)
+    _report(progress, progress_event('caches', started))
+
+
+# --- Rename and move ---
+
+def rename_tenant(tenant, schema_name, progress=None, wait=True):
+    """
+    Renames tenant's schema. This only touches the catalog and is instantaneous,
+    but workers that still have the tenant cached under its old schema name fail
+    its requests until their entry expires; with wait, this returns only then.
+    """
+    started = time.perf_counter()
+    connection.set_schema_to_public()
+    validate_rename_target(tenant, schema_name)
+    if tenant.is_pooled:
+        # There is no schema yet; only the name it will be promoted to changes
+        tenant.schema_name = schema_name
+        tenant.save(update_fields=['schema_name'])
+    else:
+        with transaction.atomic():
+            schema_rename(tenant, schema_name)
+    _report(progress, progress_event('renamed', started, schema=schema_name))
+    if wait:
+        wait_for_tenant_caches(progress)
+    return tenant
+
+
+def move_tenant(tenant, domain, keep_old_domains=True, progress=None, wait=True):
+    """
+    Serves tenant under domain (the subfolder in /client/<domain>/). The previous
+    domains keep working as aliases unless keep_old_domains is False; workers
+    that have them cached keep serving them until their entry expires, and with
+    wait this returns only then.
+    """
+    started = time.perf_counter()
+    validate_move_target(tenant, domain)
+    with transaction.atomic():
+        old_domains = tenant.domains.exclude(domain=domain)
+        if keep_old_domains:
+            old_domains.update(is_primary=False)
+        else:
+            old_domains.delete()
+        Domain.objects.update_or_create(tenant=tenant, domain=domain, defaults={'is_primary': True})
+    _report(progress, progress_event('moved', started, schema=tenant.schema_name))
+    if wait:
+        wait_for_tenant_caches(progress)
+    return tenant
+
+
+def validate_rename_target(tenant, schema_name):
+    _check_schema_name(schema_name)
+    if schema_exists(schema_name) or Client.all_tenants.filter(schema_name=schema_name).exclude(pk=tenant.pk).exists():
+        raise ValidationError(f"Schema '{schema_name}' already exists.")
+
+
+def validate_move_target(tenant, domain):
+    if Domain.objects.filter(domain=domain).exclude(tenant=tenant).exists():
+        raise ValidationError(f"Domain '{domain}' is already in use.")
+
+
+# --- Pooled tenants ---
+
+def pooled_tables():
+    """
+    Returns [(model, [column, ...])] for the models whose rows carry a
+    client_key, with the columns a promotion copies (all but client_key). Models
+    referring to other pooled models come first, so their rows are deleted before
+    the rows they point at.
+    """
+    tables = []
+    for model in apps.get_models():
+        fields = model._meta.concrete_fields
+        if model._meta.proxy or not any(field.attname == 'client_key' for field in fields):
+            continue
+        columns = [field.column for field in fields if field.attname != 'client_key']
+        tables.append((model, columns))
+    return sorted(tables, key=lambda table: not any(
+        field.is_relation and any(field.related_model is other for other, _ in tables)
+        for field in table[0]._meta.concrete_fields
+    ))
+
+
+def promote_tenant(tenant, drain=PROMOTE_DRAIN_SECONDS, batch_size=POOL_DELETE_BATCH_SIZE, progress=None):
+    """
+    Moves pooled tenant into a schema of its own, named tenant.schema_name,
+    while it keeps being served:
+      1. the schema is created and migrated;
+      2. the tenant's rows are copied from the pool, blocking nobody;
+      3. in one short transaction that holds back writes to the pooled tables,
+         rows changed since are reconciled, sequences are moved past the copied
+         ids and the tenant is switched to its schema;
+      4. after drain seconds, and at least as long as workers keep a resolved
+         tenant (TENANT_CACHE_SECONDS), rows inserted into the pool by requests
+         routed there before the switch are carried over, and the tenant's
+         pooled rows are deleted batch_size at a time.
+    Updates made in the pool by such late requests are not carried over.
+    Returns the tenant.
+    """
+    if not tenant.is_pooled:
+        raise ValidationError(f"Tenant '{tenant.schema_name}' already has its own schema.")
+    started = time.perf_counter()
+    connection.set_schema_to_public()
+    tenant.create_schema(check_if_exists=True, verbosity=0)
+    connection.set_schema_to_public()
+    _report(progress, progress_event('schema', started, schema=tenant.schema_name))
+
+    tables = pooled_tables()
+    step_started = time.perf_counter()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+        rows = sum(_copy_pooled_rows(cursor, model, columns, tenant) for model, columns in tables)
+    _report(progress, progress_event('copy', step_started, rows=rows))
+
+    step_started = time.perf_counter()
+    quote = connection.ops.quote_name
+    pool = quote(settings.TENANT_POOL_SCHEMA)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+        cursor.execute(f"SET LOCAL lock_timeout = '{PROMOTE_LOCK_TIMEOUT}'")
+        # Readers carry on; writers to the pool wait until the switch is committed
+        cursor.execute(f"LOCK TABLE {', '.join(f'{pool}.{quote(model._meta.db_table)}' for model, _ in tables)} IN SHARE MODE")
+        rows = sum(
+            _copy_pooled_rows(cursor, model, columns, tenant) + _delete_unpooled_rows(cursor, model, tenant)
+            for model, columns in tables
+        )
+        for model, _ in tables:
+            _move_sequence_past_rows(cursor, model, tenant.schema_name)
+        Client.all_tenants.filter(pk=tenant.pk).update(is_pooled=False)
+    tenant.is_pooled = False
+    clear_tenant_cache()
+    _report(progress, progress_event('switch', step_started, rows=rows, schema=tenant.schema_name))
+
+    time.sleep(max(drain, TENANT_CACHE_SECONDS))
+    step_started = time.perf_counter()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+        rows = sum(_copy_pooled_rows(cursor, model, columns, tenant, only_new=True) for model, columns in tables)
+        for model, _ in tables:
+            _move_sequence_past_rows(cursor, model, tenant.schema_name)
+    _report(progress, progress_event('late', step_started, rows=rows))
+
+    delete_pooled_rows(tenant.pk, batch_size=batch_size, progress=progress)
+    _report(progress, progress_event('done', started, schema=tenant.schema_name))
+    return tenant
+
+
+def drop_pooled_tenant(tenant, batch_size=POOL_DELETE_BATCH_SIZE, pause=0, progress=None, wait=True):
+    """
+    Deletes pooled tenant and its domains, then its rows in the pool, once no
+    worker routes requests for it there any more. Returns the rows deleted.
+    """
+    started = time.perf_counter()
+    connection.set_schema_to_public()
+    client_key = tenant.pk
+    tenant.delete()
+    _report(progress, progress_event('detached', started, schema=settings.TENANT_POOL_SCHEMA))
+    if wait:
+        wait_for_tenant_caches(progress)
+    return delete_pooled_rows(client_key, batch_size=batch_size, pause=pause, progress=progress)
+
+
+def delete_pooled_rows(client_key, batch_size=POOL_DELETE_BATCH_SIZE, pause=0, progress=None):
+    """Deletes the rows tagged with client_key from the pool schema, batch_size per transaction."""
+    quote = connection.ops.quote_name
+    deleted = 0
+    for model, _ in pooled_tables():
+        table = f'{quote(settings.TENANT_POOL_SCHEMA)}.{quote(model._meta.db_table)}'
+        key = ', '.join(quote(column) for column in _primary_key_columns(model, settings.TENANT_POOL_SCHEMA))
+        while True:
+            batch_started = time.perf_counter()
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE client_key = %s AND ({key}) IN ("
+                    f"    SELECT {key} FROM {table} WHERE client_key = %s LIMIT %s"
+                    f")",
+                    [client_key, client_key, batch_size],
+                )
+                rows = cursor.rowcount
+            deleted += rows
+            _report(progress, progress_event('batch', batch_started, rows=rows, table=model._meta.db_table))
+            if rows < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+    return deleted
+
+
+def _primary_key_columns(model, schema_name):
+    # Not always the model's pk: a partitioned member table's key includes created_at
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT array_agg(a.attname ORDER BY a.attnum) FROM pg_index i "
+            "JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey) "
+            "WHERE i.indrelid = to_regclass(%s) AND i.indisprimary",
+            [f'{connection.ops.quote_name(schema_name)}.{connection.ops.quote_name(model._meta.db_table)}'],
+        )
+        return cursor.fetchone()[0] or [model._meta.pk.column]
+
+
+def _copy_pooled_rows(cursor, model, columns, tenant, only_new=False):
+    """
+    Upserts tenant's rows of model from the pool into its own schema, rewriting
+    only rows that differ; with only_new, rows already there are left alone.
+    Returns the number of rows written.
+    """
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    key = _primary_key_columns(model, tenant.schema_name)
+    column_list = ', '.join(quote(column) for column in columns)
+    changing = [quote(column) for column in columns if column not in key]
+    if only_new or not changing:
+        action = 'DO NOTHING'
+    else:
+        current = ', '.join(f't.{column}' for column in changing)
+        incoming = ', '.join(f'EXCLUDED.{column}' for column in changing)
+        action = (
+            f"DO UPDATE SET ({', '.join(changing)}) = ROW({incoming}) "
+            f"WHERE ROW({current}) IS DISTINCT FROM ROW({incoming})"
+        )
+    cursor.execute(
+        f"INSERT INTO {quote(tenant.schema_name)}.{table} AS t ({column_list}) "
+        f"SELECT {column_list} FROM {quote(settings.TENANT_POOL_SCHEMA)}.{table} WHERE client_key = %s "
+        f"ON CONFLICT ({', '.join(quote(column) for column in key)}) {action}",
+        [tenant.pk],
+    )
+    return cursor.rowcount
+
+
+def _delete_unpooled_rows(cursor, model, tenant):
+    """Deletes rows from tenant's own schema that were deleted from the pool after they were copied."""
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    key = ', '.join(quote(column) for column in _primary_key_columns(model, tenant.schema_name))
+    cursor.execute(
+        f"DELETE FROM {quote(tenant.schema_name)}.{table} WHERE ({key}) NOT IN ("
+        f"    SELECT {key} FROM {quote(settings.TENANT_POOL_SCHEMA)}.{table} WHERE client_key = %s"
+        f")",
+        [tenant.pk],
+    )
+    return cursor.rowcount
+
+
+def _move_sequence_past_rows(cursor, model, schema_name):
+    # Ids copied from the pool came from the pool's sequence, not this schema's
+    quote = connection.ops.quote_name
+    table = f'{quote(schema_name)}.{quote(model._meta.db_table)}'
+    cursor.execute("SELECT pg_get_serial_sequence(%s, %s)", [table, model._meta.pk.column])
+    sequence = cursor.fetchone()[0]
+    if sequence:
+        cursor.execute(
+            f"SELECT setval(%s, COALESCE((SELECT max({quote(model._meta.pk.column)}) FROM {table}), 0) + 1, false)",
+            [sequence],
+        )
+
+
+# --- Background jobs ---
+
+def rename_and_move_tenant(tenant, schema_name=None, domain=None, keep_old_domains=True, progress=None):
+    """Renames the tenant's schema and/or moves it to a new domain, waiting for cached tenants once."""
+    if schema_name:
+        rename_tenant(tenant, schema_name, progress=progress, wait=not domain)
+    if domain:
+        move_tenant(tenant, domain, keep_old_domains=keep_old_domains, progress=progress)
+
+
+# Operation run for each LifecycleJob kind, given the tenant and the job's args
+JOB_KINDS = {
+    'clone': clone_tenant,
+    'drop': drop_tenant,
+    'rename': rename_and_move_tenant,
+    'promote': promote_tenant,
+}
+
+
+def enqueue_job(kind, tenant, **args):
+    """
+    Queues JOB_KINDS[kind](tenant, **args) for run_lifecycle_jobs and returns its
+    LifecycleJob. args must be JSON serializable.
+    """
+    return LifecycleJob.objects.create(
+        id=uuid.uuid4().hex, kind=kind, status='queued', args={'client_id': tenant.pk, **args}
+    )
+
+
+def claim_job():
+    """
+    Marks the oldest queued job running and returns it, or None. Rows another
+    runner has locked are skipped, so several runners can share the queue.
+    """
+    with transaction.atomic():
+        job = (
+            LifecycleJob.objects.select_for_update(skip_locked=True)
+            .filter(status='queued').order_by('started_at').first()
+        )
+        if job is not None:
+            job.status = 'running'
+            job.save(update_fields=['status', 'updated_at'])
+    return job
+
+
+def run_job(job):
+    """
+    Runs a claimed job on this thread. Progress and the outcome are written to
+    the job's row by a second thread on a connection of its own, in the public
+    schema and outside the job's transactions, so every worker can report them
+    at once. That thread also writes the row every JOB_HEARTBEAT_SECONDS while
+    the job waits (see get_job).
+    """
+    events = []
+    updates = queue.Queue()
+
+    def record():
+        try:
+            while True:
+                try:
+                    fields = updates.get(timeout=JOB_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    fields = {}
+                if fields is None:
+                    break
+                LifecycleJob.objects.filter(pk=job.pk).update(updated_at=timezone.now(), **fields)
+        finally:
+            connection.close()
+
+    def progress(event):
+        events.append(event)
+        updates.put({'events': list(events)})
+
+    recorder = threading.Thread(target=record, name=f'{job.kind}-{job.pk}-record', daemon=True)
+    recorder.start()
+    try:
+        args = dict(job.args)
+        tenant = Client.all_tenants.get(pk=args.pop('client_id'))
+        JOB_KINDS[job.kind](tenant, progress=progress, **args)
+        updates.put({'status': 'done'})
+    except Exception as exc:
+        updates.put({'status': 'failed', 'error': str(exc)})
+    finally:
+        updates.put(None)
+        recorder.join()
+        # Leave the job's schema and transactions behind
+        connection.close()
+
+
+def get_job(job_id):
+    """
+    The job's row. A running job whose heartbeat is older than
+    JOB_HEARTBEAT_TIMEOUT lost its runner, and is marked failed.
+    """
+    stale = timezone.now() - timedelta(seconds=JOB_HEARTBEAT_TIMEOUT)
+    LifecycleJob.objects.filter(pk=job_id, status='running', updated_at__lt=stale).update(
+        status='failed', error='The job stopped reporting progress; its runner exited.'
+    )
+    return LifecycleJob.objects.filter(pk=job_id).first()
+
+
+def format_event(event):
+    """One human readable line per progress event, for the management commands."""
+    parts = [f"{event['step']:<10}"]
+    for key in ('schema', 'table'):
+        if key in event:
+            parts.append(event[key])
+    if 'dropped' in event:
+        parts.append(f"{event['dropped']}/{event['total']} tables")
+    if 'rows' in event:
+        parts.append(f"{event['rows']} rows")
+    if 'bytes' in event:
+        parts.append(f"{event['bytes'] / 1048576:.1f} MB")
+    parts.append(f"in {event['seconds']:.2f}s")
+    if event.get('rows_per_second'):
+        parts.append(f"({event['rows_per_second']} rows/s, {(event.get('bytes_per_second') or 0) / 1048576:.1f} MB/s)")
+    return '  '.join(parts)
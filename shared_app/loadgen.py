@@ -0,0 +1,396 @@
+"""
+Load generation against a running server (runserver, gunicorn or uvicorn).
+
+A fixed number of virtual users each keep one HTTP/1.1 keep-alive connection
+open and issue requests back to back (or paced, with a target rate) for the
+configured duration. Every request picks an operation from a weighted mix and a
+tenant from a Zipf distribution, so a few tenants get most of the traffic as they
+would in production. Latencies are kept per operation and reported as
+throughput, p50/p95/p99 and error rates.
+
+The client only uses asyncio streams; there is nothing to install. Tenants are
+created and seeded by setup_tenants() through the Client/Domain models and
+tenant_app.synthetic, in the process running the harness, not through the
+server under test.
+"""
+import asyncio
+import bisect
+import itertools
+import json
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django_tenants.utils import get_tenant_domain_model, get_tenant_model, schema_context
+
+from shared_app.lifecycle import clone_tenant
+
+DEFAULT_SCHEMA_PREFIX = 'loadtest'
+DEFAULT_REGIONS = 5
+DEFAULT_MEMBERS = 200
+# Zipf exponent for tenant popularity: with 100 tenants the busiest one gets
+# about 23% of the requests and the top ten about 63%
+DEFAULT_ZIPF_S = 1.1
+# Seconds a request may take before it counts as an error
+REQUEST_TIMEOUT = 30
+
+
+@dataclass
+class TenantTarget:
+    """What the harness needs to address a tenant and build requests for it."""
+    schema_name: str
+    domain: str
+    region_ids: List[int]
+    member_ids: List[Tuple[int, int]]
+    token: Optional[str] = None
+
+    @property
+    def base_path(self):
+        return f'/{settings.TENANT_SUBFOLDER_PREFIX}/{self.domain}/api'
+
+
+@dataclass
+class Operation:
+    name: str
+    # Returns (method, path, JSON body or None); public operations ignore the tenant
+    build: Callable[[TenantTarget, random.Random], Tuple[str, str, Optional[dict]]]
+    public: bool = False
+
+
+def _member_payload(tenant, rng):
+    return {
+        'name': f'Load Test {rng.randrange(1_000_000)}',
+        'email': f'load{rng.randrange(1_000_000)}@example.com',
+        'phone': f'555-{rng.randrange(10_000):04d}',
+        'region_id': rng.choice(tenant.region_ids),
+    }
+
+
+def _get_member(tenant, rng):
+    region_id, member_id = rng.choice(tenant.member_ids)
+    return 'GET', f'{tenant.base_path}/{region_id}/members/{member_id}', None
+
+
+def _update_member(tenant, rng):
+    region_id, member_id = rng.choice(tenant.member_ids)
+    payload = {**_member_payload(tenant, rng), 'region_id': region_id}
+    return 'PUT', f'{tenant.base_path}/{region_id}/members/{member_id}', payload
+
+
+OPERATIONS = {
+    operation.name: operation for operation in (
+        Operation('list_regions', lambda t, rng: ('GET', f'{t.base_path}/region', None)),
+        Operation('list_region_members', lambda t, rng: ('GET', f'{t.base_path}/{rng.choice(t.region_ids)}/members', None)),
+        Operation('list_members', lambda t, rng: ('GET', f'{t.base_path}/members', None)),
+        Operation('get_member', _get_member),
+        Operation('create_member', lambda t, rng: ('POST', f'{t.base_path}/members', _member_payload(t, rng))),
+        Operation('update_member', _update_member),
+        Operation('list_clients', lambda t, rng: ('GET', '/api/clients', None), public=True),
+        Operation('list_domains', lambda t, rng: ('GET', '/api/domains', None), public=True),
+    )
+}
+
+# Relative weights per operation
+MIXES = {
+    'read-heavy': {
+        'get_member': 50, 'list_region_members': 25, 'list_regions': 15,
+        'list_members': 2, 'update_member': 4, 'create_member': 2, 'list_clients': 2,
+    },
+    'mixed': {
+        'get_member': 35, 'list_region_members': 15, 'list_regions': 10,
+        'update_member': 20, 'create_member': 15, 'list_clients': 3, 'list_domains': 2,
+    },
+    'write-heavy': {
+        'get_member': 20, 'list_region_members': 5, 'update_member': 40, 'create_member': 35,
+    },
+    'public': {'list_clients': 70, 'list_domains': 30},
+}
+
+
+def zipf_weights(count, s=DEFAULT_ZIPF_S):
+    """Cumulative weights for picking among count items ranked by popularity."""
+    return list(itertools.accumulate(1 / rank ** s for rank in range(1, count + 1)))
+
+
+def mix_weights(mix):
+    """Returns (operations, cumulative weights) for a mix name or {name: weight} dict."""
+    weights = MIXES[mix] if isinstance(mix, str) else mix
+    unknown = set(weights) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"Unknown operation(s) {', '.join(sorted(unknown))}.")
+    names = sorted(weights)
+    return [OPERATIONS[name] for name in names], list(itertools.accumulate(weights[name] for name in names))
+
+
+def pick(items, cumulative, rng):
+    return items[bisect.bisect(cumulative, rng.random() * cumulative[-1])]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+@dataclass
+class OperationStats:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[int, int] = field(default_factory=dict)
+    # Connection failures and timeouts, which have no status
+    failures: int = 0
+
+    @property
+    def errors(self):
+        return self.failures + sum(count for status, count in self.statuses.items() if status >= 500)
+
+    @property
+    def client_errors(self):
+        return sum(count for status, count in self.statuses.items() if 400 <= status < 500)
+
+    @property
+    def requests(self):
+        return len(self.latencies) + self.failures
+
+    def summary(self, seconds):
+        latencies = sorted(self.latencies)
+        return {
+            'requests': self.requests,
+            'rps': self.requests / seconds if seconds else 0.0,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+            'mean_ms': (statistics.fmean(latencies) if latencies else 0.0) * 1000,
+            'errors': self.errors,
+            'client_errors': self.client_errors,
+            'error_rate': self.errors / self.requests if self.requests else 0.0,
+        }
+
+
+@dataclass
+class LoadReport:
+    seconds: float
+    operations: Dict[str, OperationStats]
+    tenant_requests: Dict[str, int]
+
+    def summary(self):
+        total = OperationStats()
+        for stats in self.operations.values():
+            total.latencies.extend(stats.latencies)
+            total.failures += stats.failures
+            for status, count in stats.statuses.items():
+                total.statuses[status] = total.statuses.get(status, 0) + count
+        return {
+            'seconds': self.seconds,
+            'total': total.summary(self.seconds),
+            'operations': {name: stats.summary(self.seconds) for name, stats in sorted(self.operations.items())},
+            'statuses': dict(sorted(total.statuses.items())),
+            'tenants': len(self.tenant_requests),
+            'top_tenants': sorted(self.tenant_requests.items(), key=lambda item: -item[1])[:5],
+        }
+
+
+class HttpConnection:
+    """A single keep-alive HTTP/1.1 connection; reconnects when the server closes it."""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        payload = json.dumps(body).encode() if body is not None else b''
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}', f'Content-Length: {len(payload)}']
+        if body is not None:
+            lines.append('Content-Type: application/json')
+        lines.extend(f'{name}: {value}' for name, value in (headers or {}).items())
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+        await self.writer.drain()
+        try:
+            status, response_headers, content = await read_response(self.reader)
+        except Exception:
+            await self.close()
+            raise
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, content
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+
+async def read_response(reader):
+    """Reads one HTTP/1.1 response; returns (status, lower-cased headers, body)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Server closed the connection')
+    status = int(status_line.split(None, 2)[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                # Trailers, up to the blank line
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        return status, headers, b''.join(chunks)
+    if 'content-length' in headers:
+        return status, headers, await reader.readexactly(int(headers['content-length']))
+    # No framing: the body runs until the server closes the connection
+    headers['connection'] = 'close'
+    return status, headers, await reader.read()
+
+
+async def run_load(base_url, tenants, mix='read-heavy', concurrency=32, duration=30.0, rate=None,
+                   zipf_s=DEFAULT_ZIPF_S, public_token=None, seed=None, progress=None):
+    """
+    Drives traffic at base_url for duration seconds from concurrency virtual
+    users and returns a LoadReport. rate caps the total requests per second;
+    without it every user sends its next request as soon as a response arrives.
+    """
+    url = urlsplit(base_url)
+    host, port = url.hostname or '127.0.0.1', url.port or 80
+    operations, operation_weights = mix_weights(mix)
+    tenant_weights = zipf_weights(len(tenants), zipf_s)
+    stats = {operation.name: OperationStats() for operation in operations}
+    tenant_requests = {}
+    started = time.perf_counter()
+    deadline = started + duration
+    interval = concurrency / rate if rate else 0.0
+
+    async def user(number):
+        rng = random.Random(None if seed is None else seed + number)
+        connection = HttpConnection(host, port)
+        next_send = time.perf_counter() + rng.random() * interval
+        try:
+            while time.perf_counter() < deadline:
+                if interval:
+                    await asyncio.sleep(max(0.0, next_send - time.perf_counter()))
+                    next_send += interval
+                operation = pick(operations, operation_weights, rng)
+                tenant = pick(tenants, tenant_weights, rng)
+                method, path, body = operation.build(tenant, rng)
+                token = public_token if operation.public else tenant.token
+                headers = {'Authorization': f'Bearer {token}'} if token else None
+                if not operation.public:
+                    tenant_requests[tenant.schema_name] = tenant_requests.get(tenant.schema_name, 0) + 1
+
+                request_started = time.perf_counter()
+                try:
+                    status, _ = await asyncio.wait_for(connection.request(method, path, body, headers), REQUEST_TIMEOUT)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    stats[operation.name].failures += 1
+                    await connection.close()
+                    continue
+                stats[operation.name].latencies.append(time.perf_counter() - request_started)
+                stats[operation.name].statuses[status] = stats[operation.name].statuses.get(status, 0) + 1
+        finally:
+            await connection.close()
+
+    async def report_progress():
+        while time.perf_counter() < deadline:
+            await asyncio.sleep(min(5.0, max(0.0, deadline - time.perf_counter())))
+            done = sum(entry.requests for entry in stats.values())
+            progress(time.perf_counter() - started, done)
+
+    tasks = [asyncio.ensure_future(user(number)) for number in range(concurrency)]
+    if progress is not None:
+        tasks.append(asyncio.ensure_future(report_progress()))
+    await asyncio.gather(*tasks)
+    return LoadReport(time.perf_counter() - started, stats, tenant_requests)
+
+
+def tenant_schema_names(count, prefix=DEFAULT_SCHEMA_PREFIX):
+    return [f'{prefix}{number:04d}' for number in range(1, count + 1)]
+
+
+def ensure_tenants(schema_names, label='Load test', progress=None):
+    """
+    The Clients of schema_names, in order, creating the missing ones with a
+    domain of the same name. The first one created runs the tenant migrations;
+    the others are cloned from its schema while it is still empty, which takes
+    a fraction of the time.
+    """
+    Client, Domain = get_tenant_model(), get_tenant_domain_model()
+    existing = {tenant.schema_name: tenant for tenant in Client.objects.filter(schema_name__in=schema_names)}
+    template = None
+    tenants = []
+    for schema_name in schema_names:
+        tenant = existing.get(schema_name)
+        if tenant is None:
+            if template is None:
+                # Saving the tenant creates the schema and runs the tenant migrations
+                tenant = template = Client.objects.create(schema_name=schema_name, name=f'{label} {schema_name}')
+                Domain.objects.create(domain=schema_name, tenant=tenant, is_primary=True)
+            else:
+                tenant = clone_tenant(template, schema_name, f'{label} {schema_name}', schema_name)
+            if progress:
+                progress(f'created {schema_name}')
+        tenants.append(tenant)
+    return tenants
+
+
+def setup_tenants(count, prefix=DEFAULT_SCHEMA_PREFIX, regions=DEFAULT_REGIONS, members=DEFAULT_MEMBERS,
+                  progress=None, seed=0):
+    """
+    Creates (or reuses) count tenants named <prefix>0001... with a domain of the
+    same name, each seeded with synthetic regions and members (see
+    tenant_app.synthetic), and returns their TenantTarget list. Existing tenants
+    are reused as they are, so tenants filled by `manage.py generate_data` with
+    the same prefix are driven as generated.
+    """
+    from tenant_app.models import Member, Region
+    from tenant_app.synthetic import fill_schema
+
+    Domain = get_tenant_domain_model()
+    targets = []
+    for tenant in ensure_tenants(tenant_schema_names(count, prefix), progress=progress):
+        domain = tenant.get_primary_domain() or Domain.objects.filter(tenant=tenant).first()
+        with schema_context(tenant.schema_name):
+            if not Region.objects.exists():
+                fill_schema(seed, regions, members)
+            region_ids = list(Region.objects.values_list('id', flat=True))
+            member_ids = list(Member.objects.values_list('region_id', 'id')[:10_000])
+        targets.append(TenantTarget(tenant.schema_name, domain.domain, region_ids, member_ids))
+    return targets
+
+
+def format_summary(summary, label=''):
+    """Renders LoadReport.summary() as a table."""
+    total = summary['total']
+    lines = [
+        f"{label + ': ' if label else ''}{total['requests']} requests in {summary['seconds']:.1f}s "
+        f"= {total['rps']:.1f} req/s over {summary['tenants']} tenant(s); "
+        f"errors {total['errors']} ({total['error_rate']:.2%}), 4xx {total['client_errors']}",
+        f"{'operation':<22}{'req':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}",
+    ]
+    for name, row in list(summary['operations'].items()) + [('total', total)]:
+        lines.append(
+            f"{name:<22}{row['requests']:>8}{row['rps']:>9.1f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}"
+            f"{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}{row['errors']:>8}"
+        )
+    lines.append(f"status codes: {summary['statuses']}")
+    lines.append('busiest tenants: ' + ', '.join(f'{name} ({count})' for name, count in summary['top_tenants']))
+    return '\n'.join(lines)
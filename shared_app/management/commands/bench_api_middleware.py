@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils.module_loading import import_string
+
+from starterapp.auth import SignedTokenAuth, issue_api_token
+
+# The stock stack that every API call used to pass through
+DEFAULT_STACK = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'django_multitenant.middlewares.MultitenantMiddleware',
+    'starterapp.middleware.MultitenantMiddleware.MultitenantMiddleware',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the per-request cost of the middleware stack for an API call, with "
+        "the stock session/CSRF/auth/messages middleware versus settings.MIDDLEWARE, "
+        "plus the cost of verifying a signed API token. The tenant-resolving middleware "
+        "is left out so no database is needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--path', default=f'/{settings.TENANT_SUBFOLDER_PREFIX}/tenant1/api/members')
+
+    def handle(self, *args, **options):
+        configured = [m for m in settings.MIDDLEWARE if 'django_tenants' not in m]
+        factory = RequestFactory()
+        count = options['requests']
+
+        results = {}
+        for label, stack in (('stock', DEFAULT_STACK), ('configured', configured)):
+            handler = build_chain(stack)
+            start = time.perf_counter()
+            for _ in range(count):
+                handler(factory.get(options['path']))
+            results[label] = (time.perf_counter() - start) / count
+
+        token = issue_api_token('public', 'benchmark')
+        auth = SignedTokenAuth()
+        request = factory.get(options['path'], HTTP_AUTHORIZATION=f'Bearer {token}')
+        start = time.perf_counter()
+        for _ in range(count):
+            auth(request)
+        token_cost = (time.perf_counter() - start) / count
+
+        for label, seconds in results.items():
+            self.stdout.write(f"{label:>12}: {seconds * 1e6:8.1f} us/request")
+        self.stdout.write(f"{'saved':>12}: {(results['stock'] - results['configured']) * 1e6:8.1f} us/request")
+        self.stdout.write(f"{'token check':>12}: {token_cost * 1e6:8.1f} us/request")
+        self.stdout.write(
+            "Sessions are only read from the database when a request carries a session "
+            "cookie, so clients sending one also save a django_session query per call."
+        )
+
+
+def build_chain(middleware_paths):
+    def view(request):
+        return HttpResponse(b'{}', content_type='application/json')
+
+    handler = view
+    for path in reversed(middleware_paths):
+        handler = import_string(path)(handler)
+    return handler
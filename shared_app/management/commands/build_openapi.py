@@ -0,0 +1,36 @@
+import json
+from importlib import import_module
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules exposing a CachedSchemaNinjaAPI as `api`
+API_MODULES = ('shared_app.api', 'tenant_app.api')
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the prefix-less OpenAPI document of each NinjaAPI to "
+        "settings.OPENAPI_SCHEMA_DIR so workers load it instead of generating it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir', default=None,
+            help='Directory to write to (defaults to settings.OPENAPI_SCHEMA_DIR).',
+        )
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir'] or settings.OPENAPI_SCHEMA_DIR
+        if not output_dir:
+            raise CommandError("Pass --output-dir or set OPENAPI_SCHEMA_DIR.")
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        for module in API_MODULES:
+            api = import_module(module).api
+            schema = api.generate_openapi_schema()
+            target = output_dir / f'{api.urls_namespace}.json'
+            target.write_text(json.dumps(schema))
+            self.stdout.write(f"{api.title}: {len(schema['paths'])} paths -> {target}")
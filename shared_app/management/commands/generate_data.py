@@ -0,0 +1,88 @@
+import time
+from datetime import datetime, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shared_app.loadgen import ensure_tenants, tenant_schema_names, zipf_weights
+from shared_app.parallel import DEFAULT_WORKERS, for_each_tenant
+from tenant_app.models import Region
+from tenant_app.synthetic import DEFAULT_REGION_SKEW, fill_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates tenants named <prefix>0001... and fills them with deterministic synthetic "
+        "regions and members, written with COPY, several tenants at a time. Members are "
+        "spread over regions (and, with --size-skew, tenants) by Zipf laws, and the same "
+        "seed gives the same rows. Tenants that already have regions are left as they are. "
+        "`manage.py loadtest --prefix <prefix> --tenants N` then drives the generated tenants."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', type=int, default=10)
+        parser.add_argument('--prefix', default='synthetic', help='Schema and domain prefix of the tenants.')
+        parser.add_argument('--regions', type=int, default=20, help='Regions per tenant.')
+        parser.add_argument('--members', type=int, default=100_000, help='Members per tenant, on average.')
+        parser.add_argument('--region-skew', type=float, default=DEFAULT_REGION_SKEW,
+                            help='Zipf exponent of members over regions; 0 spreads them evenly.')
+        parser.add_argument('--size-skew', type=float, default=0.0,
+                            help='Zipf exponent of members over tenants; 0 gives every tenant --members.')
+        parser.add_argument('--duplicate-rate', type=float, default=0.0,
+                            help='Share of members planted as duplicates of others.')
+        parser.add_argument('--history', action='store_true', help='Also write the create history entries.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--as-of', help='Signup dates count back from this date (YYYY-MM-DD); today when omitted.')
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Tenants filled concurrently.')
+
+    def handle(self, *args, **options):
+        if options['tenants'] < 1 or options['regions'] < 1 or options['members'] < 1:
+            raise CommandError("--tenants, --regions and --members must be at least 1.")
+        now = None
+        if options['as_of']:
+            try:
+                now = datetime.strptime(options['as_of'], '%Y-%m-%d').replace(tzinfo=timezone.utc)
+            except ValueError:
+                raise CommandError("--as-of must be a date in YYYY-MM-DD format.")
+
+        schema_names = tenant_schema_names(options['tenants'], options['prefix'])
+        sizes = dict(zip(schema_names, tenant_sizes(options['tenants'], options['members'], options['size_skew'])))
+        tenants = ensure_tenants(schema_names, label='Synthetic', progress=lambda message: self.stdout.write(f"  {message}"))
+
+        def fill(tenant):
+            if Region.objects.exists():
+                return None
+            return fill_schema(
+                options['seed'], options['regions'], sizes[tenant.schema_name], region_skew=options['region_skew'],
+                duplicate_rate=options['duplicate_rate'], with_history=options['history'], now=now,
+            )
+
+        started = time.perf_counter()
+        total = failed = 0
+        for outcome in for_each_tenant(fill, tenants, workers=options['workers']):
+            if outcome.error is not None:
+                failed += 1
+                self.stderr.write(f"{outcome.schema_name}: {outcome.error}")
+            elif outcome.result is None:
+                self.stdout.write(f"{outcome.schema_name}: has data, kept")
+            else:
+                total += outcome.result
+                self.stdout.write(
+                    f"{outcome.schema_name}: {outcome.result:,} members in {outcome.seconds:.1f}s "
+                    f"({outcome.result / max(outcome.seconds, 1e-9):,.0f}/s)"
+                )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{total:,} members in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f}/s) "
+            f"across {len(tenants) - failed} tenant(s)"
+        )
+        if failed:
+            raise CommandError(f"{failed} tenant(s) failed.")
+
+
+def tenant_sizes(tenants, members, skew):
+    """Members per tenant, averaging members; Zipf-skewed by skew, the first tenant largest."""
+    if not skew:
+        return [members] * tenants
+    cumulative = zipf_weights(tenants, skew)
+    weights = [cumulative[0]] + [high - low for low, high in zip(cumulative, cumulative[1:])]
+    return [max(1, round(tenants * members * weight / cumulative[-1])) for weight in weights]
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import get_tenant_model
+
+from starterapp.auth import issue_api_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Prints a signed bearer token for API_AUTH_MODE='signed_token'. The token is "
+        "only accepted on the given schema and expires after API_TOKEN_MAX_AGE seconds. "
+        "The shared API's clone, rename, drop and promote routes always require a public "
+        "schema token whose subject is an active staff user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', required=True, help='Schema the token is valid on (a tenant, or public).')
+        parser.add_argument('--subject', required=True, help='Name of the client the token is issued to.')
+
+    def handle(self, *args, **options):
+        if not get_tenant_model().all_tenants.filter(schema_name=options['schema']).exists():
+            raise CommandError(f"No tenant with schema '{options['schema']}'.")
+        self.stdout.write(issue_api_token(options['schema'], options['subject']))
@@ -0,0 +1,88 @@
+import asyncio
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import get_public_schema_name
+
+from shared_app.lifecycle import drop_tenant
+from shared_app.loadgen import (
+    DEFAULT_MEMBERS, DEFAULT_REGIONS, DEFAULT_SCHEMA_PREFIX, DEFAULT_ZIPF_S, MIXES,
+    format_summary, run_load, setup_tenants, tenant_schema_names,
+)
+from shared_app.models import Client
+from starterapp.auth import issue_api_token
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives a weighted mix of tenant and shared API requests at a running server "
+        "(runserver, gunicorn or uvicorn) from many concurrent keep-alive connections, "
+        "with Zipf-skewed tenant popularity, and reports throughput, p50/p95/p99 "
+        "latency and error rates. Load-test tenants are created on first use."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the server under test.')
+        parser.add_argument('--tenants', type=int, default=20, help='Number of load-test tenants to spread traffic over.')
+        parser.add_argument('--prefix', default=DEFAULT_SCHEMA_PREFIX, help='Schema and domain prefix of the load-test tenants.')
+        parser.add_argument('--regions', type=int, default=DEFAULT_REGIONS, help='Regions seeded per new tenant.')
+        parser.add_argument('--members', type=int, default=DEFAULT_MEMBERS, help='Members seeded per new tenant.')
+        parser.add_argument('--mix', choices=sorted(MIXES), default='read-heavy')
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent connections.')
+        parser.add_argument('--duration', type=float, default=30.0, help='Seconds to run.')
+        parser.add_argument('--rate', type=float, default=None,
+                            help='Target requests per second in total; unpaced when omitted.')
+        parser.add_argument('--zipf', type=float, default=DEFAULT_ZIPF_S,
+                            help='Zipf exponent of tenant popularity; 0 spreads traffic evenly.')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed, for repeatable request sequences.')
+        parser.add_argument('--label', default='', help='Name of the run in the report, e.g. the server profile.')
+        parser.add_argument('--json', metavar='FILE', help='Also write the summary as JSON to FILE.')
+        parser.add_argument('--setup-only', action='store_true', help='Create and seed the tenants, then exit.')
+        parser.add_argument('--teardown', action='store_true', help='Drop the load-test tenants, then exit.')
+
+    def handle(self, *args, **options):
+        if options['tenants'] < 1 or options['regions'] < 1 or options['members'] < 1:
+            raise CommandError("--tenants, --regions and --members must be at least 1.")
+
+        if options['teardown']:
+            schemas = tenant_schema_names(options['tenants'], options['prefix'])
+            for tenant in Client.objects.filter(schema_name__in=schemas):
+                # The run is over, so no worker routes requests to them any more
+                drop_tenant(tenant, wait=False)
+                self.stdout.write(f"Dropped {tenant.schema_name}")
+            return
+
+        tenants = setup_tenants(
+            options['tenants'], options['prefix'], options['regions'], options['members'],
+            progress=lambda message: self.stdout.write(f"  {message}"), seed=options['seed'] or 0,
+        )
+        if options['setup_only']:
+            self.stdout.write(f"{len(tenants)} tenant(s) ready.")
+            return
+
+        public_token = None
+        if settings.API_AUTH_MODE == 'signed_token':
+            public_token = issue_api_token(get_public_schema_name(), 'loadtest')
+            for tenant in tenants:
+                tenant.token = issue_api_token(tenant.schema_name, 'loadtest')
+
+        self.stdout.write(
+            f"Running '{options['mix']}' against {options['url']} for {options['duration']:.0f}s "
+            f"with {options['concurrency']} connection(s) over {len(tenants)} tenant(s)"
+        )
+        try:
+            report = asyncio.run(run_load(
+                options['url'], tenants, mix=options['mix'], concurrency=options['concurrency'],
+                duration=options['duration'], rate=options['rate'], zipf_s=options['zipf'],
+                public_token=public_token, seed=options['seed'],
+                progress=lambda seconds, done: self.stdout.write(f"  {seconds:5.0f}s {done} requests"),
+            ))
+        except KeyboardInterrupt:
+            raise CommandError("Interrupted.")
+
+        summary = report.summary()
+        self.stdout.write(format_summary(summary, options['label']))
+        if options['json']:
+            with open(options['json'], 'w') as file:
+                json.dump({'label': options['label'], 'mix': options['mix'], **summary}, file, indent=2)
@@ -0,0 +1,120 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter so nothing is already imported. Timings for the
+# startup phases go to stdout as JSON; -X importtime writes to stderr.
+PROBE = """
+import json, os, sys, time
+from importlib import import_module
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'starterapp.settings')
+timings = {}
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    timings[label] = time.perf_counter() - start
+    return result
+
+timed('application (%s)' % sys.argv[1], lambda: import_module(sys.argv[1]))
+timed('tenant urlconf', lambda: import_module('starterapp.urls'))
+timed('public urlconf', lambda: import_module('starterapp.urls_public'))
+
+if sys.argv[2] == 'lazy':
+    timed('admin registration', lambda: import_module('starterapp.urls_admin'))
+    timed('tenant api import', lambda: import_module('tenant_app.urls'))
+    timed('shared api import', lambda: import_module('shared_app.urls'))
+    for name in ('tenant_app.api', 'shared_app.api'):
+        api = import_module(name).api
+        timed('%s openapi' % name, lambda: api.get_openapi_schema(path_prefix=''))
+
+print(json.dumps(timings))
+"""
+
+ENTRYPOINTS = {
+    'wsgi': 'starterapp.wsgi',
+    'asgi': 'starterapp.asgi',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Profiles worker startup: import time per module (python -X importtime) "
+        "and the cost of each startup phase, including the pieces that are built "
+        "lazily on first use (admin registration, ninja APIs and their OpenAPI schemas)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entrypoint', choices=sorted(ENTRYPOINTS), default='wsgi')
+        parser.add_argument('--top', type=int, default=25, help='Number of modules to list.')
+        parser.add_argument(
+            '--sort', choices=['cumulative', 'self'], default='cumulative',
+            help='Order modules by cumulative or self import time.',
+        )
+        parser.add_argument(
+            '--include-lazy', action='store_true',
+            help='Also load the lazily built pieces, i.e. the cost of the first request.',
+        )
+        parser.add_argument(
+            '--prefix', default=None,
+            help='Only list modules whose name starts with this prefix (e.g. "ninja").',
+        )
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [
+                sys.executable, '-X', 'importtime', '-c', PROBE,
+                ENTRYPOINTS[options['entrypoint']],
+                'lazy' if options['include_lazy'] else 'eager',
+            ],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup probe failed:\n{result.stderr[-4000:]}")
+
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        modules = parse_importtime(result.stderr)
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Startup phases"))
+        for label, seconds in timings.items():
+            self.stdout.write(f"  {seconds * 1000:10.1f} ms  {label}")
+        self.stdout.write(f"  {sum(timings.values()) * 1000:10.1f} ms  total")
+
+        if options['prefix']:
+            modules = [m for m in modules if m['module'].startswith(options['prefix'])]
+        modules.sort(key=lambda m: m[options['sort']], reverse=True)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\nTop {options['top']} imports by {options['sort']} time ({len(modules)} modules)"
+        ))
+        self.stdout.write(f"  {'self ms':>10}  {'cumul. ms':>10}  module")
+        for module in modules[:options['top']]:
+            self.stdout.write(
+                f"  {module['self'] / 1000:10.1f}  {module['cumulative'] / 1000:10.1f}  {module['module']}"
+            )
+
+
+def parse_importtime(output):
+    """
+    Parses the stderr of `python -X importtime` into a list of
+    {'module', 'self', 'cumulative'} dicts with times in microseconds.
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        modules.append({
+            'module': fields[2].strip(),
+            'self': int(fields[0]),
+            'cumulative': int(fields[1]),
+        })
+    return modules
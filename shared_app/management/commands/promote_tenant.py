@@ -0,0 +1,38 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from shared_app.lifecycle import POOL_DELETE_BATCH_SIZE, PROMOTE_DRAIN_SECONDS, format_event, promote_tenant
+from shared_app.models import Client
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves a pooled tenant out of the shared pool schema into a schema of its own, "
+        "while it keeps being served. Writes to the pool are held back only for the "
+        "final reconciliation and switch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', required=True, help='Schema name of the pooled tenant; its new schema.')
+        parser.add_argument(
+            '--drain', type=float, default=PROMOTE_DRAIN_SECONDS,
+            help='Seconds to wait after the switch for requests already routed to the pool.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=POOL_DELETE_BATCH_SIZE,
+            help='Pooled rows deleted per transaction after the switch.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tenant = Client.all_tenants.get(schema_name=options['schema'])
+        except Client.DoesNotExist:
+            raise CommandError(f"No tenant with schema '{options['schema']}'.")
+
+        try:
+            promote_tenant(
+                tenant, drain=options['drain'], batch_size=options['batch_size'],
+                progress=lambda event: self.stdout.write(format_event(event)),
+            )
+        except ValidationError as exc:
+            raise CommandError('; '.join(exc.messages))
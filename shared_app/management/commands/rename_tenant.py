@@ -0,0 +1,45 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from shared_app.lifecycle import format_event, move_tenant, rename_tenant
+from shared_app.models import Client
+
+
+class Command(BaseCommand):
+    help = (
+        "Renames a tenant's schema and/or moves it to another domain (URL subfolder). "
+        "Returns once every worker has dropped the tenant it had cached (TENANT_CACHE_SECONDS)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', required=True, help='Current schema of the tenant.')
+        parser.add_argument('--to-schema', help='New schema name.')
+        parser.add_argument('--to-domain', help='New primary domain.')
+        parser.add_argument(
+            '--drop-old-domains', action='store_true',
+            help='Stop serving the tenant under its previous domains.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['to_schema'] and not options['to_domain']:
+            raise CommandError("Pass --to-schema, --to-domain or both.")
+        try:
+            tenant = Client.all_tenants.get(schema_name=options['schema'])
+        except Client.DoesNotExist:
+            raise CommandError(f"No tenant with schema '{options['schema']}'.")
+
+        def progress(event):
+            self.stdout.write(format_event(event))
+
+        try:
+            if options['to_schema']:
+                # One wait covers both changes
+                rename_tenant(tenant, options['to_schema'], progress=progress, wait=not options['to_domain'])
+                self.stdout.write(f"Renamed schema {options['schema']} to {tenant.schema_name}")
+            if options['to_domain']:
+                move_tenant(
+                    tenant, options['to_domain'], keep_old_domains=not options['drop_old_domains'], progress=progress,
+                )
+                self.stdout.write(f"{tenant.schema_name} is now served under /client/{options['to_domain']}/")
+        except ValidationError as exc:
+            raise CommandError('; '.join(exc.messages))
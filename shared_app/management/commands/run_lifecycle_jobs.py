@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from shared_app.lifecycle import JOB_POLL_SECONDS, claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the tenant lifecycle jobs queued by the shared API (clone, drop, rename, "
+        "promote), one at a time, outside the web workers. Run one or more alongside "
+        "the server; a job whose runner is killed is reported failed once its "
+        "heartbeat is older than JOB_HEARTBEAT_TIMEOUT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the queued jobs, then exit.')
+        parser.add_argument('--poll', type=float, default=JOB_POLL_SECONDS, help='Seconds between checks for queued jobs.')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['poll'])
+                continue
+            self.stdout.write(f"{job.kind} {job.pk}: running")
+            run_job(job)
+            job.refresh_from_db()
+            self.stdout.write(f"{job.kind} {job.pk}: {job.status}" + (f" ({job.error})" if job.error else ""))
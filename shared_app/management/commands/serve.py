@@ -0,0 +1,91 @@
+import importlib.util
+import os
+import shutil
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from starterapp.serving import (
+    PROFILES, ConnectionBudgetError, compute_profile, connection_budget, gunicorn_argv, server_environ,
+    usable_cores, usable_memory_mb,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the application under gunicorn with a server profile (wsgi: gthread "
+        "workers; asgi: uvicorn workers) sized from the usable cores and the "
+        "database's connection limit. Needs gunicorn, and uvicorn for asgi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', choices=PROFILES, default='wsgi')
+        parser.add_argument('--bind', default='0.0.0.0:8000')
+        parser.add_argument('--cores', type=int, help='Cores to size for; detected when omitted.')
+        parser.add_argument(
+            '--max-connections', type=int,
+            help="The database's max_connections; read from the database when omitted.",
+        )
+        parser.add_argument(
+            '--instances', type=int, default=settings.SERVER_INSTANCES,
+            help='Instances sharing the database, each running this profile.',
+        )
+        parser.add_argument(
+            '--reserved-connections', type=int, default=settings.SERVER_RESERVED_CONNECTIONS,
+            help='Connections left free for management commands and maintenance.',
+        )
+        parser.add_argument(
+            '--max-worker-memory', type=int,
+            help='Private memory in MB after which a worker is recycled; 0 turns it off. '
+                 'Defaults to the workers\' share of the usable memory.',
+        )
+        parser.add_argument('--max-requests', type=int, default=settings.SERVER_MAX_REQUESTS)
+        parser.add_argument('--print', action='store_true', help='Print the gunicorn command instead of running it.')
+
+    def handle(self, *args, **options):
+        if options['max_connections'] is None:
+            max_connections, superuser_reserved = self._database_limits()
+        else:
+            max_connections, superuser_reserved = options['max_connections'], 0
+        try:
+            budget = connection_budget(
+                max_connections, superuser_reserved, options['reserved_connections'], options['instances'],
+            )
+            profile = compute_profile(
+                options['profile'], options['cores'] or usable_cores(), budget,
+                memory_mb=usable_memory_mb(), max_requests=options['max_requests'],
+                max_worker_memory_mb=options['max_worker_memory'],
+            )
+        except ConnectionBudgetError as exc:
+            raise CommandError(str(exc))
+
+        argv = gunicorn_argv(profile, options['bind'])
+        environ = server_environ(profile)
+        if options['print']:
+            self.stdout.write(' '.join(f'{name}={value}' for name, value in environ.items()) + ' ' + ' '.join(argv))
+            return
+
+        self.stdout.write(
+            f"{profile.name}: {profile.workers} worker(s) x {profile.threads} "
+            f"{'thread(s)' if profile.name == 'wsgi' else 'concurrent request(s)'}, "
+            f"up to {profile.connections} of {budget} database connection(s); "
+            f"recycled after {profile.max_requests} (+{profile.max_requests_jitter}) requests"
+            + (f" or {profile.max_worker_memory_mb} MB" if profile.max_worker_memory_mb else '')
+        )
+        executable = shutil.which('gunicorn')
+        if executable is None:
+            raise CommandError("gunicorn is not installed (pip install gunicorn).")
+        if profile.name == 'asgi' and importlib.util.find_spec('uvicorn') is None:
+            raise CommandError("The asgi profile needs uvicorn (pip install uvicorn).")
+        # The master must not inherit an open database connection
+        connection.close()
+        os.execve(executable, argv, {**os.environ, **environ})
+
+    def _database_limits(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT current_setting('max_connections')::int, "
+                "current_setting('superuser_reserved_connections')::int"
+            )
+            return cursor.fetchone()
@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from shared_app.parallel import DEFAULT_WORKERS, for_each_tenant, tenant_schemas
+from tenant_app.maintenance import ANALYZE_RATIO, MIN_ROWS, VACUUM_RATIO, maintain
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports dead tuples, estimated bloat and stale statistics for every table of "
+        "every tenant schema, several schemas at a time, and runs VACUUM (ANALYZE) or "
+        "ANALYZE on the tables past the thresholds. Use --dry-run to only report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Schemas checked concurrently.')
+        parser.add_argument('--schema', action='append', dest='schemas', help='Only check this schema (repeatable).')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be done without doing it.')
+        parser.add_argument('--analyze-ratio', type=float, default=ANALYZE_RATIO,
+                            help='ANALYZE when this share of rows changed since the last analyze.')
+        parser.add_argument('--vacuum-ratio', type=float, default=VACUUM_RATIO,
+                            help='VACUUM when this share of tuples is dead.')
+        parser.add_argument('--min-rows', type=int, default=MIN_ROWS, help='Leave smaller tables alone.')
+        parser.add_argument('--all-tables', action='store_true',
+                            help='List every table, not only the ones that need maintenance.')
+
+    def handle(self, *args, **options):
+        tenants = tenant_schemas(options['schemas'])
+        if options['schemas'] and len(tenants) != len(set(options['schemas'])):
+            missing = set(options['schemas']) - {tenant.schema_name for tenant in tenants}
+            raise CommandError(f"No tenant with schema {', '.join(sorted(missing))}.")
+
+        thresholds = {
+            'analyze_ratio': options['analyze_ratio'],
+            'vacuum_ratio': options['vacuum_ratio'],
+            'min_rows': options['min_rows'],
+        }
+
+        def check(tenant):
+            # VACUUM refuses to run inside a transaction block
+            connection.set_autocommit(True)
+            return maintain(dry_run=options['dry_run'], **thresholds)
+
+        start = time.perf_counter()
+        actions = failed = 0
+        verb = 'would run' if options['dry_run'] else 'ran'
+        for outcome in for_each_tenant(check, tenants, workers=options['workers']):
+            if outcome.error is not None:
+                failed += 1
+                self.stderr.write(f"{outcome.schema_name}: {outcome.error}")
+                continue
+            rows = [(health, action) for health, action in outcome.result if action or options['all_tables']]
+            if not rows:
+                continue
+            self.stdout.write(f"{outcome.schema_name} ({outcome.seconds * 1000:.0f} ms)")
+            for health, action in rows:
+                analyzed = f"{health.last_analyzed:%Y-%m-%d %H:%M}" if health.last_analyzed else 'never'
+                self.stdout.write(
+                    f"  {health.table:<40} live {health.live_rows:>10} dead {health.dead_rows:>9} "
+                    f"({health.dead_ratio:5.1%}) bloat ~{health.estimated_bloat_bytes // 1024:>7} kB "
+                    f"modified {health.stale_ratio:6.1%} analyzed {analyzed}"
+                    + (f"  -> {verb} {action}" if action else '')
+                )
+                actions += bool(action)
+
+        self.stdout.write(
+            f"{actions} table(s) {'need' if options['dry_run'] else 'got'} maintenance across "
+            f"{len(tenants) - failed} schema(s) in {time.perf_counter() - start:.2f}s"
+        )
+        if failed:
+            raise CommandError(f"{failed} schema(s) failed.")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from starterapp.warmup import WARMUP_TENANTS, format_report, warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the worker warm-up once and reports how long each step took: loads the "
+        "busiest tenant schemas' tables into PostgreSQL's buffers and renders the "
+        "OpenAPI documents. The caches of a server's workers are warmed by the workers "
+        "themselves (SERVER_WARMUP); run this after a database restart or to time it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenants', type=int, default=WARMUP_TENANTS, help='Busiest tenant schemas to warm.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(format_report(warm_up(options['tenants'])))
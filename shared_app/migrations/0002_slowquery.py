@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shared_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_name', models.CharField(db_index=True, max_length=63)),
+                ('fingerprint', models.CharField(max_length=16)),
+                ('sql', models.TextField()),
+                ('calls', models.BigIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+                ('last_route', models.CharField(blank=True, max_length=255)),
+                ('last_request_id', models.CharField(blank=True, max_length=64)),
+                ('last_seen', models.DateTimeField()),
+                ('plan', models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-max_ms'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='slowquery',
+            constraint=models.UniqueConstraint(fields=('schema_name', 'fingerprint'), name='slowquery_schema_fingerprint'),
+        ),
+    ]
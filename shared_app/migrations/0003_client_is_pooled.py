@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shared_app', '0002_slowquery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='is_pooled',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shared_app', '0003_client_is_pooled'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LifecycleJob',
+            fields=[
+                ('id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=16)),
+                ('status', models.CharField(default='running', max_length=8)),
+                ('events', models.JSONField(default=list)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shared_app', '0004_lifecyclejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lifecyclejob',
+            name='args',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AlterField(
+            model_name='lifecyclejob',
+            name='status',
+            field=models.CharField(default='queued', max_length=8),
+        ),
+    ]
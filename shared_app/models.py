@@ -1,15 +1,99 @@
+from django.conf import settings
 from django.db import models
 from django_tenants.models import TenantMixin, DomainMixin
 
+class DedicatedTenantManager(models.Manager):
+    """
+    Tenants with a schema of their own. This is the default manager, so
+    django-tenants' migrate_schemas, tenant_command and all_tenants_command, and
+    every sweep over Client.objects, skip pooled tenants, whose schema does not
+    exist. Use Client.all_tenants to include them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_pooled=False)
+
 class Client(TenantMixin):
     name = models.CharField(max_length=100)
     created_on = models.DateField(auto_now_add=True)
+    # Rows live in the shared settings.TENANT_POOL_SCHEMA schema, tagged with this
+    # client's id (see tenant_app.tenancy); schema_name is reserved for promotion
+    is_pooled = models.BooleanField(default=False)
 
     # Default true, schema will be automatically created and synced when it is saved
     auto_create_schema = True
 
+    objects = DedicatedTenantManager()
+    all_tenants = models.Manager()
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.is_pooled:
+            # The schema is only created by shared_app.lifecycle.promote_tenant
+            self.auto_create_schema = False
+            if self._state.adding:
+                pool_tenant()
+        super().save(*args, **kwargs)
+
+def pool_tenant():
+    """The Client that owns the pool schema, created (and migrated) on first use."""
+    tenant, _ = Client.objects.get_or_create(
+        schema_name=settings.TENANT_POOL_SCHEMA, defaults={'name': 'Pooled tenants'},
+    )
+    return tenant
+
 class Domain(DomainMixin):
-    pass
\ No newline at end of file
+    pass
+
+class SlowQuery(models.Model):
+    """
+    The slowest query shapes seen per tenant schema, merged in from each worker's
+    in-memory buffer by starterapp.querylog. Durations are in milliseconds.
+    """
+    schema_name = models.CharField(max_length=63, db_index=True)
+    fingerprint = models.CharField(max_length=16)
+    sql = models.TextField()
+    calls = models.BigIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    last_route = models.CharField(max_length=255, blank=True)
+    last_request_id = models.CharField(max_length=64, blank=True)
+    last_seen = models.DateTimeField()
+    # EXPLAIN (FORMAT JSON) output for a sampled slow call: the plan, without execution statistics
+    plan = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-max_ms']
+        constraints = [
+            models.UniqueConstraint(fields=['schema_name', 'fingerprint'], name='slowquery_schema_fingerprint'),
+        ]
+
+    def __str__(self):
+        return f'{self.schema_name}: {self.sql[:80]}'
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.calls if self.calls else 0
+
+class LifecycleJob(models.Model):
+    """
+    Progress and outcome of a tenant lifecycle job queued from the shared API
+    and run by run_lifecycle_jobs (see shared_app.lifecycle.enqueue_job). A row,
+    rather than a cache entry, so any worker can answer a poll.
+    """
+    id = models.CharField(max_length=32, primary_key=True)
+    # 'clone', 'drop', 'rename' or 'promote'
+    kind = models.CharField(max_length=16)
+    # The tenant's client_id and the operation's keyword arguments
+    args = models.JSONField(default=dict)
+    # 'queued', 'running', 'done' or 'failed'
+    status = models.CharField(max_length=8, default='queued')
+    events = models.JSONField(default=list)
+    error = models.TextField(null=True, blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.kind} {self.id} ({self.status})'
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import connection
+from django_tenants.utils import get_public_schema_name
+from ninja.security import HttpBearer
+
+API_TOKEN_SALT = 'starterapp.api-token'
+
+
+def issue_api_token(schema_name, subject):
+    """
+    Returns a signed bearer token for `subject` that is only valid on `schema_name`
+    (a tenant schema, or the public schema for the shared API).
+    """
+    return signing.dumps({'schema': schema_name, 'sub': subject}, salt=API_TOKEN_SALT, compress=True)
+
+
+class SignedTokenAuth(HttpBearer):
+    """
+    Stateless bearer auth: the token's HMAC signature and age are checked in memory,
+    with no session, user or database lookup. A token issued for one tenant schema
+    is rejected on every other schema. Pooled tenants share the pool schema, so
+    the token is matched against the schema_name of the tenant the request was
+    routed to rather than the connection's.
+    """
+
+    def authenticate(self, request, token):
+        try:
+            claims = signing.loads(token, salt=API_TOKEN_SALT, max_age=settings.API_TOKEN_MAX_AGE)
+        except signing.BadSignature:
+            # Also covers signing.SignatureExpired
+            return None
+        tenant = getattr(request, 'tenant', None)
+        if claims.get('schema') != getattr(tenant, 'schema_name', connection.schema_name):
+            return None
+        return claims
+
+
+class StaffTokenAuth(SignedTokenAuth):
+    """
+    For the shared API's tenant lifecycle routes, whatever API_AUTH_MODE is: a
+    signed token issued for the public schema whose subject is the username of
+    an active staff user there. Unlike SignedTokenAuth this checks the user on
+    every request, so revoking staff status revokes the token.
+    """
+
+    def authenticate(self, request, token):
+        claims = super().authenticate(request, token)
+        if claims is None or claims['schema'] != get_public_schema_name():
+            return None
+        User = get_user_model()
+        staff = User.objects.filter(**{User.USERNAME_FIELD: claims.get('sub')}, is_active=True, is_staff=True)
+        return claims if staff.exists() else None
+
+
+def api_auth():
+    """The auth= argument for both NinjaAPI instances, selected by settings.API_AUTH_MODE."""
+    if settings.API_AUTH_MODE == 'signed_token':
+        return SignedTokenAuth()
+    return None
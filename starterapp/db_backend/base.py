@@ -0,0 +1,177 @@
+"""
+django-tenants' PostgreSQL backend with the slow-query log (starterapp.querylog)
+installed on every connection. Use it as DATABASES['default']['ENGINE'].
+
+django-tenants sends SET search_path for every cursor, that is before nearly
+every query, whether or not the schema changed. settings.TENANT_SEARCH_PATH_MODE
+picks what this backend does instead:
+  always    django-tenants' behaviour
+  skip      SET search_path only when the connection is not on the right
+            schema already; a rollback makes the schema unknown again, since
+            it may have undone the SET
+  pipeline  like skip, and the SET goes out in one round trip with the next
+            SELECT, INSERT, UPDATE, DELETE, WITH or MERGE; other statements,
+            COPY and server-side cursors get it sent on its own first
+Every connection counts the switches it made and those it avoided, compared
+with django-tenants, in search_path_stats; QueryLogMiddleware reports them per
+request.
+"""
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError
+from django.db.backends.utils import CursorDebugWrapper, CursorWrapper
+from django_tenants.postgresql_backend.base import DatabaseWrapper as TenantDatabaseWrapper, is_psycopg3, psycopg
+from django_tenants.utils import get_limit_set_calls
+
+from starterapp.querylog import SlowQueryLogger
+
+SEARCH_PATH_MODES = ('always', 'skip', 'pipeline')
+# Statements that may share a query string with the SET; VACUUM, CREATE INDEX
+# CONCURRENTLY and the like refuse to run in a multi-statement string
+_PIPELINED = re.compile(r'\s*(SELECT|INSERT|UPDATE|DELETE|WITH|MERGE)\b', re.IGNORECASE)
+# Cursor methods that send SQL without going through execute()
+_UNWRAPPED = frozenset(('copy_expert', 'copy_from', 'copy_to'))
+
+
+@dataclass
+class SearchPathStats:
+    # SET search_path statements sent
+    switched: int = 0
+    # SET search_path statements django-tenants would have sent, but were not needed
+    avoided: int = 0
+
+
+class SearchPathCursorMixin:
+    """Sends a pipelined SET search_path that is still pending before SQL that bypasses execute()."""
+
+    def __getattr__(self, attr):
+        if attr in _UNWRAPPED:
+            self.db.flush_search_path()
+        return super().__getattr__(attr)
+
+    def callproc(self, *args, **kwargs):
+        self.db.flush_search_path()
+        return super().callproc(*args, **kwargs)
+
+
+class SearchPathCursorWrapper(SearchPathCursorMixin, CursorWrapper):
+    pass
+
+
+class SearchPathCursorDebugWrapper(SearchPathCursorMixin, CursorDebugWrapper):
+    pass
+
+
+class DatabaseWrapper(TenantDatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        self.search_path_mode = getattr(settings, 'TENANT_SEARCH_PATH_MODE', 'always')
+        if self.search_path_mode not in SEARCH_PATH_MODES:
+            raise ImproperlyConfigured(f"TENANT_SEARCH_PATH_MODE must be one of {', '.join(SEARCH_PATH_MODES)}.")
+        if self.search_path_mode == 'pipeline' and is_psycopg3:
+            # psycopg 3 binds parameters server-side, which multi-statement strings do not allow
+            self.search_path_mode = 'skip'
+        self.search_path_stats = SearchPathStats()
+        # The search_path the session is known to have, and the SET still to be sent with the next statement
+        self._session_search_path = None
+        self._pending_search_path = None
+        super().__init__(*args, **kwargs)
+        self.execute_wrappers.append(SlowQueryLogger())
+        if self.search_path_mode == 'pipeline':
+            self.execute_wrappers.append(self._pipeline_search_path)
+
+    def connect(self):
+        self._forget_search_path()
+        super().connect()
+
+    def close(self):
+        self._forget_search_path()
+        super().close()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self._forget_search_path()
+
+    def _savepoint_rollback(self, sid):
+        try:
+            return super()._savepoint_rollback(sid)
+        finally:
+            self._forget_search_path()
+
+    def make_cursor(self, cursor):
+        return SearchPathCursorWrapper(cursor, self)
+
+    def make_debug_cursor(self, cursor):
+        return SearchPathCursorDebugWrapper(cursor, self)
+
+    def _cursor(self, name=None):
+        # What django-tenants' _cursor() decides before it sends the SET
+        stock_sets = not get_limit_set_calls() or not self.search_path_set_schemas
+        if self.search_path_mode == 'always':
+            if stock_sets:
+                self.search_path_stats.switched += 1
+            return super()._cursor(name=name) if name else super()._cursor()
+
+        # The original backend's _cursor(), without django-tenants' SET
+        cursor = super(TenantDatabaseWrapper, self)._cursor(name=name) if name else super(TenantDatabaseWrapper, self)._cursor()
+        if not self.schema_name:
+            raise ImproperlyConfigured("Database schema not set. Did you forget to call set_schema() or set_tenant()?")
+        search_path = self._get_cursor_search_paths()
+        current = self._pending_search_path[1] if self._pending_search_path else self._session_search_path
+        if search_path == current:
+            if stock_sets:
+                self.search_path_stats.avoided += 1
+        else:
+            self.search_path_stats.switched += 1
+            statement = 'SET search_path = {0}'.format(','.join(f"'{schema}'" for schema in search_path))
+            self._pending_search_path = (statement, search_path)
+            # A server-side cursor's DECLARE cannot carry the SET
+            if self.search_path_mode != 'pipeline' or name:
+                self.flush_search_path()
+        self.search_path_set_schemas = search_path
+        return cursor
+
+    def flush_search_path(self):
+        """Sends the pending SET search_path, if any, on its own."""
+        if self._pending_search_path is None:
+            return
+        statement, search_path = self._pending_search_path
+        self._pending_search_path = None
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(statement)
+        except (DatabaseError, psycopg.Error):
+            # As in django-tenants: in a failed transaction only a rollback
+            # follows, after which the search_path is set again
+            self._session_search_path = None
+        else:
+            self._session_search_path = search_path
+
+    def _pipeline_search_path(self, execute, sql, params, many, context):
+        pending = self._pending_search_path
+        if pending is None:
+            return execute(sql, params, many, context)
+        if many or not isinstance(sql, str) or not _PIPELINED.match(sql):
+            self.flush_search_path()
+            return execute(sql, params, many, context)
+        statement, search_path = pending
+        if params is not None:
+            statement = statement.replace('%', '%%')
+        try:
+            result = execute(f'{statement}; {sql}', params, many, context)
+        except Exception:
+            # Left pending: the SET may have failed or been rolled back with the statement
+            self._session_search_path = None
+            raise
+        self._pending_search_path = None
+        self._session_search_path = search_path
+        return result
+
+    def _forget_search_path(self):
+        self._session_search_path = None
+        self._pending_search_path = None
@@ -0,0 +1,83 @@
+"""
+gunicorn hooks for the server profiles of starterapp.serving; the worker counts
+and limits are passed on the command line by `manage.py serve`.
+
+With --preload the master imports the application once and forks the workers
+from it. Before the first fork the master closes its database connections (a
+socket shared by several processes corrupts the protocol stream) and moves
+everything allocated so far out of the garbage collector's reach with
+gc.freeze(), so collections in the workers do not write to, and so copy, the
+shared pages.
+
+With SERVER_WARMUP on, each worker warms up (starterapp.warmup) before it
+takes traffic. Each worker also watches its private memory, which leaves out
+the pages it still shares with the master, and shuts itself down gracefully once
+that passes SERVER_MAX_WORKER_MEMORY_MB; the master then starts a fresh one.
+"""
+import gc
+import logging
+import os
+import signal
+import threading
+
+# Seconds between memory checks in each worker
+MEMORY_CHECK_INTERVAL = 10
+
+logger = logging.getLogger('starterapp.serving')
+
+
+def when_ready(server):
+    from django.db import connections
+
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    limit_mb = int(os.environ.get('SERVER_MAX_WORKER_MEMORY_MB') or 0)
+    if limit_mb:
+        threading.Thread(
+            target=_watch_memory, args=(worker, limit_mb), name='memory-watch', daemon=True,
+        ).start()
+
+
+def post_worker_init(worker):
+    from django.conf import settings
+
+    if not settings.SERVER_WARMUP:
+        return
+    from starterapp.warmup import format_report, warm_up
+
+    try:
+        report = warm_up(executor=getattr(worker, 'tpool', None), threads=worker.cfg.threads)
+    except Exception:
+        # A cold worker is still better than none
+        logger.exception("Warm-up of worker %s failed", worker.pid)
+    else:
+        logger.info("Worker %s: %s", worker.pid, format_report(report))
+
+
+def private_memory_mb():
+    """Private_Clean + Private_Dirty of this process, or its RSS where smaps_rollup is missing."""
+    try:
+        with open('/proc/self/smaps_rollup') as file:
+            kilobytes = sum(
+                int(line.split()[1]) for line in file if line.startswith(('Private_Clean:', 'Private_Dirty:'))
+            )
+        return kilobytes / 1024
+    except OSError:
+        import resource
+        # Peak RSS, in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _watch_memory(worker, limit_mb):
+    stop = threading.Event()
+    while not stop.wait(MEMORY_CHECK_INTERVAL):
+        used = private_memory_mb()
+        if used > limit_mb:
+            logger.warning("Worker %s uses %.0f MB of private memory (limit %s MB); recycling it", worker.pid, used, limit_mb)
+            # The same graceful shutdown as max_requests: in-flight requests finish first
+            os.kill(worker.pid, signal.SIGTERM)
+            return
@@ -0,0 +1,19 @@
+from django.urls import URLResolver
+from django.urls.resolvers import RoutePattern
+
+
+def lazy_include(route, urlconf_name, app_name, namespace=None):
+    """
+    Equivalent of path(route, include(urlconf_name)) that does not import
+    urlconf_name until a request actually reaches route (or a reverse() needs it).
+
+    django.urls.include() imports its module immediately, so every URLconf that
+    lists the admin and both ninja APIs pays for all of them on the first request,
+    whichever one it was for.
+    """
+    return URLResolver(
+        RoutePattern(route, is_endpoint=False),
+        urlconf_name,
+        app_name=app_name,
+        namespace=namespace or app_name,
+    )
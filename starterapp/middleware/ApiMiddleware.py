@@ -0,0 +1,52 @@
+import re
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+
+# /api/... on the public schema and /client/<tenant>/api/... on tenants
+API_PATH = re.compile(r'^/(?:%s/[^/]+/)?api/' % re.escape(settings.TENANT_SUBFOLDER_PREFIX))
+
+
+def is_api_request(request):
+    return API_PATH.match(request.path_info) is not None
+
+
+class SkipForApiMixin:
+    """
+    Hands API requests straight to the next layer. API clients authenticate
+    statelessly (see starterapp.auth), so a session lookup, CSRF check or message
+    storage would be pure overhead for them.
+    """
+    def __call__(self, request):
+        if is_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class ApiAwareSessionMiddleware(SkipForApiMixin, SessionMiddleware):
+    pass
+
+
+class ApiAwareCsrfViewMiddleware(SkipForApiMixin, CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        # The handler calls process_view directly, outside __call__
+        if is_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class ApiAwareMessageMiddleware(SkipForApiMixin, MessageMiddleware):
+    pass
+
+
+class ApiAwareAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        if is_api_request(request):
+            # There is no session to load a user from; later middleware still reads request.user
+            request.user = AnonymousUser()
+            return
+        super().process_request(request)
@@ -0,0 +1,233 @@
+import itertools
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+# Optional faster codecs, used when the package is installed and the client accepts them
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class GzipCodec:
+    name = 'gzip'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compressobj(self):
+        return _ZlibStream(zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS))
+
+
+class ZstdCodec:
+    name = 'zstd'
+
+    def __init__(self, level):
+        self.compressor = zstandard.ZstdCompressor(level=level)
+
+    def compressobj(self):
+        return _ZstdStream(self.compressor.compressobj())
+
+
+class BrotliCodec:
+    name = 'br'
+
+    def __init__(self, level):
+        self.level = level
+
+    def compressobj(self):
+        return _BrotliStream(brotli.Compressor(quality=self.level))
+
+
+# compress() may buffer; flush() emits everything written so far, so a streamed
+# body reaches the client without waiting for the end of the stream
+class _ZlibStream:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def compress(self, data):
+        return self.stream.compress(data)
+
+    def flush(self):
+        return self.stream.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.stream.flush(zlib.Z_FINISH)
+
+
+class _ZstdStream(_ZlibStream):
+    def flush(self):
+        return self.stream.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.stream.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+class _BrotliStream(_ZlibStream):
+    def compress(self, data):
+        return self.stream.process(data)
+
+    def flush(self):
+        return self.stream.flush()
+
+    def finish(self):
+        return self.stream.finish()
+
+
+CODECS = {
+    'gzip': GzipCodec,
+    'zstd': ZstdCodec if zstandard is not None else None,
+    'br': BrotliCodec if brotli is not None else None,
+}
+
+
+def accepted_encodings(header):
+    """Content codings in an Accept-Encoding header with a non-zero q value."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = re.search(r'q=([0-9.]+)', params)
+        try:
+            if quality is None or float(quality.group(1)) > 0:
+                accepted.add(coding.strip().lower())
+        except ValueError:
+            continue
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies with the first of settings.COMPRESSION_ENCODINGS
+    the client accepts (zstd and br only when their package is installed; gzip
+    always is). Only COMPRESSION_CONTENT_TYPES are compressed, which leaves HTML
+    pages carrying CSRF tokens out of reach of BREACH-style attacks.
+
+    Bodies smaller than the minimum size for the route are sent as they are:
+    COMPRESSION_ROUTES is a list of (path regex, minimum size or None) where the
+    first match wins and None turns compression off; other paths use
+    COMPRESSION_MIN_SIZE. Streaming responses are read up to the minimum size to
+    decide, then compressed and flushed every COMPRESSION_STREAM_FLUSH_SIZE bytes
+    of body, so exports still reach the client progressively.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        levels = getattr(settings, 'COMPRESSION_LEVELS', {})
+        self.codecs = [
+            CODECS[name](levels.get(name, 5))
+            for name in getattr(settings, 'COMPRESSION_ENCODINGS', ('gzip',))
+            if CODECS.get(name) is not None
+        ]
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.routes = [(re.compile(pattern), size) for pattern, size in getattr(settings, 'COMPRESSION_ROUTES', ())]
+        self.content_types = tuple(getattr(settings, 'COMPRESSION_CONTENT_TYPES', ('application/json',)))
+        self.flush_size = getattr(settings, 'COMPRESSION_STREAM_FLUSH_SIZE', 16 * 1024)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        min_size = self.route_min_size(request.path_info)
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if (
+            min_size is None
+            or content_type not in self.content_types
+            or response.has_header('Content-Encoding')
+            or 'no-transform' in response.get('Cache-Control', '')
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codec = self.negotiate(request.headers.get('Accept-Encoding', ''))
+        if codec is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                # Cannot be peeked at from synchronous middleware; compressed regardless of size
+                response.streaming_content = compress_async_stream(response.streaming_content, codec, self.flush_size)
+            else:
+                chunks = iter(response.streaming_content)
+                head = read_at_least(chunks, min_size)
+                if sum(map(len, head)) < min_size:
+                    response.streaming_content = head
+                    return response
+                response.streaming_content = compress_stream(itertools.chain(head, chunks), codec, self.flush_size)
+            response.headers['Content-Encoding'] = codec.name
+            del response.headers['Content-Length']
+        else:
+            if len(response.content) < min_size:
+                return response
+            stream = codec.compressobj()
+            compressed = stream.compress(response.content) + stream.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+            response.headers['Content-Encoding'] = codec.name
+
+        # A strong ETag must not survive a change of representation
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
+
+    def route_min_size(self, path):
+        for pattern, size in self.routes:
+            if pattern.search(path):
+                return size
+        return self.min_size
+
+    def negotiate(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for codec in self.codecs:
+            if codec.name in accepted or '*' in accepted:
+                return codec
+        return None
+
+
+def read_at_least(chunks, size):
+    """Takes chunks from the iterator until they add up to size bytes or it is exhausted."""
+    head, total = [], 0
+    for chunk in chunks:
+        head.append(chunk)
+        total += len(chunk)
+        if total >= size:
+            break
+    return head
+
+
+def compress_stream(chunks, codec, flush_size):
+    """
+    Compresses the chunks, and sends what came out once flush_size bytes have
+    gone in since the last flush. Each flush ends a compressed block, so
+    flushing every chunk of a stream that yields a row at a time would cost most
+    of the compression.
+    """
+    stream = codec.compressobj()
+    out, pending = [], 0
+    for chunk in chunks:
+        out.append(stream.compress(chunk))
+        pending += len(chunk)
+        if pending >= flush_size:
+            yield b''.join(out) + stream.flush()
+            out, pending = [], 0
+    yield b''.join(out) + stream.finish()
+
+
+async def compress_async_stream(chunks, codec, flush_size):
+    stream = codec.compressobj()
+    out, pending = [], 0
+    async for chunk in chunks:
+        out.append(stream.compress(chunk))
+        pending += len(chunk)
+        if pending >= flush_size:
+            yield b''.join(out) + stream.flush()
+            out, pending = [], 0
+    yield b''.join(out) + stream.finish()
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.db import connection
+from django.http import HttpResponseNotFound
+from django_tenants.middleware import TenantSubfolderMiddleware
+from django_tenants.postgresql_backend.base import FakeTenant
+
+from starterapp.middleware.ApiMiddleware import is_api_request
+from starterapp.tenant_resolution import resolve_tenant, subfolder_urlconf
+from tenant_app.tenancy import set_pooled_client_key
+
+
+class PooledTenantSubfolderMiddleware(TenantSubfolderMiddleware):
+    """
+    TenantSubfolderMiddleware that also serves pooled tenants. A pooled tenant is
+    resolved from its subfolder like any other; the connection is then pointed
+    at settings.TENANT_POOL_SCHEMA and the tenant_app models are scoped to the
+    tenant's client_key (see tenant_app.tenancy). request.tenant stays the
+    pooled Client. URLs are matched against the subfolder, since the stock
+    prefix pattern would look the Domain up by the pool schema.
+
+    Only the API is served to pooled tenants. auth_user and django_session are
+    tenant tables, so every pooled tenant would share the pool's users and
+    sessions: a login on one would be valid on all of them. The admin and
+    anything else session-based answers 404 until the tenant is promoted.
+
+    Tenants are resolved through the per-process cache of
+    starterapp.tenant_resolution.
+
+    Like the schema, the key is left in place after the response, so streamed
+    bodies are still read with it; the next request on the thread replaces it.
+    """
+
+    def get_tenant(self, domain_model, hostname):
+        return resolve_tenant(hostname)
+
+    @staticmethod
+    def get_urlconf(tenant):
+        return subfolder_urlconf()
+
+    def process_request(self, request):
+        set_pooled_client_key(None)
+        response = super().process_request(request)
+        tenant = getattr(request, 'tenant', None)
+        if response is None and getattr(tenant, 'is_pooled', False):
+            if not is_api_request(request):
+                return HttpResponseNotFound()
+            pool = FakeTenant(schema_name=settings.TENANT_POOL_SCHEMA)
+            # Read by the URL prefix pattern
+            pool.domain_subfolder = tenant.domain_subfolder
+            connection.set_tenant(pool)
+            set_pooled_client_key(tenant.pk)
+        return response
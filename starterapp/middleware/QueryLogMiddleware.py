@@ -0,0 +1,43 @@
+import uuid
+
+from django.conf import settings
+from django.db import connection
+
+from starterapp.querylog import flush_if_due, request_context
+
+
+class QueryLogMiddleware:
+    """
+    Tags the queries of each request with a request id (taken from X-Request-ID
+    when the client sends one) and the matched route, for the slow-query log, and
+    flushes the log's buffer to the database when it is due.
+
+    With TENANT_SEARCH_PATH_STATS on, responses also carry X-Search-Path: the
+    SET search_path statements the request's queries sent, and those they
+    avoided (see starterapp.db_backend).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        token = request_context.set({'request_id': request_id, 'route': request.path})
+        stats = getattr(connection, 'search_path_stats', None)
+        switched, avoided = (stats.switched, stats.avoided) if stats else (0, 0)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_context.reset(token)
+        flush_if_due()
+        response['X-Request-ID'] = request_id
+        if stats and settings.TENANT_SEARCH_PATH_STATS:
+            response['X-Search-Path'] = f'switched={stats.switched - switched}, avoided={stats.avoided - avoided}'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        context = request_context.get()
+        if context is not None and request.resolver_match is not None:
+            # The route pattern, so /members/1 and /members/2 are grouped together
+            context['route'] = request.resolver_match.route
+        return None
@@ -0,0 +1,97 @@
+import hashlib
+import json
+from functools import lru_cache, partial
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import path
+from ninja import NinjaAPI
+from ninja.responses import NinjaJSONEncoder
+
+# Distinct path prefixes (one per tenant subfolder) whose rendered document is kept
+OPENAPI_PREFIX_CACHE_SIZE = getattr(settings, 'OPENAPI_PREFIX_CACHE_SIZE', 1024)
+
+
+class CachedSchemaNinjaAPI(NinjaAPI):
+    """
+    NinjaAPI whose OpenAPI document is generated once per process, or loaded from
+    settings.OPENAPI_SCHEMA_DIR when it was prebuilt with `manage.py build_openapi`.
+
+    With subfolder routing every tenant has its own path prefix, which is the only
+    part of the document that differs between them. The prefix is patched into the
+    cached document per request, and the rendered bytes are served with an ETag.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._base_openapi_schema = None
+        self.render_openapi_schema = lru_cache(maxsize=OPENAPI_PREFIX_CACHE_SIZE)(self._render_openapi_schema)
+
+    def get_openapi_schema(self, *, path_prefix=None, path_params=None):
+        if path_prefix is None:
+            path_prefix = self.get_root_path(path_params or {})
+        return prefix_openapi_paths(self.get_base_openapi_schema(), path_prefix)
+
+    def get_base_openapi_schema(self):
+        """The OpenAPI document generated without any path prefix."""
+        if self._base_openapi_schema is None:
+            prebuilt = prebuilt_schema_path(self)
+            if prebuilt is not None and prebuilt.exists():
+                self._base_openapi_schema = json.loads(prebuilt.read_text())
+            else:
+                self._base_openapi_schema = self.generate_openapi_schema()
+        return self._base_openapi_schema
+
+    def generate_openapi_schema(self):
+        """Builds the prefix-less document from the routers, bypassing every cache."""
+        schema = super().get_openapi_schema(path_prefix='')
+        # Round-trip through JSON so the cached copy is plain data
+        return json.loads(json.dumps(schema, cls=NinjaJSONEncoder))
+
+    def _render_openapi_schema(self, path_prefix):
+        content = json.dumps(self.get_openapi_schema(path_prefix=path_prefix), cls=NinjaJSONEncoder).encode()
+        etag = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+        return content, etag
+
+    def _get_urls(self):
+        urls = super()._get_urls()
+        if self.openapi_url:
+            # The first pattern is ninja's openapi-json view; serve the cached document instead
+            view = partial(openapi_json, api=self)
+            if self.docs_decorator:
+                view = self.docs_decorator(view)
+            urls[0] = path(self.openapi_url.lstrip('/'), view, name='openapi-json')
+        return urls
+
+
+def openapi_json(request, api, **kwargs):
+    # The API root is whatever precedes openapi.json, e.g. /client/tenant1/api/.
+    # Taking it from the path avoids reverse(), which looks up the tenant domain.
+    path_prefix = request.path[:-len(api.openapi_url.lstrip('/'))]
+    content, etag = api.render_openapi_schema(path_prefix)
+
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    return response
+
+
+def prefix_openapi_paths(schema, path_prefix):
+    """Returns a copy of schema with path_prefix prepended to every path."""
+    prefix = path_prefix.strip('/')
+    if not prefix:
+        return schema
+    return {
+        **schema,
+        'paths': {f'/{prefix}{key}': value for key, value in schema['paths'].items()},
+    }
+
+
+def prebuilt_schema_path(api):
+    schema_dir = getattr(settings, 'OPENAPI_SCHEMA_DIR', None)
+    if not schema_dir:
+        return None
+    return Path(schema_dir) / f'{api.urls_namespace}.json'
@@ -0,0 +1,242 @@
+"""
+Slow-query log for the tenant database backend (starterapp.db_backend).
+
+Every query slower than settings.SLOW_QUERY_THRESHOLD_MS is logged as one JSON
+line on the 'starterapp.slow_query' logger, tagged with the tenant schema and the
+route and request id set by QueryLogMiddleware. For a fraction of slow SELECTs
+(settings.SLOW_QUERY_EXPLAIN_RATE) the plan is kept with the entry. It comes from
+a plain EXPLAIN, which only plans the query: EXPLAIN ANALYZE would run an
+already slow query a second time in the request, and repeat side effects of
+SELECTs such as nextval() or setval().
+
+Each process also keeps the SLOW_QUERY_TOP_N slowest query shapes per schema in
+memory. The middleware flushes them every SLOW_QUERY_FLUSH_INTERVAL seconds into
+shared_app.SlowQuery in the public schema, which the admin lists.
+"""
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger('starterapp.slow_query')
+
+# {'request_id': ..., 'route': ...} for the request being served, if any
+request_context = ContextVar('query_log_request', default=None)
+# Set while the log writes its own queries, so they are never logged themselves
+_suppressed = ContextVar('query_log_suppressed', default=False)
+
+_IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+\b')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def query_shape(sql):
+    """
+    Normalises sql so that queries differing only in literals or in the length
+    of an IN list share a shape.
+    """
+    shape = _STRING.sub('?', sql)
+    shape = _IN_LIST.sub('(...)', shape)
+    shape = _NUMBER.sub('?', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def fingerprint(shape):
+    return hashlib.sha1(shape.encode(), usedforsecurity=False).hexdigest()[:16]
+
+
+@dataclass
+class SlowQueryStats:
+    schema_name: str
+    fingerprint: str
+    sql: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_route: str = ''
+    last_request_id: str = ''
+    last_seen: Any = None
+    plan: Optional[Any] = None
+
+
+class SlowQueryBuffer:
+    """
+    The top_n slowest query shapes per schema since the last drain(). When a
+    schema's buffer is full, a new shape replaces the one with the lowest
+    max_ms, or is dropped if it is faster than all of them.
+    """
+
+    def __init__(self, top_n):
+        self.top_n = top_n
+        self._lock = threading.Lock()
+        self._schemas = {}
+
+    def record(self, schema_name, sql, duration_ms, route='', request_id='', plan=None):
+        shape = query_shape(sql)
+        key = fingerprint(shape)
+        with self._lock:
+            shapes = self._schemas.setdefault(schema_name, {})
+            stats = shapes.get(key)
+            if stats is None:
+                if len(shapes) >= self.top_n:
+                    fastest = min(shapes.values(), key=lambda entry: entry.max_ms)
+                    if fastest.max_ms >= duration_ms:
+                        return
+                    del shapes[fastest.fingerprint]
+                stats = shapes[key] = SlowQueryStats(schema_name, key, shape)
+            stats.calls += 1
+            stats.total_ms += duration_ms
+            stats.max_ms = max(stats.max_ms, duration_ms)
+            stats.last_route = route
+            stats.last_request_id = request_id
+            stats.last_seen = timezone.now()
+            if plan is not None:
+                stats.plan = plan
+
+    def drain(self):
+        with self._lock:
+            schemas, self._schemas = self._schemas, {}
+        return [stats for shapes in schemas.values() for stats in shapes.values()]
+
+
+buffer = SlowQueryBuffer(getattr(settings, 'SLOW_QUERY_TOP_N', 50))
+
+
+class SlowQueryLogger:
+    """execute_wrapper that starterapp.db_backend installs on every connection."""
+
+    def __call__(self, execute, sql, params, many, context):
+        threshold = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+        if threshold is None or _suppressed.get():
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms >= threshold:
+            self.record(context['connection'], sql, params, many, duration_ms)
+        return result
+
+    def record(self, connection, sql, params, many, duration_ms):
+        request = request_context.get() or {}
+        plan = None
+        if (
+            not many
+            and sql.lstrip()[:6].upper() == 'SELECT'
+            and random.random() < getattr(settings, 'SLOW_QUERY_EXPLAIN_RATE', 0)
+        ):
+            plan = explain(connection, sql, params)
+
+        entry = {
+            'schema': connection.schema_name,
+            'duration_ms': round(duration_ms, 1),
+            'route': request.get('route', ''),
+            'request_id': request.get('request_id', ''),
+            'sql': sql,
+        }
+        logger.warning(json.dumps({**entry, 'explained': plan is not None}))
+        buffer.record(
+            connection.schema_name, sql, duration_ms,
+            route=entry['route'], request_id=entry['request_id'], plan=plan,
+        )
+
+
+def explain(connection, sql, params):
+    """
+    Runs EXPLAIN for sql on connection, without executing it, and returns the
+    JSON plan, or None if it fails. The raw DB-API cursor bypasses the execute
+    wrappers. Inside a transaction a savepoint keeps a failure from aborting it.
+    """
+    in_transaction = not connection.get_autocommit()
+    with connection.connection.cursor() as cursor:
+        try:
+            if in_transaction:
+                cursor.execute('SAVEPOINT slow_query_explain')
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if in_transaction:
+                cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+            return plan
+        except Exception:
+            logger.debug('EXPLAIN failed for slow query', exc_info=True)
+            if in_transaction:
+                cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+            return None
+
+
+_flush_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def flush_if_due():
+    global _last_flush
+    interval = getattr(settings, 'SLOW_QUERY_FLUSH_INTERVAL', 60)
+    with _flush_lock:
+        if time.monotonic() - _last_flush < interval:
+            return
+        _last_flush = time.monotonic()
+    flush()
+
+
+def flush():
+    """
+    Merges the buffered shapes into shared_app.SlowQuery and trims that table to
+    SLOW_QUERY_TOP_N rows per schema. Returns the number of shapes written.
+    """
+    from django.db import connection
+    from django_tenants.utils import get_public_schema_name
+    from shared_app.models import SlowQuery
+
+    entries = buffer.drain()
+    if not entries:
+        return 0
+
+    quote = connection.ops.quote_name
+    # Qualified, because the connection may be on a tenant schema
+    table = f'{quote(get_public_schema_name())}.{quote(SlowQuery._meta.db_table)}'
+    token = _suppressed.set(True)
+    try:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {table} AS t (schema_name, fingerprint, sql, calls, total_ms, max_ms, "
+                f"last_route, last_request_id, last_seen, plan) "
+                f"VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
+                f"ON CONFLICT (schema_name, fingerprint) DO UPDATE SET "
+                f"calls = t.calls + EXCLUDED.calls, total_ms = t.total_ms + EXCLUDED.total_ms, "
+                f"max_ms = GREATEST(t.max_ms, EXCLUDED.max_ms), last_route = EXCLUDED.last_route, "
+                f"last_request_id = EXCLUDED.last_request_id, last_seen = EXCLUDED.last_seen, "
+                f"plan = COALESCE(EXCLUDED.plan, t.plan)",
+                [
+                    (
+                        stats.schema_name, stats.fingerprint, stats.sql, stats.calls, stats.total_ms,
+                        stats.max_ms, stats.last_route[:255], stats.last_request_id[:64], stats.last_seen,
+                        json.dumps(stats.plan) if stats.plan is not None else None,
+                    )
+                    for stats in entries
+                ],
+            )
+            cursor.execute(
+                f"DELETE FROM {table} WHERE id IN ("
+                f"SELECT id FROM (SELECT id, row_number() OVER ("
+                f"PARTITION BY schema_name ORDER BY max_ms DESC) AS rank FROM {table}) ranked "
+                f"WHERE rank > %s)",
+                [buffer.top_n],
+            )
+    except Exception:
+        # Losing a batch of statistics must never fail the request that flushes it
+        logger.exception('Could not flush the slow-query buffer')
+        return 0
+    finally:
+        _suppressed.reset(token)
+    return len(entries)
+
@@ -0,0 +1,54 @@
+"""
+Readiness endpoint (/readyz on the public URLconf) for load balancers and
+orchestrators: 200 while every registered check passes, 503 otherwise, so a
+worker is only sent traffic once it can serve it.
+
+Checks are plain callables registered with @register_check; each returns
+nothing when the worker is ready and raises (any exception) when it is not.
+"""
+import logging
+
+from django.db import connection
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+logger = logging.getLogger('starterapp.serving')
+
+_checks = {}
+
+
+def register_check(name):
+    """Registers the decorated function as readiness check name."""
+    def decorator(check):
+        _checks[name] = check
+        return check
+    return decorator
+
+
+def run_checks():
+    """{name: 'ok' or the error} for every registered check."""
+    results = {}
+    for name, check in _checks.items():
+        try:
+            check()
+        except Exception as exc:
+            logger.warning("Readiness check %s failed: %s", name, exc)
+            results[name] = str(exc) or exc.__class__.__name__
+        else:
+            results[name] = 'ok'
+    return results
+
+
+@register_check('database')
+def check_database():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+@require_GET
+def readiness(request):
+    checks = run_checks()
+    ready = all(result == 'ok' for result in checks.values())
+    response = JsonResponse({'ready': ready, 'checks': checks}, status=200 if ready else 503)
+    response['Cache-Control'] = 'no-store'
+    return response
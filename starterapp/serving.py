@@ -0,0 +1,164 @@
+"""
+Production server profiles, launched by `manage.py serve`.
+
+Both profiles run under a gunicorn master with the application preloaded, so
+workers share the imported code through copy-on-write:
+
+  wsgi  gthread workers running starterapp.wsgi; each thread holds its own
+        database connection, so connections = workers x threads.
+  asgi  uvicorn workers running starterapp.asgi; Django runs every sync view and
+        ORM call in a thread of its own, so connections are bounded by capping
+        the concurrent requests per worker. Connections are closed after each
+        request (CONN_MAX_AGE=0): a kept connection belongs to the executor
+        thread that opened it, and threads outnumber the cap over time.
+
+Worker counts follow the usable cores (CPU affinity and cgroup quota), and are
+then cut down until workers x connections per worker x SERVER_INSTANCES fits in
+PostgreSQL's max_connections, minus its superuser reserve and
+SERVER_RESERVED_CONNECTIONS. Workers are recycled after a jittered number of
+requests, and when their private (non-shared) memory grows past their share of
+the machine's memory (see starterapp.gunicorn_conf).
+"""
+import math
+import os
+from dataclasses import asdict, dataclass
+
+PROFILES = ('wsgi', 'asgi')
+# Threads per gthread worker when the connection budget allows
+WSGI_THREADS = 4
+# Concurrent requests per uvicorn worker when the connection budget allows
+ASGI_CONCURRENCY = 32
+# Share of the machine's memory the workers may use between them
+WORKER_MEMORY_SHARE = 0.8
+
+
+@dataclass
+class ServerProfile:
+    name: str
+    application: str
+    worker_class: str
+    workers: int
+    # gthread threads, or the uvicorn concurrency limit
+    threads: int
+    max_requests: int
+    max_requests_jitter: int
+    max_worker_memory_mb: int
+    timeout: int = 30
+    graceful_timeout: int = 30
+    keepalive: int = 5
+    preload: bool = True
+
+    @property
+    def connections(self):
+        """Most database connections the workers of one instance can hold."""
+        return self.workers * self.threads
+
+    def as_dict(self):
+        return {**asdict(self), 'connections': self.connections}
+
+
+class ConnectionBudgetError(ValueError):
+    pass
+
+
+def usable_cores():
+    """Cores this process may run on: CPU affinity, capped by a cgroup v2 CPU quota."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as file:
+            quota, period = file.read().split()
+        if quota != 'max':
+            cores = min(cores, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def usable_memory_mb():
+    """Physical memory, capped by a cgroup v2 memory limit; None when unknown."""
+    try:
+        memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        memory = None
+    try:
+        with open('/sys/fs/cgroup/memory.max') as file:
+            limit = file.read().strip()
+        if limit != 'max':
+            memory = min(memory or int(limit), int(limit))
+    except (OSError, ValueError):
+        pass
+    return memory // (1024 * 1024) if memory else None
+
+
+def connection_budget(max_connections, superuser_reserved, reserved, instances):
+    """Database connections one instance's workers may hold between them."""
+    budget = (max_connections - superuser_reserved - reserved) // max(1, instances)
+    if budget < 1:
+        raise ConnectionBudgetError(
+            f"max_connections={max_connections} leaves no connections for {instances} instance(s) "
+            f"after {superuser_reserved} superuser and {reserved} reserved connection(s)."
+        )
+    return budget
+
+
+def compute_profile(name, cores, budget, memory_mb=None, max_requests=5000, max_worker_memory_mb=None):
+    """The ServerProfile for name ('wsgi' or 'asgi') on cores cores within budget connections."""
+    if name == 'wsgi':
+        # Threads overlap I/O waits; more processes than 2 x cores + 1 only add contention
+        workers = min(2 * cores + 1, budget)
+        threads = max(1, min(WSGI_THREADS, budget // workers))
+        application, worker_class = 'starterapp.wsgi:application', 'gthread'
+    elif name == 'asgi':
+        # One event loop per core; concurrency is what the connection budget allows
+        workers = min(cores, budget)
+        threads = max(1, min(ASGI_CONCURRENCY, budget // workers))
+        application, worker_class = 'starterapp.asgi:application', 'starterapp.uvicorn_worker.ServerUvicornWorker'
+    else:
+        raise ValueError(f"Unknown server profile '{name}'; expected one of {', '.join(PROFILES)}.")
+
+    if max_worker_memory_mb is None and memory_mb:
+        max_worker_memory_mb = int(memory_mb * WORKER_MEMORY_SHARE / workers)
+    return ServerProfile(
+        name=name,
+        application=application,
+        worker_class=worker_class,
+        workers=workers,
+        threads=threads,
+        max_requests=max_requests,
+        # Keeps workers started together from all restarting at once
+        max_requests_jitter=max_requests // 10,
+        max_worker_memory_mb=max_worker_memory_mb or 0,
+    )
+
+
+def gunicorn_argv(profile, bind):
+    """The gunicorn command line for profile."""
+    argv = [
+        'gunicorn', profile.application,
+        '--config', 'python:starterapp.gunicorn_conf',
+        '--bind', bind,
+        '--workers', str(profile.workers),
+        '--worker-class', profile.worker_class,
+        '--max-requests', str(profile.max_requests),
+        '--max-requests-jitter', str(profile.max_requests_jitter),
+        '--timeout', str(profile.timeout),
+        '--graceful-timeout', str(profile.graceful_timeout),
+        '--keep-alive', str(profile.keepalive),
+    ]
+    if profile.worker_class == 'gthread':
+        argv += ['--threads', str(profile.threads)]
+    if profile.preload:
+        argv.append('--preload')
+    return argv
+
+
+def server_environ(profile):
+    """Environment read by starterapp.gunicorn_conf and starterapp.uvicorn_worker."""
+    environ = {'SERVER_MAX_WORKER_MEMORY_MB': str(profile.max_worker_memory_mb)}
+    if profile.name == 'asgi':
+        environ['SERVER_LIMIT_CONCURRENCY'] = str(profile.threads)
+        environ['CONN_MAX_AGE'] = '0'
+    return environ
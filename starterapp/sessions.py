@@ -0,0 +1,54 @@
+import hashlib
+import json
+
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+
+
+class SessionStore(CachedDBStore):
+    """
+    Cached, database-backed sessions for a schema-per-tenant database.
+
+    Session rows live in the django_session table of the current schema, so cache
+    keys are namespaced by schema name as well: the same session key in two tenants
+    never shares a cache entry.
+
+    Reads are served from the cache, when it is shared between processes. A
+    process-local cache (LocMemCache) is not used at all: with several workers,
+    a logout or change made in one would go unseen by the others, so every read
+    goes to the database instead. A save whose data is identical to what was
+    loaded (e.g. a view that reassigns an unchanged value) skips the database and
+    cache write entirely.
+    """
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        if isinstance(self._cache, LocMemCache):
+            self._cache = DummyCache('', {})
+
+    @property
+    def cache_key_prefix(self):
+        return f'{super().cache_key_prefix}.{connection.schema_name}.'
+
+    def load(self):
+        data = super().load()
+        self._loaded_digest = session_digest(data)
+        return data
+
+    def save(self, must_create=False):
+        if (
+            not must_create
+            and self.session_key is not None
+            and getattr(self, '_loaded_digest', None) == session_digest(self._get_session(no_load=True))
+        ):
+            return
+        super().save(must_create)
+        self._loaded_digest = session_digest(self._session)
+
+
+def session_digest(data):
+    """A stable fingerprint of session data, used to detect real changes."""
+    encoded = json.dumps(data, sort_keys=True, default=str).encode()
+    return hashlib.sha1(encoded, usedforsecurity=False).hexdigest()
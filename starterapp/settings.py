@@ -32,7 +32,9 @@ ALLOWED_HOSTS = ['*']
 SHARED_APPS = (
     'django_tenants',
     'shared_app',
-    'django.contrib.admin',
+    # SimpleAdminConfig skips admin autodiscovery during django.setup(); admin
+    # modules are registered on first use by starterapp.urls_admin instead
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -51,18 +53,30 @@ TENANT_APPS = (
 INSTALLED_APPS = list(SHARED_APPS) + [app for app in TENANT_APPS if app not in SHARED_APPS]
 
 MIDDLEWARE = [
-    'django_tenants.middleware.TenantSubfolderMiddleware',
+    # First, so the tenant lookup itself is tagged for the slow-query log
+    'starterapp.middleware.QueryLogMiddleware.QueryLogMiddleware',
+    # Compresses what every later layer returns (see COMPRESSION_* below)
+    'starterapp.middleware.CompressionMiddleware.CompressionMiddleware',
+    # django-tenants' subfolder routing, plus pooled tenants (TENANT_POOL_SCHEMA)
+    'starterapp.middleware.PoolMiddleware.PooledTenantSubfolderMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # Session, CSRF, auth and messages are skipped for /api/ routes (see ApiMiddleware)
+    'starterapp.middleware.ApiMiddleware.ApiAwareSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'starterapp.middleware.ApiMiddleware.ApiAwareCsrfViewMiddleware',
+    'starterapp.middleware.ApiMiddleware.ApiAwareAuthenticationMiddleware',
+    'starterapp.middleware.ApiMiddleware.ApiAwareMessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django_multitenant.middlewares.MultitenantMiddleware',
     'starterapp.middleware.MultitenantMiddleware.MultitenantMiddleware',
 ]
 
+# Schema-per-tenant is the only isolation layer: tenant_app models skip
+# django_multitenant's row-level filter injection (see tenant_app.tenancy)
+TENANT_SCHEMA_ONLY = os.environ.get('TENANT_SCHEMA_ONLY') == '1'
+if TENANT_SCHEMA_ONLY:
+    MIDDLEWARE.remove('django_multitenant.middlewares.MultitenantMiddleware')
+
 ROOT_URLCONF = 'starterapp.urls'
 
 TEMPLATES = [
@@ -89,12 +103,18 @@ WSGI_APPLICATION = 'starterapp.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django_tenants.postgresql_backend',
+        # django_tenants.postgresql_backend plus the slow-query log
+        'ENGINE': 'starterapp.db_backend',
         'NAME': 'starterapp',
         'USER': 'postgres',
         'PASSWORD': 'postgres',
         'HOST': 'localhost',  # This connects to the Docker container via port mapping
         'PORT': '5432',
+        # Connections are kept across requests, so warm-up (starterapp.warmup)
+        # is not lost and requests do not pay for connecting; `manage.py serve
+        # --profile asgi` sets 0 (see starterapp.serving)
+        'CONN_MAX_AGE': int(os.environ.get('CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
@@ -106,8 +126,110 @@ DATABASE_ROUTERS = (
 TENANT_SUBFOLDER_PREFIX = 'client'
 TENANT_MODEL = 'shared_app.Client'
 TENANT_DOMAIN_MODEL = 'shared_app.Domain'
+# Schema holding the rows of every pooled tenant (Client.is_pooled), each tagged
+# with its client_key; see tenant_app.tenancy and `manage.py promote_tenant`
+TENANT_POOL_SCHEMA = 'pool'
+# Seconds a worker reuses a tenant resolved from its subfolder
+# (starterapp.tenant_resolution); Client and Domain changes made elsewhere show
+# up after at most this long
+TENANT_CACHE_SECONDS = 60
+# When the tenant backend sends SET search_path (see starterapp.db_backend):
+# 'always' as django-tenants does, before every cursor; 'skip' only when the
+# schema changed; 'pipeline' also sends it with the next statement, in one
+# round trip. 'skip' and 'pipeline' track the schema the connection is on, which
+# a pooler's DISCARD ALL or RESET, or SQL that sets search_path itself, silently
+# invalidates, so they are opt-in. TENANT_SEARCH_PATH_STATS reports the counts
+# per response.
+TENANT_SEARCH_PATH_MODE = os.environ.get('TENANT_SEARCH_PATH_MODE', 'always')
+TENANT_SEARCH_PATH_STATS = os.environ.get('TENANT_SEARCH_PATH_STATS') == '1'
 PUBLIC_SCHEMA_URLCONF = 'starterapp.urls_public'
 
+# OpenAPI documents prebuilt by `manage.py build_openapi`. When unset (or a file
+# is missing) each API generates its document once per process instead.
+OPENAPI_SCHEMA_DIR = os.environ.get('OPENAPI_SCHEMA_DIR')
+
+# Admin changelists over unfiltered tables with more estimated rows than this
+# show pg_class.reltuples instead of running COUNT(*)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100_000
+
+# Range-partition each tenant's member table by created_at when tenant_app
+# migrations run (see tenant_app.partitioning and `manage.py partition_members`)
+TENANT_MEMBER_PARTITIONING = False
+
+# API authentication for both Ninja APIs: None (open) or 'signed_token', which
+# accepts bearer tokens from `manage.py issue_api_token` (see starterapp.auth)
+API_AUTH_MODE = os.environ.get('API_AUTH_MODE')
+API_TOKEN_MAX_AGE = 60 * 60 * 24 * 30
+
+# Sessions are written to the tenant's django_session table only when they
+# change, and read from the cache when it is shared between workers; cache keys
+# are namespaced by schema. Set CACHE_REDIS_URL (needs the redis package) for a
+# shared cache; with the per-process LocMemCache, sessions are read from the
+# database (see starterapp.sessions).
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+    } if CACHE_REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+SESSION_ENGINE = 'starterapp.sessions'
+
+# Slow-query log (see starterapp.querylog): queries slower than the threshold
+# are logged with schema, route and request id; None (an empty or 'off'
+# SLOW_QUERY_THRESHOLD_MS) turns it off. A fraction of them gets its plan from
+# a plain EXPLAIN, and the SLOW_QUERY_TOP_N slowest shapes per schema are kept
+# in shared_app.SlowQuery, visible in the public admin.
+_slow_query_threshold = os.environ.get('SLOW_QUERY_THRESHOLD_MS', '200').strip()
+SLOW_QUERY_THRESHOLD_MS = None if _slow_query_threshold.lower() in ('', 'off', 'none') else float(_slow_query_threshold)
+SLOW_QUERY_EXPLAIN_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_RATE', 0.01))
+SLOW_QUERY_TOP_N = 50
+SLOW_QUERY_FLUSH_INTERVAL = 60
+
+# Table health (see tenant_app.maintenance and `manage.py table_health`): tables
+# with this share of rows changed since their last ANALYZE, or of dead tuples,
+# are analyzed or vacuumed. Bulk writes (region sync, member import, archival)
+# ANALYZE straight away when they change this share of a table.
+TABLE_HEALTH_ANALYZE_RATIO = 0.1
+TABLE_HEALTH_VACUUM_RATIO = 0.2
+TABLE_HEALTH_MIN_ROWS = 1000
+
+# Response compression (see starterapp.middleware.CompressionMiddleware): the
+# first encoding the client accepts is used; zstd and br need the zstandard /
+# brotli packages and are skipped when those are not installed. Responses below
+# the minimum size are sent as they are. COMPRESSION_ROUTES overrides the minimum
+# per path regex (first match wins); None never compresses that route. Streamed
+# responses are flushed to the client once COMPRESSION_STREAM_FLUSH_SIZE bytes
+# of body have gone into the compressor since the last flush.
+COMPRESSION_ENCODINGS = ('zstd', 'br', 'gzip')
+COMPRESSION_LEVELS = {'zstd': 3, 'br': 4, 'gzip': 5}
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_CONTENT_TYPES = ('application/json', 'application/x-ndjson', 'text/csv')
+COMPRESSION_STREAM_FLUSH_SIZE = 16 * 1024
+COMPRESSION_ROUTES = (
+    # Single members and job polls stay small; not worth the CPU
+    (r'/api/\d+/members/\d+$', None),
+    (r'^/api/jobs/', None),
+    # Large lists: compress as soon as it pays off
+    (r'/api/(\d+/)?members$', 512),
+    (r'^/api/clients$', 512),
+)
+
+# Server profiles (see starterapp.serving and `manage.py serve`): worker counts
+# are sized so that the workers of SERVER_INSTANCES instances fit within the
+# database's max_connections, less SERVER_RESERVED_CONNECTIONS kept free for
+# management commands, migrations and psql. Workers restart after about
+# SERVER_MAX_REQUESTS requests.
+SERVER_INSTANCES = int(os.environ.get('SERVER_INSTANCES', 1))
+SERVER_RESERVED_CONNECTIONS = 10
+SERVER_MAX_REQUESTS = 5000
+# Each worker warms its connections and caches for the WARMUP_TENANTS busiest
+# tenants before it takes traffic (starterapp.warmup)
+SERVER_WARMUP = os.environ.get('SERVER_WARMUP', '1') == '1'
+WARMUP_TENANTS = 50
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,108 @@
+"""
+Per-process cache of subfolder -> tenant for PooledTenantSubfolderMiddleware.
+
+django-tenants looks the Domain (and its Client) up on every request, and its
+URL prefix pattern looks the Domain up again for every URL resolution. Here the
+tenant is cached for TENANT_CACHE_SECONDS, and the prefix is taken from the
+subfolder the middleware already resolved, without a query. Warm-up
+(starterapp.warmup) fills the cache for the busiest tenants before a worker
+takes traffic.
+
+Changes to a Client or Domain clear the cache of the process that made them;
+other processes see them once their entry expires. The tenant lifecycle
+operations of shared_app.lifecycle wait at least that long before they destroy
+what a stale entry points at, or before they report done.
+"""
+import copy
+import sys
+import time
+from types import ModuleType
+
+from django.conf import settings
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.urls import URLResolver
+from django.utils.module_loading import import_string
+from django_tenants.urlresolvers import TenantPrefixPattern
+from django_tenants.utils import get_subfolder_prefix, get_tenant_domain_model
+
+# Seconds a resolved tenant is reused; 0 looks it up on every request
+TENANT_CACHE_SECONDS = getattr(settings, 'TENANT_CACHE_SECONDS', 60)
+
+# subfolder -> (tenant, expires at)
+_tenants = {}
+
+
+def resolve_tenant(subfolder):
+    """
+    The tenant whose Domain is subfolder, as a copy the request may annotate.
+    Raises the domain model's DoesNotExist; misses are not cached.
+    """
+    cached = _tenants.get(subfolder)
+    if cached is None or cached[1] < time.monotonic():
+        domain = get_tenant_domain_model().objects.select_related('tenant').get(domain=subfolder)
+        cached = _remember(subfolder, domain.tenant)
+    return copy.copy(cached[0])
+
+
+def prime(domains):
+    """Caches the tenants of domains (Domain instances with their tenant selected); returns how many."""
+    for domain in domains:
+        _remember(domain.domain, domain.tenant)
+    return len(domains)
+
+
+def clear_tenant_cache(**kwargs):
+    _tenants.clear()
+
+
+def _remember(subfolder, tenant):
+    entry = (tenant, time.monotonic() + TENANT_CACHE_SECONDS)
+    if TENANT_CACHE_SECONDS > 0:
+        _tenants[subfolder] = entry
+    return entry
+
+
+post_save.connect(clear_tenant_cache, sender=settings.TENANT_MODEL, dispatch_uid='tenant_cache_client_save')
+post_delete.connect(clear_tenant_cache, sender=settings.TENANT_MODEL, dispatch_uid='tenant_cache_client_delete')
+post_save.connect(clear_tenant_cache, sender=settings.TENANT_DOMAIN_MODEL, dispatch_uid='tenant_cache_domain_save')
+post_delete.connect(clear_tenant_cache, sender=settings.TENANT_DOMAIN_MODEL, dispatch_uid='tenant_cache_domain_delete')
+
+
+class SubfolderPrefixPattern(TenantPrefixPattern):
+    """
+    TenantPrefixPattern that takes the prefix from the subfolder the middleware
+    resolved (connection.tenant.domain_subfolder) instead of querying the Domain
+    again. It also works while the connection is pointed at the pool schema.
+    """
+
+    @property
+    def tenant_prefix(self):
+        subfolder = getattr(connection.tenant, 'domain_subfolder', None)
+        if not subfolder:
+            return '/'
+        prefix = get_subfolder_prefix()
+        return f'{prefix}/{subfolder}/' if prefix else f'{subfolder}/'
+
+
+def subfolder_urlconf(urlconf=None):
+    """
+    The name of a module serving urlconf's patterns under the tenant subfolder
+    (django_tenants.urlresolvers.get_subfolder_urlconf with SubfolderPrefixPattern).
+    The prefix is read at match time, so the patterns are built once and kept;
+    the URL resolvers below the prefix keep their caches across requests.
+    """
+    urlconf = urlconf or settings.ROOT_URLCONF
+    dynamic_path = f'{urlconf}_subfolder_prefixed'
+    if dynamic_path not in sys.modules:
+
+        class PrefixedURLConfModule(ModuleType):
+            def __getattr__(self, attr):
+                value = import_string(f'{urlconf}.{attr}')
+                if attr == 'urlpatterns':
+                    value = [URLResolver(SubfolderPrefixPattern(), list(value))]
+                setattr(self, attr, value)
+                return value
+
+        sys.modules[dynamic_path] = PrefixedURLConfModule(dynamic_path)
+    return dynamic_path
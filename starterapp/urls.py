@@ -1,15 +1,13 @@
-from django.contrib import admin
-from django.urls import path
-from tenant_app.api import api as tenant_api
 from django.views import defaults as default_views
+from starterapp.lazy_urls import lazy_include
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/', tenant_api.urls),
+    lazy_include('admin/', 'starterapp.urls_admin', app_name='admin'),
+    lazy_include('api/', 'tenant_app.urls', app_name='ninja', namespace='tenant_api'),
 ] 
 
 # Define error handlers
 handler400 = default_views.bad_request
 handler403 = default_views.permission_denied
 handler404 = default_views.page_not_found
-handler500 = default_views.server_error 
\ No newline at end of file
+handler500 = default_views.server_error 
@@ -0,0 +1,7 @@
+from django.contrib import admin
+
+# Admin modules are registered on first use instead of during django.setup()
+# (see SimpleAdminConfig in settings.SHARED_APPS)
+admin.autodiscover()
+
+urlpatterns = admin.site.get_urls()
@@ -1,15 +1,16 @@
-from django.contrib import admin
 from django.urls import path
-from shared_app.api import api as shared_api
 from django.views import defaults as default_views
+from starterapp.lazy_urls import lazy_include
+from starterapp.readiness import readiness
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/', shared_api.urls),
+    path('readyz', readiness, name='readiness'),
+    lazy_include('admin/', 'starterapp.urls_admin', app_name='admin'),
+    lazy_include('api/', 'shared_app.urls', app_name='ninja', namespace='shared_api'),
 ] 
 
 # Define error handlers
 handler400 = default_views.bad_request
 handler403 = default_views.permission_denied
 handler404 = default_views.page_not_found
-handler500 = default_views.server_error 
\ No newline at end of file
+handler500 = default_views.server_error 
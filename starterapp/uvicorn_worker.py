@@ -0,0 +1,18 @@
+"""
+The gunicorn worker class of the 'asgi' server profile (see starterapp.serving);
+only imported by gunicorn, so uvicorn is not needed otherwise.
+"""
+import os
+
+from uvicorn.workers import UvicornWorker
+
+
+class ServerUvicornWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        **UvicornWorker.CONFIG_KWARGS,
+        # Django does not implement the ASGI lifespan protocol
+        'lifespan': 'off',
+        # Past this many concurrent requests uvicorn answers 503, instead of
+        # opening more database connections than the worker's share
+        'limit_concurrency': int(os.environ.get('SERVER_LIMIT_CONCURRENCY') or 0) or None,
+    }
@@ -0,0 +1,198 @@
+"""
+Worker warm-up, so the first requests after a deploy do not pay for cold caches.
+
+warm_up() runs once per worker before it takes traffic (the post_worker_init
+hook of starterapp.gunicorn_conf, with SERVER_WARMUP on):
+  connection  opens the worker's database connection (kept for CONN_MAX_AGE)
+  tenants     finds the busiest tenant schemas and caches their tenants by
+              subfolder (starterapp.tenant_resolution)
+  schemas     runs a trivial query on every tenant_app table of each of those
+              schemas, loading the tables' catalog entries into the connection's
+              caches and their first pages into shared buffers
+  urls        imports the lazily loaded URLconfs, admin and APIs and resolves a
+              tenant and a public URL
+  openapi     renders both OpenAPI documents, and the tenant one per busy tenant
+
+gthread workers repeat the connection and schemas steps on each request thread,
+since every thread holds its own connection. psycopg2 has no prepared
+statements to prime; loading the catalog entries is the part of a first query
+that does not repeat. Warm-up runs before the worker accepts connections, so no
+worker ever answers a request, /readyz included, while it is still cold. Under
+the asgi profile connections are not kept (CONN_MAX_AGE=0); its warm-up still
+fills the tenant cache, the URLconfs and the database's shared buffers.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import wait
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Q
+from django.urls import resolve
+from django_tenants.postgresql_backend.base import FakeTenant
+from django_tenants.utils import get_public_schema_name, get_subfolder_prefix, get_tenant_domain_model, get_tenant_model
+
+from starterapp.tenant_resolution import prime, subfolder_urlconf
+
+# Busiest tenant schemas warmed
+WARMUP_TENANTS = getattr(settings, 'WARMUP_TENANTS', 50)
+# Modules loaded lazily on the first request that needs them (see starterapp.lazy_urls)
+LAZY_MODULES = ('starterapp.urls_admin', 'tenant_app.urls', 'shared_app.urls')
+# Where the APIs are mounted: below the tenant subfolder, and in the public URLconf
+API_ROOT = 'api/'
+# Seconds a gthread worker waits for all its threads to pick up their warm-up
+THREAD_WARMUP_TIMEOUT = 30
+
+logger = logging.getLogger('starterapp.serving')
+
+@dataclass
+class WarmupReport:
+    schemas: int = 0
+    domains: int = 0
+    tables: int = 0
+    documents: int = 0
+    seconds: float = 0.0
+    # Seconds per step
+    steps: dict = field(default_factory=dict)
+
+
+def hot_schemas(limit=WARMUP_TENANTS):
+    """
+    Tenant schemas, busiest first: table scans plus rows written since
+    PostgreSQL's statistics were last reset (pg_stat_user_tables). Pooled
+    tenants share the pool schema and count as one. Schemas without a tenant
+    (clone targets, tombstones of dropped tenants) are left out.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT schemaname FROM pg_stat_user_tables WHERE schemaname <> %s "
+            "GROUP BY schemaname "
+            "ORDER BY sum(seq_scan + coalesce(idx_scan, 0) + n_tup_ins + n_tup_upd + n_tup_del) DESC "
+            "LIMIT %s",
+            [get_public_schema_name(), limit],
+        )
+        schemas = [row[0] for row in cursor.fetchall()]
+    known = set(get_tenant_model().objects.filter(schema_name__in=schemas).values_list('schema_name', flat=True))
+    return [schema for schema in schemas if schema in known]
+
+
+def warm_up(limit=WARMUP_TENANTS, executor=None, threads=0):
+    """
+    Warms this process and the calling thread's connection, and with executor
+    (a gthread worker's thread pool) the connections of its threads too.
+    Returns a WarmupReport.
+    """
+    report = WarmupReport()
+    started = time.perf_counter()
+    try:
+        with _step(report, 'connection'):
+            connection.ensure_connection()
+            connection.set_schema_to_public()
+
+        with _step(report, 'tenants'):
+            schemas = hot_schemas(limit)
+            tenants = Q(tenant__schema_name__in=schemas)
+            if settings.TENANT_POOL_SCHEMA in schemas:
+                tenants |= Q(tenant__is_pooled=True)
+            domains = list(
+                get_tenant_domain_model().objects.select_related('tenant').filter(tenants).order_by('-is_primary')[:limit]
+            )
+            report.schemas, report.domains = len(schemas), prime(domains)
+
+        with _step(report, 'schemas'):
+            report.tables = warm_schemas(schemas)
+
+        if executor is not None and threads:
+            with _step(report, 'threads'):
+                warm_thread_connections(executor, threads, schemas)
+
+        with _step(report, 'urls'):
+            warm_urls(domains[0].domain if domains else None)
+
+        with _step(report, 'openapi'):
+            report.documents = warm_openapi([domain.domain for domain in domains])
+    finally:
+        connection.set_schema_to_public()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def warm_schemas(schemas):
+    """Queries every tenant_app table of each schema once; returns the tables touched."""
+    models = [model for model in apps.get_app_config('tenant_app').get_models() if not model._meta.proxy]
+    touched = 0
+    for schema in schemas:
+        connection.set_schema(schema)
+        for model in models:
+            try:
+                model._base_manager.exists()
+                touched += 1
+            except DatabaseError as exc:
+                # A schema that is not migrated yet, or mid-drop; it is not worth failing over
+                logger.warning("Warm-up skipped %s.%s: %s", schema, model._meta.db_table, exc)
+                break
+    connection.set_schema_to_public()
+    return touched
+
+
+def warm_urls(subfolder=None):
+    for module in LAZY_MODULES:
+        import_module(module)
+    resolve(f'/{API_ROOT}openapi.json', urlconf=settings.PUBLIC_SCHEMA_URLCONF)
+    if subfolder:
+        tenant = FakeTenant(schema_name=get_public_schema_name())
+        tenant.domain_subfolder = subfolder
+        connection.set_tenant(tenant)
+        resolve(f'/{get_subfolder_prefix()}/{subfolder}/{API_ROOT}openapi.json', urlconf=subfolder_urlconf())
+        connection.set_schema_to_public()
+
+
+def warm_openapi(subfolders):
+    """Renders the public document, and the tenant one for each subfolder; returns how many."""
+    from shared_app.api import api as shared_api
+    from tenant_app.api import api as tenant_api
+
+    shared_api.render_openapi_schema(f'/{API_ROOT}')
+    for subfolder in subfolders:
+        tenant_api.render_openapi_schema(f'/{get_subfolder_prefix()}/{subfolder}/{API_ROOT}')
+    return 1 + len(subfolders)
+
+
+def warm_thread_connections(executor, threads, schemas):
+    """
+    Opens a connection on each of the threads of executor and warms schemas on
+    it. Every task waits for the others before it starts, so each one runs on a
+    thread of its own.
+    """
+    barrier = threading.Barrier(threads, timeout=THREAD_WARMUP_TIMEOUT)
+
+    def warm():
+        barrier.wait()
+        connection.ensure_connection()
+        warm_schemas(schemas)
+
+    futures = [executor.submit(warm) for _ in range(threads)]
+    wait(futures)
+    for future in futures:
+        if future.exception() is not None:
+            logger.warning("Warm-up of a request thread failed: %s", future.exception())
+
+
+@contextmanager
+def _step(report, name):
+    started = time.perf_counter()
+    yield
+    report.steps[name] = time.perf_counter() - started
+
+
+def format_report(report):
+    steps = ', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds in report.steps.items())
+    return (
+        f"Warmed {report.schemas} schema(s) ({report.tables} table(s)), {report.domains} domain(s) "
+        f"and {report.documents} OpenAPI document(s) in {report.seconds:.2f}s: {steps}"
+    )
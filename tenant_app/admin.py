@@ -1,7 +1,47 @@
 from django.contrib import admin
-from .models import Member
+from django.db import transaction
+from starterapp.admin_performance import PerformanceModeAdminMixin
+from . import history
+from .models import DuplicateCandidate, Member
 
 @admin.register(Member)
-class MemberAdmin(admin.ModelAdmin):
-    list_display = ('name', 'email', 'phone', 'created_at')
+class MemberAdmin(PerformanceModeAdminMixin, admin.ModelAdmin):
+    list_display = ('name', 'email', 'phone', 'region', 'created_at')
+    list_select_related = ('region',)
+    # icontains on these columns is served by the trigram indexes on Member
     search_fields = ('name', 'email', 'phone')
+    # Bumped by Member.save() on every change
+    readonly_fields = ('version',)
+
+    # Admin edits are recorded in the member's history like API writes
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            if not change:
+                history.record(history.MEMBER, obj.id, obj.region_id, history.CREATE, history.member_snapshot(obj), obj.version)
+                return
+            changed = {'region_id' if name == 'region' else name for name in form.changed_data}
+            changes = {field: value for field, value in history.member_snapshot(obj).items() if field in changed}
+            if changes:
+                history.record(history.MEMBER, obj.id, obj.region_id, history.UPDATE, changes, obj.version)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            history.record(history.MEMBER, obj.id, obj.region_id, history.DELETE, version=obj.version)
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic(), history.batched():
+            for member_id, region_id, version in queryset.values_list('id', 'region_id', 'version'):
+                history.record(history.MEMBER, member_id, region_id, history.DELETE, version=version)
+            super().delete_queryset(request, queryset)
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(PerformanceModeAdminMixin, admin.ModelAdmin):
+    # Written by `manage.py dedupe_members`; reviewed here, not edited
+    list_display = ('member_id', 'other_id', 'score', 'matched_on', 'found_at')
+    list_filter = ('matched_on',)
+    readonly_fields = ('member_id', 'other_id', 'score', 'matched_on', 'found_at')
+
+    def has_add_permission(self, request):
+        return False
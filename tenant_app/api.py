@@ -1,38 +1,31 @@
-from ninja import NinjaAPI, Schema
+import codecs
+from ninja import File, UploadedFile
 from typing import List, Optional
-from .models import Member, Region
-from datetime import datetime
+from . import history
+from .batch import run_batch
+from .importer import IMPORT_FORMATS, import_members
+from .search import SEARCH_PAGE_SIZE, search_members
+from .maintenance import analyze_in_background
+from .tenancy import pooled_client_key, schema_only_tenancy
+from .models import ArchivedMember, Member, Region
+from .schemas import (
+    BatchRequestSchema, BatchResponseSchema, ErrorSchema, HistoryPageSchema, MemberImportResponseSchema, MemberPatchSchema,
+    MemberResponseSchema, MemberSearchPageSchema, MemberUpdateSchema, RegionResponseSchema, RegionSyncResponseSchema, RegionSyncSchema, RegionUpdateSchema,
+    VersionConflictSchema,
+)
+from .updates import UPDATABLE_FIELDS, VersionConflict, update_member_fields
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import connection
+from django.db import connection, transaction
 
 from django_multitenant.utils import set_current_tenant, unset_current_tenant
+from starterapp.auth import api_auth
+from starterapp.openapi import CachedSchemaNinjaAPI
 
-api = NinjaAPI(title="Tenant API", urls_namespace="tenant_api")
-    
-class RegionUpdateSchema(Schema):
-    name: str
-    region_id: int
+api = CachedSchemaNinjaAPI(title="Tenant API", urls_namespace="tenant_api", auth=api_auth())
 
-class RegionResponseSchema(Schema):
-    id: int
-    name: str
-
-class MemberUpdateSchema(Schema):
-    name: str
-    phone: Optional[str] = None
-    email: Optional[str] = None
-    region_id: int
-
-class MemberResponseSchema(Schema):
-    id: int
-    name: str
-    phone: Optional[str] = None
-    email: Optional[str] = None
-    created_at: datetime
-
-class ErrorSchema(Schema):
-    detail: str
+# Number of regions written per bulk upsert statement in sync_regions
+REGION_SYNC_BATCH_SIZE = 1000
 
 @api.exception_handler(ObjectDoesNotExist)
 def object_does_not_exist_handler(request, exc):
@@ -42,6 +35,21 @@ def object_does_not_exist_handler(request, exc):
         status=404
     )
 
+class FieldSelectionError(ValueError):
+    pass
+
+@api.exception_handler(VersionConflict)
+def version_conflict_handler(request, exc):
+    return api.create_response(
+        request,
+        {"detail": str(exc), "current_version": exc.current_version},
+        status=409
+    )
+
+@api.exception_handler(FieldSelectionError)
+def field_selection_error_handler(request, exc):
+    return api.create_response(request, {"detail": str(exc)}, status=400)
+
 @api.get("/region", response=List[RegionResponseSchema])
 def list_regions(request):
     # The current tenant schema is already set by django-tenants middleware
@@ -50,59 +58,251 @@ def list_regions(request):
 @api.post("/region", response=RegionResponseSchema)
 def create_region(request, payload: RegionUpdateSchema):
     # The current tenant schema is already set by django-tenants middleware
-    region = Region.objects.create(
-        name=payload.name,
-        id=payload.region_id
-    )
+    with transaction.atomic():
+        region = Region.objects.create(
+            name=payload.name,
+            id=payload.region_id
+        )
+        history.record(history.REGION, region.id, region.id, history.CREATE, {"name": region.name})
     return region
 
-@api.get("{region_id}/members", response=List[MemberResponseSchema])
-def list_members_region(request, region_id: int):
+@api.post("/region/sync", response=RegionSyncResponseSchema)
+def sync_regions(request, payload: RegionSyncSchema):
+    # The current tenant schema is already set by django-tenants middleware
+    # Later entries win when the payload repeats a region_id
+    names = {region.region_id: region.name for region in payload.regions}
+    region_ids = list(names)
+    created = updated = deleted = 0
+
+    with transaction.atomic(), history.batched():
+        for start in range(0, len(region_ids), REGION_SYNC_BATCH_SIZE):
+            chunk = region_ids[start:start + REGION_SYNC_BATCH_SIZE]
+            existing = dict(Region.objects.filter(id__in=chunk).values_list('id', 'name'))
+            # Only rows that are new or renamed are written
+            changed = [
+                Region(id=region_id, name=names[region_id])
+                for region_id in chunk
+                if existing.get(region_id) != names[region_id]
+            ]
+            if changed:
+                Region.objects.bulk_create(
+                    changed,
+                    update_conflicts=True,
+                    unique_fields=['id'],
+                    update_fields=['name'],
+                )
+            for region in changed:
+                action = history.UPDATE if region.id in existing else history.CREATE
+                history.record(history.REGION, region.id, region.id, action, {"name": region.name})
+            new_rows = sum(1 for region in changed if region.id not in existing)
+            created += new_rows
+            updated += len(changed) - new_rows
+
+        if payload.replace:
+            deleted = delete_regions_not_in(region_ids)
+
+    analyze_in_background(Region, created + updated + deleted)
+    return {"created": created, "updated": updated, "deleted": deleted}
+
+def delete_regions_not_in(region_ids):
+    """
+    Deletes every region whose id is not in region_ids, together with its members,
+    in a single statement. The member foreign key is deferred, so both deletes can
+    run as data-modifying CTEs without a per-row cascade collector, and so can
+    the history entries of the deleted regions and members. For a pooled tenant
+    only its own regions are candidates.
+    """
+    region_table = connection.ops.quote_name(Region._meta.db_table)
+    member_table = connection.ops.quote_name(Member._meta.db_table)
+    region_column = connection.ops.quote_name(Member._meta.get_field('region').column)
+    params = [region_ids]
+    client_scope = ''
+    if pooled_client_key() is not None:
+        client_scope = ' AND client_key = %s'
+        params.append(pooled_client_key())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH doomed AS ("
+            f"    DELETE FROM {region_table} WHERE NOT (id = ANY(%s)){client_scope} RETURNING id, client_key"
+            f"), doomed_members AS ("
+            f"    DELETE FROM {member_table} WHERE {region_column} IN (SELECT id FROM doomed)"
+            f"    RETURNING id, {region_column}, version, client_key"
+            f"), logged AS ("
+            + history.insert_sql(
+                f"SELECT %s, id, id, %s, '{{}}'::jsonb, NULL, now(), client_key FROM doomed "
+                f"UNION ALL SELECT %s, id, {region_column}, %s, '{{}}'::jsonb, version, now(), client_key FROM doomed_members"
+            ) +
+            f") SELECT count(*) FROM doomed",
+            [*params, history.REGION, history.DELETE, history.MEMBER, history.DELETE],
+        )
+        return cursor.fetchone()[0]
+
+def scope_to_region(region_id):
+    """
+    Makes region_id the django_multitenant tenant for the rest of the request.
+    The tenant value is all the filters need, so an unsaved Region carries it
+    without a query; a region with no members, or many, scopes the same way.
+    With TENANT_SCHEMA_ONLY the schema is the only scope and callers filter on
+    region_id themselves, so the thread-local state is skipped.
+    """
+    if schema_only_tenancy():
+        return
+    set_current_tenant(Region(id=region_id))
+
+# Fields a client may pick with `fields=`, in response order
+MEMBER_FIELDS = tuple(MemberResponseSchema.model_fields)
+# `format=` values of the member list endpoints; columnar sends the column names
+# once followed by one array of values per member
+LIST_FORMATS = ('json', 'columnar')
+
+def parse_fields(fields):
+    """
+    Returns the member fields named in a comma-separated `fields=` value, in the
+    order given, or None when the parameter is absent (every field).
+    """
+    if not fields:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+    unknown = [name for name in names if name not in MEMBER_FIELDS]
+    if unknown or not names:
+        raise FieldSelectionError(
+            f"Unknown field(s) {', '.join(unknown)}; expected a comma-separated subset of {', '.join(MEMBER_FIELDS)}."
+        )
+    return names
+
+def member_list_response(request, queryset, fields, format):
+    """
+    Serializes queryset for the member list endpoints. With no field selection in
+    the default format it is returned as is and validated against
+    MemberResponseSchema; otherwise only the selected columns are fetched, with
+    .values() / .values_list(), and the rows are sent without model instances or
+    schema validation.
+    """
+    if format not in LIST_FORMATS:
+        raise FieldSelectionError(f"format must be one of {', '.join(LIST_FORMATS)}.")
+    selected = parse_fields(fields)
+    if selected is None and format == 'json':
+        return queryset
+    columns = selected or list(MEMBER_FIELDS)
+    if format == 'columnar':
+        return api.create_response(
+            request, {"columns": columns, "rows": list(queryset.values_list(*columns))}, status=200
+        )
+    return api.create_response(request, list(queryset.values(*columns)), status=200)
+
+@api.get("{region_id}/members", response={200: List[MemberResponseSchema], 400: ErrorSchema})
+def list_members_region(request, region_id: int, fields: Optional[str] = None, format: str = 'json'):
     # Set the tenant schema based on the region_id
-    region = Member.objects.get(region_id=region_id)
-    set_current_tenant(region)
-    return Member.objects.all()
+    scope_to_region(region_id)
+    return member_list_response(request, Member.objects.filter(region_id=region_id), fields, format)
 
-@api.get("/members", response=List[MemberResponseSchema])
-def list_members(request):
+@api.get("/members", response={200: List[MemberResponseSchema], 400: ErrorSchema})
+def list_members(request, include_archived: bool = False, fields: Optional[str] = None, format: str = 'json'):
     # The current tenant schema is already set by django-tenants middleware
-    return Member.objects.all()
+    if include_archived:
+        columns = parse_fields(fields) or MEMBER_FIELDS
+        queryset = Member.objects.values(*columns).union(ArchivedMember.objects.values(*columns), all=True)
+        return member_list_response(request, queryset, fields, format)
+    return member_list_response(request, Member.objects.all(), fields, format)
 
 @api.post("/members", response=MemberResponseSchema)
 def create_member(request, payload: MemberUpdateSchema):
     # The current tenant schema is already set by django-tenants middleware
-    member = Member.objects.create(
-        name=payload.name,
-        phone=payload.phone,
-        email=payload.email,
-        region_id=payload.region_id
-    )
+    with transaction.atomic():
+        member = Member.objects.create(
+            name=payload.name,
+            phone=payload.phone,
+            email=payload.email,
+            region_id=payload.region_id
+        )
+        history.record(history.MEMBER, member.id, member.region_id, history.CREATE, history.member_snapshot(member), member.version)
     return member
 
-@api.get("{region_id}/members/{member_id}", response=MemberResponseSchema)
-def get_member(request, region_id:int, member_id: int):
-    region = Member.objects.get(region_id=region_id)
-    set_current_tenant(region)
-    member = Member.objects.get(id=member_id)
+@api.get("/members/search", response={200: MemberSearchPageSchema, 400: ErrorSchema})
+def search_members_endpoint(request, q: str, after: Optional[str] = None, limit: int = SEARCH_PAGE_SIZE):
+    # Best match first; pass the returned `next` as `after` for the following page
+    if not 1 <= limit <= SEARCH_PAGE_SIZE:
+        return 400, {"detail": f"limit must be between 1 and {SEARCH_PAGE_SIZE}."}
+    try:
+        results, next_after = search_members(q, after=after, limit=limit)
+    except ValueError as exc:
+        return 400, {"detail": str(exc)}
+    return {"results": results, "next": next_after}
+
+@api.post("/members/import", response={200: MemberImportResponseSchema, 400: ErrorSchema})
+def import_members_file(request, file: UploadedFile = File(...), format: str = 'csv'):
+    # The current tenant schema is already set by django-tenants middleware
+    if format not in IMPORT_FORMATS:
+        return 400, {"detail": f"format must be one of {', '.join(IMPORT_FORMATS)}."}
+    if pooled_client_key() is not None:
+        # The COPY + MERGE path writes the member table directly, without client keys
+        return 400, {"detail": "Bulk import is not available to pooled tenants; promote the tenant first."}
+    # Decoded line by line; large uploads are read from Django's temporary file
+    result = import_members(codecs.iterdecode(file, 'utf-8-sig'), format=format, background_analyze=True)
+    return {
+        "inserted": result.inserted,
+        "updated": result.updated,
+        "rejected": result.rejected,
+        "rejected_rows": [{"line": line, "error": error} for line, error in result.rejected_rows],
+    }
+
+@api.get("{region_id}/members/{member_id}", response={200: MemberResponseSchema, 400: ErrorSchema})
+def get_member(request, region_id:int, member_id: int, include_archived: bool = False, fields: Optional[str] = None):
+    scope_to_region(region_id)
+    selected = parse_fields(fields)
+    if selected is None:
+        members, archived_members = Member.objects, ArchivedMember.objects
+    else:
+        members, archived_members = Member.objects.values(*selected), ArchivedMember.objects.values(*selected)
+    try:
+        member = members.get(id=member_id, region_id=region_id)
+    except Member.DoesNotExist:
+        if not include_archived:
+            raise
+        member = archived_members.get(id=member_id, region_id=region_id)
+    if selected is not None:
+        return api.create_response(request, member, status=200)
     return member
 
 @api.put("{region_id}/members/{member_id}", response=MemberResponseSchema)
 def update_member(request, region_id:int, member_id: int, payload: MemberUpdateSchema):
-    region = Member.objects.get(region_id=region_id)
-    set_current_tenant(region)
-    member = Member.objects.get(id=member_id)
-    member.name = payload.name
+    # One UPDATE ... RETURNING scoped by region_id; bumps the version without checking it
+    changes = {"name": payload.name}
     if payload.phone is not None:
-        member.phone = payload.phone
+        changes["phone"] = payload.phone
     if payload.email is not None:
-        member.email = payload.email
-    member.save()
-    return member
+        changes["email"] = payload.email
+    return update_member_fields(member_id, region_id, changes)
+
+@api.patch("{region_id}/members/{member_id}", response={200: MemberResponseSchema, 400: ErrorSchema, 409: VersionConflictSchema})
+def patch_member(request, region_id:int, member_id: int, payload: MemberPatchSchema):
+    # Writes only the fields sent, and only on top of the version the client read
+    changes = payload.model_dump(exclude_unset=True, exclude_none=True, exclude={"version"})
+    if not changes:
+        return 400, {"detail": f"Nothing to update; send at least one of {', '.join(UPDATABLE_FIELDS)}."}
+    return update_member_fields(member_id, region_id, changes, version=payload.version)
 
 @api.delete("{region_id}/members/{member_id}", response={200: None})
 def delete_member(request, region_id:int, member_id: int):
-    region = Member.objects.get(region_id=region_id)
-    set_current_tenant(region) 
-    member = Member.objects.get(id=member_id)
-    member.delete()
-    return 200
\ No newline at end of file
+    scope_to_region(region_id)
+    member = Member.objects.get(id=member_id, region_id=region_id)
+    with transaction.atomic():
+        member.delete()
+        history.record(history.MEMBER, member_id, region_id, history.DELETE, version=member.version)
+    return 200
+
+@api.get("/members/{member_id}/history", response={200: HistoryPageSchema, 400: ErrorSchema})
+def member_history(request, member_id: int, after: Optional[int] = None, limit: int = history.HISTORY_PAGE_SIZE):
+    # Oldest first; pass the returned `next` as `after` for the following page. Also
+    # served for deleted and archived members
+    if not 1 <= limit <= history.HISTORY_PAGE_SIZE:
+        return 400, {"detail": f"limit must be between 1 and {history.HISTORY_PAGE_SIZE}."}
+    entries, next_after = history.history_page(history.MEMBER, member_id, after=after, limit=limit)
+    return {"entries": entries, "next": next_after}
+
+@api.post("/batch", response=BatchResponseSchema)
+def run_batch_operations(request, payload: BatchRequestSchema):
+    # The current tenant schema is already set by django-tenants middleware; one
+    # request, one transaction and one member query for the whole batch
+    committed, results = run_batch(payload.operations, all_or_nothing=payload.all_or_nothing)
+    return {"committed": committed, "results": [{"status": status, "body": body} for status, body in results]}
@@ -0,0 +1,130 @@
+"""
+POST /batch: many member and region operations in one request.
+
+The whole batch runs in one transaction on the tenant schema resolved once by
+the middleware. Every member the batch refers to is read up front with a single
+in_bulk() (id__in) query, and later operations work on those instances, so a
+get after an update in the same batch sees the update. Each write runs in its
+own savepoint: a failing operation is rolled back on its own and reported in its
+result, unless all_or_nothing asks for the whole batch to be rolled back.
+
+Results mirror what the single-operation endpoints return, one per operation, in
+order. The history entries of creates and deletes are written with one bulk
+insert at the end of the batch; updates write theirs in their own statement.
+"""
+from django.db import DatabaseError, IntegrityError, transaction
+
+from . import history
+from .models import Member, Region
+from .schemas import MemberResponseSchema, RegionResponseSchema
+from .updates import RETURNED_FIELDS, VersionConflict, update_member_fields
+
+NOT_FOUND = (404, {"detail": "Object not found."})
+
+
+class BatchFailed(Exception):
+    """Raised inside the transaction to roll back an all_or_nothing batch."""
+
+
+def run_batch(operations, all_or_nothing=False):
+    """Runs operations in order and returns (committed, [(status, body), ...])."""
+    member_ids = {operation.member_id for operation in operations if hasattr(operation, 'member_id')}
+    members = Member.objects.in_bulk(member_ids) if member_ids else {}
+
+    results = []
+    try:
+        with transaction.atomic():
+            with history.batched():
+                for operation in operations:
+                    results.append(OPERATIONS[operation.op](operation, members))
+            if all_or_nothing and any(status >= 400 for status, _ in results):
+                raise BatchFailed
+    except BatchFailed:
+        return False, results
+    return True, results
+
+
+def _member(operation, members):
+    member = members.get(operation.member_id)
+    # The region is part of the address; a member in another region is not found
+    if member is None or member.region_id != operation.region_id:
+        return None
+    return member
+
+
+def _member_body(member):
+    return MemberResponseSchema.model_validate(member).model_dump(mode='json')
+
+
+def _write(apply):
+    """Runs apply() in a savepoint and turns database errors into a result."""
+    try:
+        with transaction.atomic():
+            return apply()
+    except VersionConflict as exc:
+        return 409, {"detail": str(exc), "current_version": exc.current_version}
+    except IntegrityError as exc:
+        return 409, {"detail": f"Conflict: {exc}"}
+    except DatabaseError as exc:
+        return 400, {"detail": str(exc)}
+
+
+def get_member(operation, members):
+    member = _member(operation, members)
+    if member is None:
+        return NOT_FOUND
+    return 200, _member_body(member)
+
+
+def update_member(operation, members):
+    member = _member(operation, members)
+    if member is None:
+        return NOT_FOUND
+    payload = operation.payload
+    changes = {"name": payload.name}
+    if payload.phone is not None:
+        changes["phone"] = payload.phone
+    if payload.email is not None:
+        changes["email"] = payload.email
+
+    def apply():
+        row = update_member_fields(member.id, member.region_id, changes, version=operation.version)
+        # Later operations in the batch read the cached instance
+        for field in RETURNED_FIELDS:
+            setattr(member, field, row[field])
+        return 200, _member_body(member)
+
+    return _write(apply)
+
+
+def delete_member(operation, members):
+    member = _member(operation, members)
+    if member is None:
+        return NOT_FOUND
+
+    def apply():
+        Member.objects.filter(id=member.id, region_id=member.region_id).delete()
+        history.record(history.MEMBER, member.id, member.region_id, history.DELETE, version=member.version)
+        members.pop(member.id)
+        return 200, None
+
+    return _write(apply)
+
+
+def create_region(operation, members):
+    payload = operation.payload
+
+    def apply():
+        region = Region.objects.create(id=payload.region_id, name=payload.name)
+        history.record(history.REGION, region.id, region.id, history.CREATE, {"name": region.name})
+        return 200, RegionResponseSchema.model_validate(region).model_dump(mode='json')
+
+    return _write(apply)
+
+
+OPERATIONS = {
+    'get_member': get_member,
+    'update_member': update_member,
+    'delete_member': delete_member,
+    'create_region': create_region,
+}
@@ -0,0 +1,354 @@
+"""
+Duplicate member detection for the tenant schema the connection is set to.
+
+Members are never compared all against all. Each member gets blocking keys:
+  - email: the lower-cased address, with a +tag removed (and dots, for Gmail)
+  - phone: the last 10 digits
+  - name:  the Soundex code of the last name plus the first initial
+stored in MemberBlockKey. Only members sharing a key are compared, and keys
+shared by more than MAX_BLOCK_SIZE members (a company switchboard number, a
+very common name) are skipped as uninformative. Pairs are scored with
+difflib on the names plus email / phone matches, and those scoring at least
+MIN_SCORE are written to DuplicateCandidate. Neither a shared name nor a shared
+email and phone is enough on its own (namesakes, households): a similar name
+plus matching contact details is.
+
+Runs are incremental: DedupeState holds the highest member id already keyed,
+and each run keys and compares only members created since, in batches. Members
+keyed earlier whose name, email or phone changed since the last run are found
+through their history entries (DedupeState.last_history_id); their keys and
+candidates are dropped, and they are keyed and compared again. Changes made
+without a history entry (raw SQL, shell saves) are only picked up by a rebuild.
+
+In the pool schema the keys of a pooled tenant's members are prefixed with its
+client_key, so members of different pooled tenants never share a block.
+"""
+import io
+import re
+import time
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+
+from django.db import connection, transaction
+from django.db.models import Max, Q
+
+from . import history
+from .importer import _copy_value
+from .models import DedupeState, DuplicateCandidate, HistoryEntry, Member, MemberBlockKey
+
+# Members keyed and compared per transaction
+DEDUPE_BATCH_SIZE = 50_000
+# Blocks with more members than this are not compared
+MAX_BLOCK_SIZE = 200
+# Lowest score written as a candidate
+MIN_SCORE = 0.6
+# Score weights; they add up to 1
+NAME_WEIGHT, EMAIL_WEIGHT, PHONE_WEIGHT = 0.5, 0.3, 0.2
+# Names less similar than this belong to different people, whatever else matches
+MIN_NAME_SIMILARITY = 0.7
+
+_NON_ALPHA = re.compile(r'[^a-z ]')
+_NON_DIGIT = re.compile(r'\D')
+_SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'), **dict.fromkeys('cgjkqsxz', '2'), **dict.fromkeys('dt', '3'),
+    'l': '4', **dict.fromkeys('mn', '5'), 'r': '6',
+}
+_GMAIL_DOMAINS = {'gmail.com', 'googlemail.com'}
+
+
+def normalize_name(name):
+    return ' '.join(_NON_ALPHA.sub(' ', (name or '').lower()).split())
+
+
+def normalize_email(email):
+    email = (email or '').strip().lower()
+    local, at, domain = email.partition('@')
+    if not at or not local or not domain:
+        return ''
+    local = local.split('+', 1)[0]
+    if domain in _GMAIL_DOMAINS:
+        local, domain = local.replace('.', ''), 'gmail.com'
+    return f'{local}@{domain}'
+
+
+def phone_digits(phone):
+    digits = _NON_DIGIT.sub('', phone or '')
+    # Shorter numbers are extensions or typos, not a useful key
+    return digits[-10:] if len(digits) >= 7 else ''
+
+
+def soundex(word):
+    """American Soundex: the first letter and three digits, e.g. Robert -> R163."""
+    word = ''.join(char for char in word.lower() if char.isalpha())
+    if not word:
+        return ''
+    code, previous = [], _SOUNDEX_CODES.get(word[0], '')
+    for char in word[1:]:
+        digit = _SOUNDEX_CODES.get(char, '')
+        if digit and digit != previous:
+            code.append(digit)
+            if len(code) == 3:
+                break
+        # h and w do not separate letters with the same code; vowels do
+        if char not in 'hw':
+            previous = digit
+    return (word[0].upper() + ''.join(code)).ljust(4, '0')
+
+
+def blocking_keys(name, email, phone):
+    """[(kind, key)] for one member."""
+    keys = []
+    email = normalize_email(email)
+    if email:
+        keys.append(('email', email[:255]))
+    digits = phone_digits(phone)
+    if digits:
+        keys.append(('phone', digits))
+    parts = normalize_name(name).split()
+    if parts:
+        keys.append(('name', f'{soundex(parts[-1])}{parts[0][0]}'))
+    return keys
+
+
+def member_profile(name, email, phone):
+    """The normalized (name, email, phone digits) that pairs are scored on."""
+    return normalize_name(name), normalize_email(email), phone_digits(phone)
+
+
+def phone_similarity(first, second):
+    """1 for the same number, 0.5 for a single mistyped digit, else 0."""
+    if not first or len(first) != len(second):
+        return 0.0
+    if first == second:
+        return 1.0
+    differences = 0
+    for a, b in zip(first, second):
+        if a != b:
+            differences += 1
+            if differences > 1:
+                return 0.0
+    return 0.5
+
+
+def score_pair(first, second, min_score=0.0):
+    """
+    Similarity of two member_profile() tuples, from 0 to 1, or None when it is
+    below min_score or the names are less similar than MIN_NAME_SIMILARITY. The
+    name comparison is the expensive part: it is skipped when even identical
+    names could not reach min_score, and SequenceMatcher's cheap upper bounds
+    are checked before the full ratio.
+    """
+    contact = (
+        EMAIL_WEIGHT * (first[1] != '' and first[1] == second[1])
+        + PHONE_WEIGHT * phone_similarity(first[2], second[2])
+    )
+    needed = max((min_score - contact) / NAME_WEIGHT, MIN_NAME_SIMILARITY)
+    if needed > 1:
+        return None
+    matcher = SequenceMatcher(None, first[0], second[0], autojunk=False)
+    if matcher.real_quick_ratio() < needed or matcher.quick_ratio() < needed:
+        return None
+    name = matcher.ratio()
+    if name < needed:
+        return None
+    return round(contact + NAME_WEIGHT * name, 4)
+
+
+@dataclass
+class DedupeResult:
+    members: int = 0
+    # Members keyed before whose name, email or phone changed
+    rekeyed: int = 0
+    keys: int = 0
+    compared: int = 0
+    candidates: int = 0
+    seconds: float = 0.0
+
+
+def find_duplicates(batch_size=DEDUPE_BATCH_SIZE, min_score=MIN_SCORE, max_block_size=MAX_BLOCK_SIZE,
+                    rebuild=False, progress=None):
+    """
+    Re-keys and compares the members changed since the last run, then keys and
+    compares every member created since. With rebuild, all keys and candidates
+    are dropped first and every member is processed.
+    """
+    started = time.perf_counter()
+    result = DedupeResult()
+    if rebuild:
+        with transaction.atomic():
+            MemberBlockKey.objects.all().delete()
+            DuplicateCandidate.objects.all().delete()
+            DedupeState.objects.update_or_create(id=1, defaults={
+                'last_member_id': 0, 'last_history_id': _last_history_id(),
+            })
+    else:
+        prune_removed_members()
+        rekey_changed_members(batch_size, min_score, max_block_size, result)
+
+    while True:
+        with transaction.atomic():
+            state, _ = DedupeState.objects.select_for_update().get_or_create(id=1)
+            rows = list(
+                Member.objects.filter(id__gt=state.last_member_id)
+                .order_by('id').values_list('id', 'name', 'email', 'phone', 'client_key')[:batch_size]
+            )
+            if not rows:
+                break
+            low, high = state.last_member_id, rows[-1][0]
+            result.keys += _store_keys(rows)
+            pairs = _blocked_pairs("member_id > %s AND member_id <= %s", [low, high], max_block_size)
+            result.compared += len(pairs)
+            result.candidates += _store_candidates(pairs, min_score)
+            result.members += len(rows)
+            state.last_member_id = high
+            state.save()
+        if progress:
+            progress(result)
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def rekey_changed_members(batch_size=DEDUPE_BATCH_SIZE, min_score=MIN_SCORE, max_block_size=MAX_BLOCK_SIZE,
+                          result=None):
+    """
+    Drops the keys and candidates of already keyed members whose name, email
+    or phone changed since the last run, according to their history, and keys
+    and compares them again, batch_size members per transaction. Returns result.
+    """
+    result = result or DedupeResult()
+    state, _ = DedupeState.objects.get_or_create(id=1)
+    high = _last_history_id()
+    changed = list(
+        HistoryEntry.objects.filter(
+            entity=history.MEMBER, action__in=(history.UPDATE, history.SNAPSHOT),
+            id__gt=state.last_history_id, id__lte=high, object_id__lte=state.last_member_id,
+            changes__has_any_keys=['name', 'email', 'phone'],
+        ).order_by('object_id').values_list('object_id', flat=True).distinct()
+    )
+    for start in range(0, len(changed), batch_size):
+        ids = changed[start:start + batch_size]
+        with transaction.atomic():
+            MemberBlockKey.objects.filter(member_id__in=ids).delete()
+            DuplicateCandidate.objects.filter(Q(member_id__in=ids) | Q(other_id__in=ids)).delete()
+            rows = list(Member.objects.filter(id__in=ids).values_list('id', 'name', 'email', 'phone', 'client_key'))
+            result.keys += _store_keys(rows)
+            pairs = _blocked_pairs("member_id = ANY(%s)", [ids], max_block_size)
+            result.compared += len(pairs)
+            result.candidates += _store_candidates(pairs, min_score)
+            result.rekeyed += len(rows)
+    # Batches that ran before a failure are simply redone by the next run
+    DedupeState.objects.filter(id=1).update(last_history_id=high)
+    return result
+
+
+def _last_history_id():
+    return HistoryEntry.objects.aggregate(high=Max('id'))['high'] or 0
+
+
+def prune_removed_members():
+    """Drops keys and candidates of members that were deleted or archived."""
+    member_table = connection.ops.quote_name(Member._meta.db_table)
+    with connection.cursor() as cursor:
+        for model, columns in ((MemberBlockKey, ('member_id',)), (DuplicateCandidate, ('member_id', 'other_id'))):
+            table = connection.ops.quote_name(model._meta.db_table)
+            missing = ' OR '.join(
+                f"NOT EXISTS (SELECT 1 FROM {member_table} m WHERE m.id = t.{column})" for column in columns
+            )
+            cursor.execute(f"DELETE FROM {table} t WHERE {missing}")
+
+
+def _store_keys(rows):
+    data = ''.join(
+        f'{member_id}\t{kind}\t{_copy_value(_client_prefix(client_key) + key)[:255]}\n'
+        for member_id, name, email, phone, client_key in rows
+        for kind, key in blocking_keys(name, email, phone)
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {connection.ops.quote_name(MemberBlockKey._meta.db_table)} (member_id, kind, key) FROM STDIN",
+            io.StringIO(data),
+        )
+    return data.count('\n')
+
+
+def _client_prefix(client_key):
+    return '' if client_key is None else f'{client_key}:'
+
+
+def _blocked_pairs(where, params, max_block_size):
+    """
+    {(member_id, other_id): kinds}, member_id < other_id, for every pair sharing
+    a key where at least one side's keys match where (SQL on the key table,
+    with params). Oversized blocks are left out.
+    """
+    table = connection.ops.quote_name(MemberBlockKey._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH new_keys AS ("
+            f"    SELECT member_id, kind, key FROM {table} WHERE {where}"
+            f"), blocks AS ("
+            f"    SELECT k.kind, k.key FROM {table} k"
+            f"    JOIN (SELECT DISTINCT kind, key FROM new_keys) n ON n.kind = k.kind AND n.key = k.key"
+            f"    GROUP BY k.kind, k.key HAVING count(*) BETWEEN 2 AND %s"
+            f") "
+            f"SELECT LEAST(o.member_id, n.member_id), GREATEST(o.member_id, n.member_id), "
+            f"string_agg(DISTINCT n.kind, ',' ORDER BY n.kind) "
+            f"FROM new_keys n JOIN blocks b ON b.kind = n.kind AND b.key = n.key "
+            f"JOIN {table} o ON o.kind = n.kind AND o.key = n.key AND o.member_id <> n.member_id "
+            f"GROUP BY 1, 2",
+            [*params, max_block_size],
+        )
+        return {(first, second): kinds for first, second, kinds in cursor.fetchall()}
+
+
+def _store_candidates(pairs, min_score):
+    if not pairs:
+        return 0
+    ids = {member_id for pair in pairs for member_id in pair}
+    members, client_keys = {}, {}
+    rows = Member.objects.filter(id__in=ids).values_list('id', 'name', 'email', 'phone', 'client_key')
+    for member_id, name, email, phone, client_key in rows:
+        members[member_id] = member_profile(name, email, phone)
+        client_keys[member_id] = client_key
+    candidates = []
+    for (first, second), kinds in pairs.items():
+        if first not in members or second not in members:
+            continue
+        score = score_pair(members[first], members[second], min_score)
+        if score is not None:
+            candidates.append(DuplicateCandidate(
+                member_id=first, other_id=second, score=score, matched_on=kinds, client_key=client_keys[first],
+            ))
+    DuplicateCandidate.objects.bulk_create(
+        candidates, batch_size=5000, update_conflicts=True,
+        unique_fields=['member_id', 'other_id'], update_fields=['score', 'matched_on'],
+    )
+    return len(candidates)
+
+
+def find_duplicates_in_memory(rows, min_score=MIN_SCORE, max_block_size=MAX_BLOCK_SIZE):
+    """
+    The same blocking and scoring over (id, name, email, phone) rows in id order,
+    without a database; used by `manage.py bench_dedupe`. Returns
+    ({(id, other_id): score}, number of comparisons). Pairs that share several
+    keys are compared once per key rather than remembered.
+    """
+    blocks = {}
+    profiles = {}
+    for member_id, name, email, phone in rows:
+        profiles[member_id] = member_profile(name, email, phone)
+        for key in blocking_keys(name, email, phone):
+            blocks.setdefault(key, []).append(member_id)
+    scores = {}
+    compared = 0
+    for members in blocks.values():
+        if not 2 <= len(members) <= max_block_size:
+            continue
+        for index, first in enumerate(members):
+            for second in members[index + 1:]:
+                compared += 1
+                score = score_pair(profiles[first], profiles[second], min_score)
+                if score is not None:
+                    scores[(first, second)] = score
+    return scores, compared
@@ -0,0 +1,186 @@
+"""
+Change history of members and regions, for questions like "what was this
+member's phone on date X".
+
+Every write appends a HistoryEntry holding only the fields it changed, with
+their new values; creates hold the whole object and deletes nothing. Folding an
+object's entries in id order up to X (fold()) gives its state at X.
+
+Entries are written next to the change, in the same transaction:
+  - single-row ORM writes call record();
+  - the batch endpoint wraps its operations in batched(), which collects what
+    they record and writes it with one bulk insert;
+  - SQL write paths (member updates, region deletion, member import) insert
+    their entries in the same statement or transaction with insert_sql() and
+    changes_sql(), computing the diff in PostgreSQL.
+
+`manage.py compact_history` folds the entries older than a cutoff into one
+entry per object, and can drop the history of objects deleted before it.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import groupby
+from operator import attrgetter
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from .models import HistoryEntry
+
+MEMBER, REGION = 'member', 'region'
+ENTITIES = (MEMBER, REGION)
+CREATE, UPDATE, DELETE, SNAPSHOT = 'create', 'update', 'delete', 'snapshot'
+# Fields whose changes are recorded
+MEMBER_FIELDS = ('name', 'email', 'phone', 'region_id')
+REGION_FIELDS = ('name',)
+# Columns of insert_sql(), in order
+HISTORY_COLUMNS = ('entity', 'object_id', 'region_id', 'action', 'changes', 'version', 'changed_at', 'client_key')
+# Entries written per bulk insert, and objects compacted per transaction
+HISTORY_BATCH_SIZE = 5000
+# Entries per page of GET /members/{id}/history
+HISTORY_PAGE_SIZE = 100
+
+_buffer = ContextVar('history_buffer', default=None)
+
+
+def record(entity, object_id, region_id, action, changes=None, version=None):
+    """Records one change; inside batched() it is written when the block ends."""
+    entry = HistoryEntry(
+        entity=entity, object_id=object_id, region_id=region_id, action=action,
+        changes=changes or {}, version=version,
+    )
+    buffer = _buffer.get()
+    if buffer is None:
+        entry.save()
+    else:
+        buffer.append(entry)
+    return entry
+
+
+def record_many(entries):
+    HistoryEntry.objects.bulk_create(entries, batch_size=HISTORY_BATCH_SIZE)
+
+
+@contextmanager
+def batched():
+    """Collects the entries recorded in the block and writes them with one bulk insert at its end."""
+    buffer = []
+    token = _buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _buffer.reset(token)
+    if buffer:
+        record_many(buffer)
+
+
+def member_snapshot(member):
+    return {field: getattr(member, field) for field in MEMBER_FIELDS}
+
+
+def changed_fields(old, new):
+    """The entries of new whose value differs from old."""
+    return {field: value for field, value in new.items() if old.get(field) != value}
+
+
+def fold(entries):
+    """
+    (action, changes) of one entry equivalent to entries, in id order: SNAPSHOT
+    with the object's state after them, or DELETE when it ends deleted.
+    """
+    state = None
+    for entry in entries:
+        if entry.action == DELETE:
+            state = None
+        elif entry.action in (CREATE, SNAPSHOT) or state is None:
+            state = dict(entry.changes)
+        else:
+            state.update(entry.changes)
+    return (DELETE, {}) if state is None else (SNAPSHOT, state)
+
+
+def history_page(entity, object_id, after=None, limit=HISTORY_PAGE_SIZE):
+    """
+    The entries of one object after entry id after, oldest first, and the id to
+    pass as after for the next page (None on the last one).
+    """
+    entries = HistoryEntry.objects.filter(entity=entity, object_id=object_id)
+    if after is not None:
+        entries = entries.filter(id__gt=after)
+    page = list(entries.order_by('id')[:limit + 1])
+    if len(page) > limit:
+        return page[:limit], page[limit - 1].id
+    return page, None
+
+
+def insert_sql(select):
+    """INSERT of the history rows produced by select, which yields HISTORY_COLUMNS in order."""
+    columns = ', '.join(connection.ops.quote_name(column) for column in HISTORY_COLUMNS)
+    return f"INSERT INTO {connection.ops.quote_name(HistoryEntry._meta.db_table)} ({columns}) {select}"
+
+
+def changes_sql(fields, new, old=None):
+    """
+    A jsonb expression of the fields (column names) whose value in the new
+    expressions differs from the old ones; every field when old is None. new and
+    old map each field to an SQL expression. The recorded columns are NOT NULL,
+    so only unchanged fields are stripped.
+    """
+    pairs = []
+    for field in fields:
+        value = new[field] if old is None else f"CASE WHEN {new[field]} IS DISTINCT FROM {old[field]} THEN {new[field]} END"
+        pairs.append(f"'{field}', {value}")
+    return f"jsonb_strip_nulls(jsonb_build_object({', '.join(pairs)}))"
+
+
+def compact_history(cutoff, purge_deleted=False, batch_size=HISTORY_BATCH_SIZE):
+    """
+    Folds the entries older than cutoff into one per object: the newest of them
+    becomes a SNAPSHOT (or DELETE) entry and the rest are deleted, so paging by
+    id still returns it before the newer entries. With purge_deleted, objects
+    whose last entry is a delete older than cutoff lose their whole history.
+    Returns the number of entries removed.
+    """
+    removed = purge_deleted_history(cutoff) if purge_deleted else 0
+    old = HistoryEntry.objects.filter(changed_at__lt=cutoff)
+    for entity in ENTITIES:
+        last_object_id = None
+        while True:
+            with transaction.atomic():
+                objects = old.filter(entity=entity)
+                if last_object_id is not None:
+                    objects = objects.filter(object_id__gt=last_object_id)
+                object_ids = list(
+                    objects.values('object_id').annotate(entries=Count('id')).filter(entries__gt=1)
+                    .order_by('object_id').values_list('object_id', flat=True)[:batch_size]
+                )
+                if not object_ids:
+                    break
+                entries = old.filter(entity=entity, object_id__in=object_ids).order_by('object_id', 'id')
+                snapshots, folded = [], []
+                for _, group in groupby(entries, key=attrgetter('object_id')):
+                    group = list(group)
+                    snapshot = group[-1]
+                    snapshot.action, snapshot.changes = fold(group)
+                    snapshots.append(snapshot)
+                    folded.extend(entry.id for entry in group[:-1])
+                HistoryEntry.objects.bulk_update(snapshots, ['action', 'changes'], batch_size=batch_size)
+                removed += HistoryEntry.objects.filter(id__in=folded).delete()[0]
+                last_object_id = object_ids[-1]
+    return removed
+
+
+def purge_deleted_history(cutoff):
+    """Deletes the history of objects deleted before cutoff; returns the entries removed."""
+    table = connection.ops.quote_name(HistoryEntry._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} h USING ("
+            f"    SELECT DISTINCT ON (entity, object_id) entity, object_id, action, changed_at "
+            f"    FROM {table} ORDER BY entity, object_id, id DESC"
+            f") last "
+            f"WHERE last.action = %s AND last.changed_at < %s "
+            f"AND h.entity = last.entity AND h.object_id = last.object_id",
+            [DELETE, cutoff],
+        )
+        return cursor.rowcount
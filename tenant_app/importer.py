@@ -0,0 +1,282 @@
+"""
+Bulk member import for enrollment files.
+
+Records are read from a CSV or NDJSON stream in batches, validated a batch at a
+time against MemberImportSchema (one pydantic call per batch), and written with
+COPY FROM STDIN into an UNLOGGED staging table in the tenant schema. Rejections
+that need the database (unknown region, unknown member id) are marked on the
+staging table with set-based UPDATEs, and the remaining rows are merged into
+Member with a single MERGE. New members get their ids from the member sequence
+on the staging table first, so their history entries, and the diffs of updated
+members, are written set-based from the staging table before the MERGE, in the
+same transaction. Rows that are rejected at any stage stay in the staging table
+until the report has been read, so nothing accumulates in memory.
+
+Everything runs against the schema the connection is currently set to, which
+must not be the pool schema: the MERGE writes no client_key, so the rows would
+belong to no pooled tenant.
+"""
+import csv
+import io
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import List
+
+from django.conf import settings
+from django.db import connection, transaction
+from pydantic import TypeAdapter, ValidationError
+
+from . import history
+from .maintenance import analyze_after_bulk_write, analyze_in_background
+from .models import Member, Region
+from .schemas import MemberImportSchema
+
+# Records validated and copied per round trip
+IMPORT_BATCH_SIZE = 10_000
+# Rejected rows returned inline by the API; the command can write all of them
+IMPORT_REJECT_SAMPLE = 100
+STAGING_PREFIX = 'tenant_app_member_import_'
+STAGING_COLUMNS = ('line', 'id', 'name', 'email', 'phone', 'region_id', 'error', 'record')
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+_records_adapter = TypeAdapter(List[MemberImportSchema])
+
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+    # (line, error) for the first IMPORT_REJECT_SAMPLE rejected rows
+    rejected_rows: list = field(default_factory=list)
+
+
+def import_members(lines, format='csv', batch_size=IMPORT_BATCH_SIZE, rejects_file=None,
+                   sample=IMPORT_REJECT_SAMPLE, background_analyze=False):
+    """
+    Imports members from lines, an iterable of text lines (an open file works).
+    Records with an id update that member, which must be in the record's region;
+    records without one create a new member. When a file repeats an id the last
+    record wins. If rejects_file is given, every rejected row is written to it
+    as CSV (line, error, record). With background_analyze, as in a request,
+    the member table is analyzed afterwards by analyze_in_background() instead
+    of before returning. Raises ValueError on the pool schema.
+    """
+    if connection.schema_name == settings.TENANT_POOL_SCHEMA:
+        raise ValueError("Bulk import is not available to pooled tenants; promote the tenant first.")
+    started = time.perf_counter()
+    staging = f'{STAGING_PREFIX}{uuid.uuid4().hex[:12]}'
+    result = ImportResult()
+
+    with connection.cursor() as cursor:
+        _create_staging_table(cursor, staging)
+        try:
+            batch = []
+            for line, record in read_records(lines, format):
+                batch.append((line, record))
+                if len(batch) >= batch_size:
+                    _copy_batch(cursor, staging, batch)
+                    batch = []
+            if batch:
+                _copy_batch(cursor, staging, batch)
+
+            with transaction.atomic():
+                _reject_unknown_references(cursor, staging)
+                _assign_new_ids(cursor, staging)
+                _record_history(cursor, staging)
+                result.inserted, result.updated = _merge(cursor, staging)
+            analyze = analyze_in_background if background_analyze else analyze_after_bulk_write
+            analyze(Member, result.inserted + result.updated)
+
+            result.rejected, result.rejected_rows = _rejected_rows(cursor, staging, sample)
+            if rejects_file is not None and result.rejected:
+                cursor.copy_expert(
+                    f"COPY (SELECT line, error, record FROM {_quote(staging)} "
+                    f"WHERE error IS NOT NULL ORDER BY line) TO STDOUT WITH (FORMAT csv, HEADER)",
+                    rejects_file,
+                )
+        finally:
+            cursor.execute(f"DROP TABLE IF EXISTS {_quote(staging)}")
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def read_records(lines, format):
+    """Yields (line number, record) pairs. Empty CSV cells are treated as missing."""
+    if format == 'csv':
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, {key: value for key, value in record.items() if key and value != ''}
+    elif format == 'ndjson':
+        for number, text in enumerate(lines, start=1):
+            if not text.strip():
+                continue
+            try:
+                yield number, json.loads(text)
+            except ValueError:
+                # Fails validation as "not an object" and ends up in the report
+                yield number, text
+    else:
+        raise ValueError(f"Unsupported import format '{format}', expected one of {IMPORT_FORMATS}.")
+
+
+def validate_batch(batch):
+    """
+    Validates [(line, record)] with a single pydantic call. Returns the valid
+    rows as [(line, MemberImportSchema)] and the invalid ones as [(line, error)].
+    """
+    records = [record for _, record in batch]
+    try:
+        return list(zip((line for line, _ in batch), _records_adapter.validate_python(records))), []
+    except ValidationError as exc:
+        errors = {}
+        for error in exc.errors(include_url=False):
+            index, location = error['loc'][0], '.'.join(str(part) for part in error['loc'][1:])
+            message = f"{location}: {error['msg']}" if location else error['msg']
+            errors[index] = f"{errors[index]}; {message}" if index in errors else message
+
+    valid_indexes = [index for index in range(len(batch)) if index not in errors]
+    # Only rows that just passed are validated again, so this cannot fail
+    valid = _records_adapter.validate_python([records[index] for index in valid_indexes])
+    rejected = [(batch[index][0], error) for index, error in sorted(errors.items())]
+    return [(batch[index][0], row) for index, row in zip(valid_indexes, valid)], rejected
+
+
+def _create_staging_table(cursor, staging):
+    cursor.execute(
+        f"CREATE UNLOGGED TABLE {_quote(staging)} ("
+        f"line integer NOT NULL, id bigint, name text, email text, phone text, "
+        f"region_id bigint, error text, record text, created boolean NOT NULL DEFAULT false)"
+    )
+
+
+def _copy_batch(cursor, staging, batch):
+    valid, rejected = validate_batch(batch)
+    raw = dict(batch)
+    rows = [
+        (line, row.id, row.name, row.email, row.phone, row.region_id, None, None)
+        for line, row in valid
+    ] + [
+        (line, None, None, None, None, None, error, _record_text(raw[line]))
+        for line, error in rejected
+    ]
+    data = ''.join('\t'.join(_copy_value(value) for value in row) + '\n' for row in rows)
+    cursor.copy_expert(
+        f"COPY {_quote(staging)} ({', '.join(STAGING_COLUMNS)}) FROM STDIN",
+        io.StringIO(data),
+    )
+
+
+def _reject_unknown_references(cursor, staging):
+    max_name = Member._meta.get_field('name').max_length
+    cursor.execute(
+        f"UPDATE {_quote(staging)} SET error = %s WHERE error IS NULL AND length(name) > %s",
+        [f"name: String should have at most {max_name} characters", max_name],
+    )
+    cursor.execute(
+        f"UPDATE {_quote(staging)} s SET error = 'region_id: Unknown region' "
+        f"WHERE s.error IS NULL AND NOT EXISTS ("
+        f"SELECT 1 FROM {_quote(Region._meta.db_table)} r WHERE r.id = s.region_id)"
+    )
+    cursor.execute(
+        f"UPDATE {_quote(staging)} s SET error = 'id: Unknown member in this region' "
+        f"WHERE s.error IS NULL AND s.id IS NOT NULL AND NOT EXISTS ("
+        f"SELECT 1 FROM {_quote(Member._meta.db_table)} m WHERE m.id = s.id AND m.region_id = s.region_id)"
+    )
+
+
+def _assign_new_ids(cursor, staging):
+    """Gives the accepted records without an id the id of the member they will create."""
+    cursor.execute(
+        f"UPDATE {_quote(staging)} SET id = nextval(pg_get_serial_sequence(%s, 'id')), created = true "
+        f"WHERE error IS NULL AND id IS NULL",
+        [Member._meta.db_table],
+    )
+
+
+def _accepted(staging):
+    # DISTINCT ON keeps the last record per id
+    return (
+        f"(SELECT DISTINCT ON (id) id, name, email, phone, region_id, created "
+        f"FROM {_quote(staging)} WHERE error IS NULL ORDER BY id, line DESC)"
+    )
+
+
+def _record_history(cursor, staging):
+    """Writes the history entries of the members the MERGE is about to create and change."""
+    created = history.changes_sql(history.MEMBER_FIELDS, {
+        'name': 's.name', 'email': "coalesce(s.email, '')", 'phone': "coalesce(s.phone, '')", 'region_id': 's.region_id',
+    })
+    cursor.execute(
+        history.insert_sql(
+            f"SELECT %s, s.id, s.region_id, %s, {created}, 1, now(), NULL FROM {_accepted(staging)} s WHERE s.created"
+        ),
+        [history.MEMBER, history.CREATE],
+    )
+    fields = ('name', 'email', 'phone')
+    diff = history.changes_sql(
+        fields,
+        {'name': 's.name', 'email': 'coalesce(s.email, m.email)', 'phone': 'coalesce(s.phone, m.phone)'},
+        {field: f'm.{field}' for field in fields},
+    )
+    # The rows are locked here so nothing changes them between the diff and the MERGE
+    cursor.execute(
+        history.insert_sql(
+            f"SELECT %s, id, region_id, %s, changes, version + 1, now(), NULL FROM ("
+            f"    SELECT m.id, m.region_id, m.version, {diff} AS changes "
+            f"    FROM {_accepted(staging)} s JOIN {_quote(Member._meta.db_table)} m "
+            f"    ON m.id = s.id AND m.region_id = s.region_id WHERE NOT s.created FOR UPDATE OF m"
+            f") d WHERE changes <> '{{}}'::jsonb"
+        ),
+        [history.MEMBER, history.UPDATE],
+    )
+
+
+def _merge(cursor, staging):
+    """Merges the accepted staging rows into Member; returns (inserted, updated)."""
+    cursor.execute(
+        f"SELECT count(DISTINCT id) FROM {_quote(staging)} WHERE error IS NULL AND NOT created"
+    )
+    updated = cursor.fetchone()[0]
+    cursor.execute(
+        f"MERGE INTO {_quote(Member._meta.db_table)} m "
+        f"USING {_accepted(staging)} s ON m.id = s.id AND m.region_id = s.region_id "
+        f"WHEN MATCHED THEN UPDATE SET "
+        f"    name = s.name, email = coalesce(s.email, m.email), phone = coalesce(s.phone, m.phone), "
+        f"    version = m.version + 1 "
+        f"WHEN NOT MATCHED THEN INSERT (id, name, email, phone, region_id, created_at, version) "
+        f"    VALUES (s.id, s.name, coalesce(s.email, ''), coalesce(s.phone, ''), s.region_id, now(), 1)"
+    )
+    return cursor.rowcount - updated, updated
+
+
+def _rejected_rows(cursor, staging, sample):
+    cursor.execute(f"SELECT count(*) FROM {_quote(staging)} WHERE error IS NOT NULL")
+    rejected = cursor.fetchone()[0]
+    cursor.execute(
+        f"SELECT line, error FROM {_quote(staging)} WHERE error IS NOT NULL ORDER BY line LIMIT %s",
+        [sample],
+    )
+    return rejected, cursor.fetchall()
+
+
+def _record_text(record):
+    return record if isinstance(record, str) else json.dumps(record, default=str)
+
+
+def _copy_value(value):
+    """Formats a value for COPY's text format."""
+    if value is None:
+        return r'\N'
+    return (
+        str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    )
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
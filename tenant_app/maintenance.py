@@ -0,0 +1,215 @@
+"""
+Table health for tenant schemas: dead tuples, estimated bloat and stale planner
+statistics from pg_stat_user_tables, plus targeted ANALYZE / VACUUM for tables
+that cross a threshold.
+
+Autovacuum's thresholds are global, so with hundreds of small and large tenant
+schemas some tables are analyzed far too late, and partitioned parents are never
+analyzed by autovacuum at all. The bulk write paths (region sync, member import,
+archival) call analyze_after_bulk_write() so the planner sees their changes
+soon, and the GIN indexes (trigram and full-text search) have their pending
+lists merged instead of every search scanning them. Request handlers use
+analyze_in_background(), which leaves the work to a background thread once the
+request's transaction has committed.
+
+Everything works on the schema the connection is currently set to.
+"""
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection as default_connection
+
+from starterapp.admin_performance import estimated_row_count
+
+logger = logging.getLogger(__name__)
+
+# A table is ANALYZEd once this fraction of its rows changed since the last analyze
+ANALYZE_RATIO = getattr(settings, 'TABLE_HEALTH_ANALYZE_RATIO', 0.1)
+# and VACUUMed once this fraction of its tuples is dead
+VACUUM_RATIO = getattr(settings, 'TABLE_HEALTH_VACUUM_RATIO', 0.2)
+# Smaller tables are reported but never acted on
+MIN_ROWS = getattr(settings, 'TABLE_HEALTH_MIN_ROWS', 1000)
+
+
+@dataclass
+class TableHealth:
+    table: str
+    live_rows: int
+    dead_rows: int
+    modified_since_analyze: int
+    last_analyzed: Optional[datetime]
+    last_vacuumed: Optional[datetime]
+    size_bytes: int
+    # Parent table when this is a partition
+    parent: Optional[str] = None
+
+    @property
+    def dead_ratio(self):
+        total = self.live_rows + self.dead_rows
+        return self.dead_rows / total if total else 0.0
+
+    @property
+    def estimated_bloat_bytes(self):
+        # Dead tuples take roughly the space of live ones until VACUUM reclaims them
+        return int(self.size_bytes * self.dead_ratio)
+
+    @property
+    def stale_ratio(self):
+        if self.last_analyzed is None:
+            return 1.0 if self.live_rows + self.modified_since_analyze else 0.0
+        return self.modified_since_analyze / max(self.live_rows, 1)
+
+    def needed_action(self, analyze_ratio=ANALYZE_RATIO, vacuum_ratio=VACUUM_RATIO, min_rows=MIN_ROWS):
+        """'VACUUM', 'ANALYZE' or None. VACUUM (ANALYZE) covers both."""
+        if self.live_rows + self.dead_rows < min_rows:
+            return None
+        if self.dead_ratio >= vacuum_ratio:
+            return 'VACUUM'
+        if self.stale_ratio >= analyze_ratio:
+            return 'ANALYZE'
+        return None
+
+
+def table_health(connection=default_connection):
+    """Returns a TableHealth for every table of the current schema."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT s.relname, s.n_live_tup, s.n_dead_tup, s.n_mod_since_analyze, "
+            "GREATEST(s.last_analyze, s.last_autoanalyze), GREATEST(s.last_vacuum, s.last_autovacuum), "
+            "pg_total_relation_size(s.relid), parent.relname "
+            "FROM pg_stat_user_tables s "
+            "LEFT JOIN pg_inherits i ON i.inhrelid = s.relid "
+            "LEFT JOIN pg_class parent ON parent.oid = i.inhparent "
+            "WHERE s.schemaname = current_schema() "
+            "ORDER BY s.relname"
+        )
+        return [TableHealth(*row) for row in cursor.fetchall()]
+
+
+def maintain(tables=None, dry_run=False, connection=default_connection, **thresholds):
+    """
+    Runs VACUUM (ANALYZE) or ANALYZE on every table that needs it and returns
+    [(TableHealth, action)] for all tables, action being None where nothing was
+    needed. Partitioned parents whose partitions were touched are ANALYZEd as
+    well; autovacuum never does that for them.
+    """
+    tables = table_health(connection) if tables is None else tables
+    report = []
+    parents = set()
+    for health in tables:
+        action = health.needed_action(**thresholds)
+        report.append((health, action))
+        if action is None:
+            continue
+        if not dry_run:
+            run_maintenance(health.table, action, connection)
+        if health.parent:
+            parents.add(health.parent)
+    for parent in sorted(parents):
+        if not dry_run:
+            run_maintenance(parent, 'ANALYZE', connection)
+    return report
+
+
+def run_maintenance(table, action, connection=default_connection):
+    # VACUUM cannot run inside a transaction block; callers run in autocommit mode
+    statement = 'VACUUM (ANALYZE)' if action == 'VACUUM' else 'ANALYZE'
+    with connection.cursor() as cursor:
+        cursor.execute(f"{statement} {connection.ops.quote_name(table)}")
+
+
+def analyze_after_bulk_write(model, rows_written, ratio=ANALYZE_RATIO, connection=default_connection):
+    """
+    ANALYZEs model's table when rows_written is a significant share of its
+    estimated size, so queries right after a bulk write get fresh statistics,
+    and then cleans the pending lists of its GIN indexes. A table without an
+    estimate yet (never analyzed) is only analyzed for a write of at least
+    MIN_ROWS rows; smaller ones are left to autovacuum. Safe to call inside a
+    transaction: ANALYZE is transactional. Returns True if the table was
+    analyzed.
+    """
+    if not rows_written:
+        return False
+    estimated_rows = estimated_row_count(model, connection=connection)
+    if rows_written < (estimated_rows * ratio if estimated_rows else MIN_ROWS):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+    clean_gin_pending_lists(model, connection=connection)
+    return True
+
+
+# (schema, model label) -> (rows written, ratio) waiting for the background thread
+_pending = {}
+_pending_lock = threading.Lock()
+_queue = queue.Queue()
+_worker = None
+
+
+def analyze_in_background(model, rows_written, ratio=ANALYZE_RATIO, connection=default_connection):
+    """
+    analyze_after_bulk_write() for request handlers: once the current
+    transaction commits, a background thread of this process runs it on a
+    connection of its own, so the request does not wait for ANALYZE. Writes to
+    a table that is already queued are added to its count instead of queueing
+    it twice.
+    """
+    if not rows_written:
+        return
+    schema_name = connection.schema_name
+    connection.on_commit(lambda: _enqueue(schema_name, model._meta.label, rows_written, ratio))
+
+
+def _enqueue(schema_name, label, rows_written, ratio):
+    global _worker
+    key = (schema_name, label)
+    with _pending_lock:
+        queued = key in _pending
+        _pending[key] = (_pending.get(key, (0, ratio))[0] + rows_written, ratio)
+        if _worker is None:
+            _worker = threading.Thread(target=_analyze_pending, name='analyze-after-bulk-write', daemon=True)
+            _worker.start()
+    if not queued:
+        _queue.put(key)
+
+
+def _analyze_pending():
+    # default_connection is this thread's own connection
+    while True:
+        key = _queue.get()
+        with _pending_lock:
+            rows_written, ratio = _pending.pop(key)
+        schema_name, label = key
+        try:
+            default_connection.set_schema(schema_name)
+            analyze_after_bulk_write(apps.get_model(label), rows_written, ratio)
+        except Exception:
+            logger.exception('Background ANALYZE of %s in %s failed', label, schema_name)
+        finally:
+            if _queue.empty():
+                default_connection.close()
+
+
+def clean_gin_pending_lists(model, connection=default_connection):
+    """
+    Merges the pending lists of the GIN indexes of model's table, and of its
+    partitions, into the indexes. Fast updates append new entries to those
+    lists, which every search scans in full; only VACUUM and autoanalyze merge
+    them, not a plain ANALYZE. Returns the pending-list pages merged.
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(SUM(gin_clean_pending_list(i.indexrelid::regclass)), 0) FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid JOIN pg_am am ON am.oid = c.relam "
+            "WHERE am.amname = 'gin' AND c.relkind = 'i' AND (i.indrelid = to_regclass(%s) "
+            "OR i.indrelid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(%s)))",
+            [table, table],
+        )
+        return cursor.fetchone()[0]
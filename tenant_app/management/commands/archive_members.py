@@ -0,0 +1,49 @@
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name
+
+from tenant_app.partitioning import archive_members_before
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves members created before a cutoff out of the current tenant's member table, "
+        "into the member archive table or a gzipped CSV file. Whole partitions are "
+        "detached rather than deleted row by row. Run it through django-tenants, e.g. "
+        "`manage.py all_tenants_command archive_members --older-than-days 1095`."
+    )
+
+    def add_arguments(self, parser):
+        cutoff = parser.add_mutually_exclusive_group(required=True)
+        cutoff.add_argument('--before', help='Archive members created before this date (YYYY-MM-DD).')
+        cutoff.add_argument('--older-than-days', type=int, help='Archive members older than this many days.')
+        parser.add_argument(
+            '--to-file', metavar='DIR', default=None,
+            help='Write archived rows to DIR/<schema>_*.csv.gz instead of the archive table.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.schema_name == get_public_schema_name():
+            raise CommandError("Run this through tenant_command or all_tenants_command.")
+
+        if options['before']:
+            try:
+                day = datetime.strptime(options['before'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("--before must be a date in YYYY-MM-DD format.")
+            cutoff = timezone.make_aware(datetime.combine(day, time.min))
+        else:
+            cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+
+        destination = options['to_file']
+        if destination:
+            Path(destination).mkdir(parents=True, exist_ok=True)
+
+        archived = archive_members_before(cutoff, destination=destination)
+        self.stdout.write(
+            f"{connection.schema_name}: archived {archived} member(s) created before {cutoff:%Y-%m-%d %H:%M}"
+        )
@@ -0,0 +1,79 @@
+import random
+import statistics
+import time
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django_tenants.utils import get_public_schema_name
+
+from tenant_app.models import Member
+from tenant_app.search import SEARCH_PAGE_SIZE, search_members
+
+# Rows the admin change list shows per page
+ADMIN_PAGE_SIZE = 100
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks member search on the current tenant's members: the ranked full-text "
+        "search behind GET /members/search against the admin's icontains search over name, "
+        "email and phone, on name and email fragments sampled from the table, and reports "
+        "the latency of a first page of results. Run it through django-tenants, e.g. "
+        "`manage.py tenant_command bench_search --schema tenant1`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=200, help='Search terms sampled from the members.')
+        parser.add_argument('--prefix-length', type=int, default=4, help='Characters of each sampled word searched for.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if connection.schema_name == get_public_schema_name():
+            raise CommandError("Run this through tenant_command.")
+
+        terms = sample_terms(options['queries'], options['prefix_length'], random.Random(options['seed']))
+        if not terms:
+            raise CommandError(f"{connection.schema_name} has no members to search.")
+        member_admin = admin.site._registry[Member]
+
+        def admin_search(term):
+            # What the change list runs for its first page, newest first
+            queryset, _ = member_admin.get_search_results(None, Member.objects.all(), term)
+            list(queryset.order_by('-pk')[:ADMIN_PAGE_SIZE])
+
+        def full_text(term):
+            search_members(term, limit=SEARCH_PAGE_SIZE)
+
+        self.stdout.write(f"{connection.schema_name}: {len(terms)} terms")
+        self.stdout.write(f"{'':>10}{'median':>12}{'p95':>12}{'max':>12}")
+        for label, search in (('admin', admin_search), ('full-text', full_text)):
+            timings = []
+            for term in terms:
+                started = time.perf_counter()
+                search(term)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            self.stdout.write(
+                f"{label:>10}{statistics.median(timings) * 1000:9.2f} ms{p95 * 1000:9.2f} ms{timings[-1] * 1000:9.2f} ms"
+            )
+
+
+def sample_terms(count, prefix_length, rng):
+    """
+    Prefixes of a word of the name or of the email's local part of members
+    picked at random ids; at most count of them.
+    """
+    bounds = Member.objects.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return []
+    terms = []
+    for _ in range(count):
+        member = Member.objects.filter(id__gte=rng.randint(bounds['low'], bounds['high'])).order_by('id').first()
+        words = member.name.split() + ([member.email.partition('@')[0]] if member.email else [])
+        word = rng.choice(words) if words else ''
+        if len(word) >= 2:
+            terms.append(word[:prefix_length])
+    return terms
@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django_multitenant.utils import set_current_tenant, unset_current_tenant
+
+from tenant_app.models import Member, Region
+
+# Work done per API call that goes through django_multitenant; none of it runs SQL
+OPERATIONS = {
+    'filter + compile': lambda: _compile(Member.objects.filter(name='Jane')),
+    'join + compile': lambda: _compile(Member.objects.select_related('region').filter(region__name='North')),
+    'instantiate': lambda: Member(id=1, name='Jane', email='jane@example.com', phone='555', region_id=1),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the query-building cost of django_multitenant's row-level layer "
+        "(manager filter injection, join restrictions, per-attribute checks) against "
+        "TENANT_SCHEMA_ONLY, where the schema is the only isolation. No database is needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        count = options['iterations']
+        results = {}
+        for label, schema_only in (('row + schema', False), ('schema only', True)):
+            with override_settings(TENANT_SCHEMA_ONLY=schema_only):
+                if not schema_only:
+                    # What scope_to_region() sets for a region-scoped API call
+                    set_current_tenant(Region(id=1))
+                try:
+                    results[label] = {name: _time(operation, count) for name, operation in OPERATIONS.items()}
+                    if options['verbosity'] > 1:
+                        self.stdout.write(f"{label}: {_compile(Member.objects.select_related('region'))[0]}")
+                finally:
+                    unset_current_tenant()
+
+        self.stdout.write(f"{'':>18}{'row + schema':>16}{'schema only':>16}{'saved':>12}")
+        for name in OPERATIONS:
+            row, schema = results['row + schema'][name], results['schema only'][name]
+            self.stdout.write(
+                f"{name:>18}{row * 1e6:13.2f} us{schema * 1e6:13.2f} us{(row - schema) / row * 100 if row else 0:11.0f}%"
+            )
+
+
+def _compile(queryset):
+    return queryset.query.get_compiler(using=queryset.db).as_sql()
+
+
+def _time(operation, count):
+    operation()
+    start = time.perf_counter()
+    for _ in range(count):
+        operation()
+    return (time.perf_counter() - start) / count
@@ -0,0 +1,46 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name
+
+from tenant_app.history import HISTORY_BATCH_SIZE, compact_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Folds the current tenant's member and region history entries older than a cutoff "
+        "into one entry per object, holding its state at that point; newer entries are kept "
+        "as they are. Run it through django-tenants, e.g. "
+        "`manage.py all_tenants_command compact_history --older-than-days 365`."
+    )
+
+    def add_arguments(self, parser):
+        cutoff = parser.add_mutually_exclusive_group(required=True)
+        cutoff.add_argument('--before', help='Compact entries written before this date (YYYY-MM-DD).')
+        cutoff.add_argument('--older-than-days', type=int, help='Compact entries older than this many days.')
+        parser.add_argument(
+            '--purge-deleted', action='store_true',
+            help='Also drop the whole history of objects deleted before the cutoff.',
+        )
+        parser.add_argument('--batch-size', type=int, default=HISTORY_BATCH_SIZE, help='Objects compacted per transaction.')
+
+    def handle(self, *args, **options):
+        if connection.schema_name == get_public_schema_name():
+            raise CommandError("Run this through tenant_command or all_tenants_command.")
+
+        if options['before']:
+            try:
+                day = datetime.strptime(options['before'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError("--before must be a date in YYYY-MM-DD format.")
+            cutoff = timezone.make_aware(datetime.combine(day, time.min))
+        else:
+            cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+
+        removed = compact_history(cutoff, purge_deleted=options['purge_deleted'], batch_size=options['batch_size'])
+        self.stdout.write(
+            f"{connection.schema_name}: removed {removed} history entr{'y' if removed == 1 else 'ies'} "
+            f"written before {cutoff:%Y-%m-%d %H:%M}"
+        )
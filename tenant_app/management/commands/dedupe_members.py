@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django_tenants.utils import get_public_schema_name
+
+from tenant_app.dedupe import DEDUPE_BATCH_SIZE, MAX_BLOCK_SIZE, MIN_SCORE, find_duplicates
+
+
+class Command(BaseCommand):
+    help = (
+        "Finds likely duplicate members in the current tenant and records them as "
+        "DuplicateCandidate pairs. Only members created since the last run, and members "
+        "whose name, email or phone changed since (per their history), are keyed and "
+        "compared. Run it through django-tenants, e.g. "
+        "`manage.py all_tenants_command dedupe_members`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEDUPE_BATCH_SIZE, help='Members per transaction.')
+        parser.add_argument('--min-score', type=float, default=MIN_SCORE, help='Lowest score recorded as a candidate.')
+        parser.add_argument('--max-block-size', type=int, default=MAX_BLOCK_SIZE,
+                            help='Skip blocking keys shared by more members than this.')
+        parser.add_argument('--rebuild', action='store_true', help='Forget previous runs and process every member.')
+
+    def handle(self, *args, **options):
+        if connection.schema_name == get_public_schema_name():
+            raise CommandError("Run this through tenant_command or all_tenants_command.")
+
+        def progress(result):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  {result.members} members, {result.candidates} candidates so far")
+
+        result = find_duplicates(
+            batch_size=options['batch_size'], min_score=options['min_score'],
+            max_block_size=options['max_block_size'], rebuild=options['rebuild'], progress=progress,
+        )
+        self.stdout.write(
+            f"{connection.schema_name}: keyed {result.members} new and {result.rekeyed} changed member(s), compared {result.compared} "
+            f"pair(s), recorded {result.candidates} candidate(s) in {result.seconds:.1f}s"
+        )
@@ -0,0 +1,57 @@
+import gzip
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django_tenants.utils import get_public_schema_name
+
+from tenant_app.importer import IMPORT_BATCH_SIZE, IMPORT_FORMATS, import_members
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports members from a CSV or NDJSON enrollment file (optionally gzipped) "
+        "with COPY into a staging table and a single MERGE into the member table. "
+        "Run it through django-tenants, e.g. "
+        "`manage.py tenant_command import_members --schema tenant1 members.csv`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or NDJSON file; .gz is decompressed.')
+        parser.add_argument('--format', choices=IMPORT_FORMATS, default=None,
+                            help='Defaults to ndjson for .ndjson/.jsonl files and csv otherwise.')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--rejects', metavar='PATH', default=None,
+                            help='Write every rejected row (line, error, record) to this CSV file.')
+
+    def handle(self, *args, **options):
+        if connection.schema_name == get_public_schema_name():
+            raise CommandError("Run this through tenant_command or all_tenants_command.")
+        if connection.schema_name == settings.TENANT_POOL_SCHEMA:
+            # all_tenants_command visits the pool schema too; its rows need client keys
+            raise CommandError("Pooled tenants cannot bulk import; promote the tenant first.")
+
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist.")
+        suffixes = [suffix.lower() for suffix in path.suffixes]
+        format = options['format'] or ('ndjson' if {'.ndjson', '.jsonl'} & set(suffixes) else 'csv')
+        opener = gzip.open if suffixes[-1:] == ['.gz'] else open
+
+        with opener(path, 'rt', encoding='utf-8-sig', newline='') as lines:
+            if options['rejects']:
+                with open(options['rejects'], 'w', newline='') as rejects_file:
+                    result = import_members(lines, format, options['batch_size'], rejects_file=rejects_file)
+            else:
+                result = import_members(lines, format, options['batch_size'])
+
+        processed = result.inserted + result.updated + result.rejected
+        self.stdout.write(
+            f"{connection.schema_name}: {result.inserted} inserted, {result.updated} updated, "
+            f"{result.rejected} rejected in {result.seconds:.2f}s "
+            f"({processed / result.seconds if result.seconds else 0:.0f} rows/s)"
+        )
+        if result.rejected and not options['rejects']:
+            for line, error in result.rejected_rows:
+                self.stdout.write(f"  line {line}: {error}")
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django_tenants.utils import get_public_schema_name
+
+from tenant_app.partitioning import ensure_member_partitions, partition_member_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Range-partitions the current tenant's member table by created_at and creates "
+        "upcoming monthly partitions. Run it through django-tenants, e.g. "
+        "`manage.py all_tenants_command partition_members`. Rerun it monthly to keep "
+        "partitions ahead of the calendar; rows past the last one go to a DEFAULT "
+        "partition and move into their month's partition once it is created."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=3,
+            help='Monthly partitions to keep created beyond the current month.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.schema_name == get_public_schema_name():
+            raise CommandError("Run this through tenant_command or all_tenants_command.")
+
+        if partition_member_table(months_ahead=options['months_ahead']):
+            self.stdout.write(f"{connection.schema_name}: member table converted to a partitioned table")
+        created = ensure_member_partitions(months_ahead=options['months_ahead'])
+        self.stdout.write(f"{connection.schema_name}: {len(created)} partition(s) created {', '.join(created)}".rstrip())
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:06
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenant_app', '0003_alter_member_managers_alter_region_managers'),
+    ]
+
+    operations = [
+        # Installed once into public (which is on every tenant's search_path) so that
+        # gin_trgm_ops resolves in each tenant schema this migration runs in.
+        migrations.RunSQL(
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='member_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('email'), name='gin_trgm_ops'), name='member_email_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('phone'), name='gin_trgm_ops'), name='member_phone_trgm'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def partition_members(apps, schema_editor):
+    # Runs once per tenant schema under migrate_schemas; opt-in because the
+    # conversion takes an exclusive lock on the member table
+    if getattr(settings, 'TENANT_MEMBER_PARTITIONING', False):
+        from tenant_app.partitioning import partition_member_table
+        partition_member_table(connection=schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenant_app', '0004_member_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedMember',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('email', models.TextField(blank=True)),
+                ('phone', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField()),
+                ('region_id', models.BigIntegerField(db_index=True)),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'tenant_app_member_archive',
+            },
+        ),
+        # Archived rows are written once and rarely read: compress anything past 128 bytes
+        migrations.RunSQL(
+            "ALTER TABLE tenant_app_member_archive SET (toast_tuple_target = 128)",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunPython(partition_members, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:19
+
+from django.db import migrations
+import tenant_app.tenancy
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenant_app', '0005_member_archive'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='member',
+            managers=[
+                ('objects', tenant_app.tenancy.SchemaAwareTenantManager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='region',
+            managers=[
+                ('objects', tenant_app.tenancy.SchemaAwareTenantManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenant_app', '0006_schema_aware_tenancy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DedupeState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_member_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('member_id', models.BigIntegerField()),
+                ('other_id', models.BigIntegerField()),
+                ('score', models.FloatField()),
+                ('matched_on', models.CharField(max_length=32)),
+                ('found_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-score'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MemberBlockKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('member_id', models.BigIntegerField()),
+                ('kind', models.CharField(max_length=8)),
+                ('key', models.CharField(max_length=255)),
+            ],
+            options={
+                'db_table': 'tenant_app_member_block_key',
+                'indexes': [models.Index(fields=['kind', 'key', 'member_id'], name='member_block_key_lookup')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='memberblockkey',
+            constraint=models.UniqueConstraint(fields=('member_id', 'kind', 'key'), name='member_block_key_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='duplicatecandidate',
+            constraint=models.UniqueConstraint(fields=('member_id', 'other_id'), name='duplicate_candidate_pair'),
+        ),
+    ]
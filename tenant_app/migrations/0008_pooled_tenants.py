@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:47
+
+from django.db import migrations, models
+import tenant_app.tenancy
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenant_app', '0007_member_dedupe'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='archivedmember',
+            managers=[
+                ('objects', tenant_app.tenancy.PooledManager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='duplicatecandidate',
+            managers=[
+                ('objects', tenant_app.tenancy.PooledManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archivedmember',
+            name='client_key',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='duplicatecandidate',
+            name='client_key',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='client_key',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='client_key',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='archivedmember',
+            index=models.Index(condition=models.Q(('client_key__isnull', False)), fields=['client_key'], name='member_archive_client_key'),
+        ),
+        migrations.AddIndex(
+            model_name='duplicatecandidate',
+            index=models.Index(condition=models.Q(('client_key__isnull', False)), fields=['client_key'], name='duplicate_candidate_client_key'),
+        ),
+        migrations.AddIndex(
+            model_name='member',
+            index=models.Index(condition=models.Q(('client_key__isnull', False)), fields=['client_key'], name='member_client_key'),
+        ),
+        migrations.AddIndex(
+            model_name='region',
+            index=models.Index(condition=models.Q(('client_key__isnull', False)), fields=['client_key'], name='region_client_key'),
+        ),
+    ]
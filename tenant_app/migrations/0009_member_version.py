@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenant_app', '0008_pooled_tenants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedmember',
+            name='version',
+            field=models.IntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='member',
+            name='version',
+            field=models.IntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:00
+
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+import django.utils.timezone
+import tenant_app.tenancy
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenant_app', '0009_member_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoryEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_key', models.BigIntegerField(blank=True, editable=False, null=True)),
+                ('entity', models.CharField(max_length=8)),
+                ('object_id', models.BigIntegerField()),
+                ('region_id', models.BigIntegerField()),
+                ('action', models.CharField(max_length=8)),
+                ('changes', models.JSONField(default=dict)),
+                ('version', models.IntegerField(blank=True, null=True)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name_plural': 'history entries',
+                'db_table': 'tenant_app_history',
+                'indexes': [models.Index(fields=['entity', 'object_id', 'id'], name='history_object'), django.contrib.postgres.indexes.BrinIndex(fields=['changed_at'], name='history_changed_at'), models.Index(condition=models.Q(('client_key__isnull', False)), fields=['client_key'], name='history_client_key')],
+            },
+            managers=[
+                ('objects', tenant_app.tenancy.PooledManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,110 @@
+# Generated by Django 4.2.30 on 2026-10-19 06:12
+
+from django.db import migrations, transaction
+
+
+def search_document(row=''):
+    # The name (weight A), the email split at its punctuation (B) and the phone
+    # digits (C); row prefixes the column names, e.g. 'NEW.' in the trigger
+    return (
+        f"setweight(to_tsvector('simple'::regconfig, {row}name), 'A') || "
+        f"setweight(to_tsvector('simple'::regconfig, translate({row}email, '@.+_-', '     ')), 'B') || "
+        f"setweight(to_tsvector('simple'::regconfig, regexp_replace({row}phone, '\\D', '', 'g')), 'C')"
+    )
+
+# Rows filled in per transaction by the backfill
+BACKFILL_BATCH_SIZE = 10_000
+
+
+def backfill_search(apps, schema_editor):
+    """Fills search for the existing rows, one short transaction per id range."""
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT min(id), max(id) FROM tenant_app_member")
+        low, high = cursor.fetchone()
+        if low is None:
+            return
+        for start in range(low, high + 1, BACKFILL_BATCH_SIZE):
+            with transaction.atomic(using=connection.alias):
+                cursor.execute(
+                    f"UPDATE tenant_app_member SET search = {search_document()} "
+                    f"WHERE id >= %s AND id < %s AND search IS NULL",
+                    [start, start + BACKFILL_BATCH_SIZE],
+                )
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Builds the GIN index without blocking writes. A partitioned member table (see
+    tenant_app.partitioning) cannot be indexed concurrently, so each partition is,
+    and the indexes are then attached to one created on the parent alone.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        # Left behind, invalid, by an interrupted run
+        cursor.execute(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relnamespace = to_regnamespace(current_schema()) AND NOT i.indisvalid "
+            "AND (c.relname = 'member_search' OR c.relname LIKE 'tenant\\_app\\_member%\\_search')"
+        )
+        for (name,) in cursor.fetchall():
+            cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+
+        cursor.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('tenant_app_member')")
+        if not cursor.fetchone()[0]:
+            cursor.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS member_search ON tenant_app_member USING gin (search)")
+            return
+        cursor.execute("CREATE INDEX IF NOT EXISTS member_search ON ONLY tenant_app_member USING gin (search)")
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass('tenant_app_member') ORDER BY c.relname"
+        )
+        for (partition,) in cursor.fetchall():
+            index = f'{partition[:50]}_search'
+            cursor.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{index}" ON "{partition}" USING gin (search)')
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(%s))", [index])
+            if not cursor.fetchone()[0]:
+                cursor.execute(f'ALTER INDEX member_search ATTACH PARTITION "{index}"')
+
+
+def drop_search_index(apps, schema_editor):
+    # Takes the partitions' indexes with it
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS member_search")
+
+
+class Migration(migrations.Migration):
+    # A GENERATED ... STORED column would rewrite the whole member table under an
+    # ACCESS EXCLUSIVE lock, and a plain CREATE INDEX blocks writes while it builds.
+    # Instead, the column is added empty (a catalog change only) and kept current by
+    # a trigger, the existing rows are filled in batches, and the index is built
+    # concurrently, which cannot happen inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('tenant_app', '0010_history'),
+    ]
+
+    operations = [
+        # Django 4.2 has no field for a column maintained by the database, so the
+        # column, its trigger and its index are not part of the model state; see
+        # tenant_app.search.
+        migrations.RunSQL(
+            "ALTER TABLE tenant_app_member ADD COLUMN search tsvector",
+            reverse_sql="ALTER TABLE tenant_app_member DROP COLUMN search",
+        ),
+        migrations.RunSQL(
+            [
+                "CREATE FUNCTION tenant_app_member_search() RETURNS trigger LANGUAGE plpgsql AS $$ "
+                f"BEGIN NEW.search := {search_document('NEW.')}; RETURN NEW; END $$",
+                # Also fires for COPY and MERGE
+                "CREATE TRIGGER member_search BEFORE INSERT OR UPDATE OF name, email, phone "
+                "ON tenant_app_member FOR EACH ROW EXECUTE FUNCTION tenant_app_member_search()",
+            ],
+            reverse_sql=[
+                "DROP TRIGGER member_search ON tenant_app_member",
+                "DROP FUNCTION tenant_app_member_search()",
+            ],
+        ),
+        migrations.RunPython(backfill_search, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenant_app', '0011_member_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dedupestate',
+            name='last_history_id',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
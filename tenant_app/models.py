@@ -1,22 +1,152 @@
+from django.contrib.postgres.indexes import BrinIndex, GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 
-from django_multitenant.models import TenantModel
-from django_multitenant.fields import TenantForeignKey
-from django_multitenant.mixins import *
+from .tenancy import PooledModel, SchemaAwareTenantForeignKey, SchemaAwareTenantModel
 
 
-class Region(TenantModel):
+def client_key_index(name):
+    """Index on client_key for the pool schema; empty, and so free, in dedicated schemas."""
+    return models.Index(fields=['client_key'], condition=models.Q(client_key__isnull=False), name=name)
+
+
+class Region(SchemaAwareTenantModel):
     tenant_id = 'id'
     name = models.CharField(max_length=100)
 
+    class Meta:
+        indexes = [client_key_index('region_client_key')]
+
 
-class Member(TenantModel):
+class Member(SchemaAwareTenantModel):
     tenant_id = 'region_id'
     name = models.CharField(max_length=100)
     email = models.TextField(blank=True)
     phone = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    region = TenantForeignKey(Region, on_delete=models.CASCADE)
+    region = SchemaAwareTenantForeignKey(Region, on_delete=models.CASCADE)
+    # Bumped by every update; PATCH only applies on top of the version the client read
+    version = models.IntegerField(default=1)
 
     class Meta:
         unique_together = ['id', 'region']
+        indexes = [
+            # Trigram indexes on the UPPER() expression that icontains (admin search) compiles to
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='member_name_trgm'),
+            GinIndex(OpClass(Upper('email'), name='gin_trgm_ops'), name='member_email_trgm'),
+            GinIndex(OpClass(Upper('phone'), name='gin_trgm_ops'), name='member_phone_trgm'),
+            client_key_index('member_client_key'),
+        ]
+        # The table also has a tsvector column, search, kept current by a trigger and
+        # with a GIN index (member_search), created by migration 0011; see tenant_app.search
+
+    def save(self, *args, **kwargs):
+        # Updates through the ORM (the admin, scripts) bump the version like PATCH does,
+        # in the UPDATE itself so concurrent writers never reuse a version
+        if not self._state.adding:
+            self.version = models.F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        if isinstance(self.version, models.expressions.Combinable):
+            self.refresh_from_db(fields=['version'])
+
+
+class ArchivedMember(PooledModel):
+    """
+    Members moved out of the Member table by `manage.py archive_members`. Rows keep
+    their original id, region_id and client_key; the region itself may have been
+    deleted since.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=100)
+    email = models.TextField(blank=True)
+    phone = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    region_id = models.BigIntegerField(db_index=True)
+    version = models.IntegerField(default=1)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'tenant_app_member_archive'
+        indexes = [client_key_index('member_archive_client_key')]
+
+
+class MemberBlockKey(models.Model):
+    """
+    Blocking keys of a member for deduplication (see tenant_app.dedupe): only
+    members sharing a key are ever compared. member_id is not a foreign key, so
+    the member table can be partitioned or archived independently.
+    """
+    member_id = models.BigIntegerField()
+    # 'email', 'phone' or 'name'
+    kind = models.CharField(max_length=8)
+    key = models.CharField(max_length=255)
+
+    class Meta:
+        db_table = 'tenant_app_member_block_key'
+        indexes = [models.Index(fields=['kind', 'key', 'member_id'], name='member_block_key_lookup')]
+        constraints = [
+            models.UniqueConstraint(fields=['member_id', 'kind', 'key'], name='member_block_key_unique'),
+        ]
+
+
+class DuplicateCandidate(PooledModel):
+    """A pair of members that probably are the same person; member_id < other_id."""
+    member_id = models.BigIntegerField()
+    other_id = models.BigIntegerField()
+    score = models.FloatField()
+    # Comma-separated kinds of the blocking keys the pair shares
+    matched_on = models.CharField(max_length=32)
+    found_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-score']
+        indexes = [client_key_index('duplicate_candidate_client_key')]
+        constraints = [
+            models.UniqueConstraint(fields=['member_id', 'other_id'], name='duplicate_candidate_pair'),
+        ]
+
+    def __str__(self):
+        return f'{self.member_id} ~ {self.other_id} ({self.score:.2f})'
+
+
+class DedupeState(models.Model):
+    """
+    Single row: the highest member id whose blocking keys have been computed,
+    and the highest history entry id whose member changes have been re-keyed.
+    """
+    last_member_id = models.BigIntegerField(default=0)
+    last_history_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class HistoryEntry(PooledModel):
+    """
+    One change to a member or region (see tenant_app.history): the new values of
+    the fields it changed, or the whole object for a create or a compacted
+    snapshot. Rows are only appended, except by `manage.py compact_history`.
+    object_id is not a foreign key, so history outlives the object.
+    """
+    # 'member' or 'region'
+    entity = models.CharField(max_length=8)
+    object_id = models.BigIntegerField()
+    region_id = models.BigIntegerField()
+    # 'create', 'update', 'delete' or 'snapshot'
+    action = models.CharField(max_length=8)
+    changes = models.JSONField(default=dict)
+    # Member.version after the change
+    version = models.IntegerField(null=True, blank=True)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'tenant_app_history'
+        verbose_name_plural = 'history entries'
+        indexes = [
+            # An object's history in order, paged by id
+            models.Index(fields=['entity', 'object_id', 'id'], name='history_object'),
+            # Rows are appended in time order, so a BRIN index is tiny and enough for compaction
+            BrinIndex(fields=['changed_at'], name='history_changed_at'),
+            client_key_index('history_client_key'),
+        ]
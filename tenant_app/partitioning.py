@@ -0,0 +1,326 @@
+"""
+Range partitioning of the tenant Member table by created_at, and archival of old
+members into ArchivedMember (or a gzipped CSV file).
+
+Every function works on the schema the connection is currently set to, so callers
+either run inside a tenant migration or wrap the call in tenant_context().
+"""
+import gzip
+import re
+
+from django.db import connection as default_connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .maintenance import analyze_after_bulk_write
+from .models import ArchivedMember, Member
+from .search import SEARCH_COLUMN
+
+MEMBER_TABLE = Member._meta.db_table
+ARCHIVE_TABLE = ArchivedMember._meta.db_table
+# Holds every row that existed when the table was converted
+LEGACY_PARTITION = f'{MEMBER_TABLE}_legacy'
+PARTITION_PREFIX = f'{MEMBER_TABLE}_p'
+# Takes the rows no monthly partition covers yet, so inserts never fail for want of one
+DEFAULT_PARTITION = f'{MEMBER_TABLE}_default'
+# Marks a partition detached for archival, so an interrupted run can finish it
+DETACHED_COMMENT = 'tenant_app: detached for archival'
+# Columns copied into the archive; archived_at is filled in by the move itself.
+# client_key keeps archived rows of the pool schema with their pooled tenant.
+ARCHIVE_COLUMNS = ('id', 'name', 'email', 'phone', 'created_at', 'region_id', 'version', 'client_key')
+
+_UPPER_BOUND = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return value.replace(year=value.year + month // 12, month=month % 12 + 1)
+
+
+def monthly_ranges(start, count):
+    """Returns (partition_name, lower, upper) for count months beginning with start's month."""
+    lower = month_start(start)
+    ranges = []
+    for _ in range(count):
+        upper = add_months(lower, 1)
+        ranges.append((f'{PARTITION_PREFIX}{lower:%Y_%m}', lower, upper))
+        lower = upper
+    return ranges
+
+
+def is_partitioned(connection=default_connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(%s)",
+            [MEMBER_TABLE],
+        )
+        row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def member_partitions(connection=default_connection):
+    """Returns [(partition_name, upper_bound)] for the attached partitions, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [MEMBER_TABLE],
+        )
+        rows = cursor.fetchall()
+    partitions = []
+    for name, bound in rows:
+        match = _UPPER_BOUND.search(bound or '')
+        partitions.append((name, parse_datetime(match.group(1)) if match else None))
+    return sorted(partitions, key=lambda p: (p[1] is None, p[1] or timezone.now()))
+
+
+def partition_member_table(months_ahead=3, connection=default_connection):
+    """
+    Converts the Member table of the current schema into a table partitioned by
+    RANGE (created_at). The existing table is kept as-is and attached as the
+    partition for everything up to the end of the month of its newest row (see
+    legacy_upper_bound), so no rows are copied; monthly partitions are created
+    from there onward.
+
+    PostgreSQL requires unique constraints of a partitioned table to include the
+    partition key, so the parent's primary key becomes (id, created_at). Ids still
+    come from a single sequence and stay unique. For the same reason the model's
+    unique_together (id, region) cannot be put back on the parent; every partition
+    gets it as a unique index instead, and the legacy partition keeps its own.
+    Rows past the last monthly partition go to a DEFAULT partition. Row triggers
+    (the search trigger of migration 0011) move to the parent, which applies them
+    to every partition.
+    """
+    if is_partitioned(connection):
+        return False
+
+    quote = connection.ops.quote_name
+    member, legacy = quote(MEMBER_TABLE), quote(LEGACY_PARTITION)
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {member} IN ACCESS EXCLUSIVE MODE")
+        # Read under the lock, so no row past the bound can arrive before the attach
+        cursor.execute(f"SELECT max(created_at) FROM {member}")
+        boundary = legacy_upper_bound(cursor.fetchone()[0])
+        cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id'))", [MEMBER_TABLE])
+        next_id = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s",
+            [MEMBER_TABLE],
+        )
+        indexes = cursor.fetchall()
+
+        cursor.execute(
+            "SELECT tgname, pg_get_triggerdef(oid) FROM pg_trigger WHERE tgrelid = to_regclass(%s) AND NOT tgisinternal",
+            [MEMBER_TABLE],
+        )
+        triggers = cursor.fetchall()
+
+        cursor.execute(f"ALTER TABLE {member} RENAME TO {legacy}")
+        # Index names are unique per schema, so the legacy table's indexes (its primary
+        # key included) move out of the way before the parent takes over the names
+        for name, _ in indexes:
+            cursor.execute(f"ALTER INDEX {quote(name)} RENAME TO {quote(name[:50] + '_legacy')}")
+
+        cursor.execute(
+            f"CREATE TABLE {member} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING IDENTITY "
+            f"INCLUDING GENERATED INCLUDING STORAGE INCLUDING COMPRESSION) "
+            f"PARTITION BY RANGE (created_at)"
+        )
+        # Ids keep coming from one sequence owned by the new parent
+        cursor.execute(f"ALTER TABLE {legacy} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+        cursor.execute(f"ALTER TABLE {legacy} ALTER COLUMN id DROP DEFAULT")
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, false)",
+            [MEMBER_TABLE, next_id],
+        )
+        cursor.execute(f"ALTER TABLE {member} ADD PRIMARY KEY (id, created_at)")
+        cursor.execute(
+            f"ALTER TABLE {member} ADD FOREIGN KEY (region_id) "
+            f"REFERENCES {quote(Member._meta.get_field('region').related_model._meta.db_table)} (id) "
+            f"DEFERRABLE INITIALLY DEFERRED"
+        )
+        # Recreate the non-unique indexes on the parent. ATTACH PARTITION adopts the
+        # matching indexes that already exist on the legacy table instead of rebuilding.
+        for name, definition in indexes:
+            if not definition.startswith('CREATE UNIQUE'):
+                cursor.execute(re.sub(r' ON (ONLY )?\S+ USING ', f' ON {member} USING ', definition))
+        # Attaching clones the parent's triggers onto the legacy table, under the same names
+        for name, definition in triggers:
+            cursor.execute(f"DROP TRIGGER {quote(name)} ON {legacy}")
+            cursor.execute(re.sub(r' ON \S+ FOR EACH ', f' ON {member} FOR EACH ', definition))
+
+        cursor.execute(
+            f"ALTER TABLE {member} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO (%s)",
+            [boundary],
+        )
+        _create_partition(cursor, DEFAULT_PARTITION, 'DEFAULT', [], connection)
+    ensure_member_partitions(months_ahead, connection=connection)
+    return True
+
+
+def legacy_upper_bound(newest, now=None):
+    """
+    Upper bound of the legacy partition for a table whose newest row was created
+    at newest: the month after that row's, and no earlier than the current month.
+    """
+    boundary = month_start(now or timezone.now())
+    if newest is not None:
+        boundary = max(boundary, add_months(month_start(newest), 1))
+    return boundary
+
+
+def ensure_member_partitions(months_ahead=3, connection=default_connection):
+    """
+    Creates any missing monthly partitions from the current month to months_ahead,
+    and the DEFAULT partition; months the legacy partition already covers are
+    skipped. Rows of a new month that already landed in the
+    DEFAULT partition are moved into the month's partition.
+    """
+    if not is_partitioned(connection):
+        return []
+    quote = connection.ops.quote_name
+    member, default = quote(MEMBER_TABLE), quote(DEFAULT_PARTITION)
+    partitions = member_partitions(connection)
+    existing = {name for name, _ in partitions}
+    # The DEFAULT partition has no upper bound
+    covered = max((upper for _, upper in partitions if upper is not None), default=None)
+    created = []
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if DEFAULT_PARTITION not in existing:
+            _create_partition(cursor, DEFAULT_PARTITION, 'DEFAULT', [], connection)
+            existing.add(DEFAULT_PARTITION)
+            created.append(DEFAULT_PARTITION)
+        for name, lower, upper in monthly_ranges(timezone.now(), months_ahead + 1):
+            if name in existing or (covered is not None and lower < covered):
+                continue
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= %s AND created_at < %s)", [lower, upper]
+            )
+            if not cursor.fetchone()[0]:
+                _create_partition(cursor, name, 'FOR VALUES FROM (%s) TO (%s)', [lower, upper], connection)
+            else:
+                # The new range may not overlap rows of the DEFAULT partition, so they
+                # move into a plain table first, which is then attached. It has no
+                # triggers until then, so search (see tenant_app.search) moves with them.
+                columns = ', '.join(
+                    [*(quote(field.column) for field in Member._meta.concrete_fields), quote(SEARCH_COLUMN)]
+                )
+                cursor.execute(f"CREATE TABLE {quote(name)} (LIKE {member} INCLUDING DEFAULTS INCLUDING GENERATED)")
+                cursor.execute(
+                    f"WITH moved AS (DELETE FROM {default} WHERE created_at >= %s AND created_at < %s "
+                    f"RETURNING {columns}) INSERT INTO {quote(name)} ({columns}) SELECT {columns} FROM moved",
+                    [lower, upper],
+                )
+                _create_unique_index(cursor, name, connection)
+                cursor.execute(
+                    f"ALTER TABLE {member} ATTACH PARTITION {quote(name)} FOR VALUES FROM (%s) TO (%s)", [lower, upper]
+                )
+            created.append(name)
+    return created
+
+
+def _create_partition(cursor, name, bound, params, connection):
+    quote = connection.ops.quote_name
+    cursor.execute(f"CREATE TABLE {quote(name)} PARTITION OF {quote(MEMBER_TABLE)} {bound}", params)
+    _create_unique_index(cursor, name, connection)
+
+
+def _create_unique_index(cursor, name, connection):
+    """Member's unique_together (id, region), which the partitioned parent cannot hold."""
+    quote = connection.ops.quote_name
+    cursor.execute(f"CREATE UNIQUE INDEX {quote(name[:50] + '_id_region')} ON {quote(name)} (id, region_id)")
+
+
+def archive_members_before(cutoff, destination=None, connection=default_connection):
+    """
+    Moves members created before cutoff out of the Member table.
+
+    Whole partitions that end on or before cutoff are detached and moved as a
+    unit; rows older than cutoff in the remaining partition (or in an unpartitioned
+    table) are moved with a single DELETE ... RETURNING. Rows go to ArchivedMember,
+    or, when destination is a path, to a gzipped CSV file. Both tables are
+    ANALYZEd afterwards when the move changed a large share of them.
+
+    Returns the number of rows archived.
+    """
+    quote = connection.ops.quote_name
+    archived = 0
+
+    if is_partitioned(connection):
+        for name, upper in member_partitions(connection):
+            if upper is None or upper > cutoff:
+                continue
+            # Detach in its own short transaction; the copy below no longer blocks the parent
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {quote(MEMBER_TABLE)} DETACH PARTITION {quote(name)}")
+                cursor.execute(f"COMMENT ON TABLE {quote(name)} IS %s", [DETACHED_COMMENT])
+            archived += _archive_detached(name, destination, connection)
+
+    # Leftovers from a previous run that was interrupted after the detach
+    for name in _detached_partitions(connection):
+        archived += _archive_detached(name, destination, connection)
+
+    columns = ', '.join(quote(column) for column in ARCHIVE_COLUMNS)
+    where = "created_at < %s"
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if destination:
+            archived += _copy_to_file(cursor, f"SELECT {columns} FROM {quote(MEMBER_TABLE)} WHERE created_at < %s",
+                                      [cutoff], destination, 'remainder', connection)
+            cursor.execute(f"DELETE FROM {quote(MEMBER_TABLE)} WHERE {where}", [cutoff])
+        else:
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {quote(MEMBER_TABLE)} WHERE {where} RETURNING {columns}) "
+                f"INSERT INTO {quote(ARCHIVE_TABLE)} ({columns}, archived_at) "
+                f"SELECT {columns}, now() FROM moved",
+                [cutoff],
+            )
+            archived += cursor.rowcount
+
+    analyze_after_bulk_write(Member, archived, connection=connection)
+    if not destination:
+        analyze_after_bulk_write(ArchivedMember, archived, connection=connection)
+    return archived
+
+
+def _archive_detached(name, destination, connection):
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(column) for column in ARCHIVE_COLUMNS)
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        if destination:
+            moved = _copy_to_file(cursor, f"SELECT {columns} FROM {quote(name)}", [], destination, name, connection)
+        else:
+            cursor.execute(
+                f"INSERT INTO {quote(ARCHIVE_TABLE)} ({columns}, archived_at) "
+                f"SELECT {columns}, now() FROM {quote(name)}"
+            )
+            moved = cursor.rowcount
+        cursor.execute(f"DROP TABLE {quote(name)}")
+    return moved
+
+
+def _detached_partitions(connection):
+    """Partitions a previous run detached (and marked with DETACHED_COMMENT) but did not archive."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class "
+            "WHERE relnamespace = current_schema()::regnamespace AND relkind = 'r' "
+            "AND NOT relispartition AND obj_description(oid, 'pg_class') = %s",
+            [DETACHED_COMMENT],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _copy_to_file(cursor, query, params, destination, label, connection):
+    """Streams query as CSV into <destination>/<schema>_<label>.csv.gz and returns the row count."""
+    sql = cursor.mogrify(query, params).decode()
+    path = f"{destination.rstrip('/')}/{connection.schema_name}_{label}_{timezone.now():%Y%m%d%H%M%S}.csv.gz"
+    with gzip.open(path, 'wt') as archive_file:
+        cursor.copy_expert(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", archive_file)
+    return cursor.rowcount
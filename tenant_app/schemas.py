@@ -0,0 +1,136 @@
+from ninja import Schema
+from pydantic import Field
+from typing import Annotated, Any, List, Literal, Optional, Union
+from datetime import datetime
+
+class RegionUpdateSchema(Schema):
+    name: str
+    region_id: int
+
+class RegionResponseSchema(Schema):
+    id: int
+    name: str
+
+class RegionSyncSchema(Schema):
+    regions: List[RegionUpdateSchema]
+    # Delete every region (and its members) that is missing from the payload
+    replace: bool = False
+
+class RegionSyncResponseSchema(Schema):
+    created: int
+    updated: int
+    deleted: int
+
+class MemberUpdateSchema(Schema):
+    name: str
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    region_id: int
+
+class MemberPatchSchema(Schema):
+    # Only the fields present are written
+    name: Optional[str] = None
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    # The version the client last read; the update is refused with 409 if it is stale
+    version: int
+
+class MemberResponseSchema(Schema):
+    id: int
+    name: str
+    phone: Optional[str] = None
+    email: Optional[str] = None
+    created_at: datetime
+    version: int
+
+class ErrorSchema(Schema):
+    detail: str
+
+class HistoryEntrySchema(Schema):
+    id: int
+    # create, update, delete, or snapshot (entries folded by compact_history)
+    action: str
+    # New values of the fields that changed; the whole member for create and snapshot
+    changes: dict
+    version: Optional[int] = None
+    changed_at: datetime
+
+class HistoryPageSchema(Schema):
+    entries: List[HistoryEntrySchema]
+    # Pass as `after` for the next page; null on the last one
+    next: Optional[int] = None
+
+class MemberSearchResultSchema(MemberResponseSchema):
+    region_id: int
+    # ts_rank of the member for the query; higher is better
+    rank: float
+
+class MemberSearchPageSchema(Schema):
+    results: List[MemberSearchResultSchema]
+    # Pass as `after` for the next page; null on the last one
+    next: Optional[str] = None
+
+class VersionConflictSchema(ErrorSchema):
+    current_version: int
+
+class MemberImportSchema(MemberUpdateSchema):
+    # Rows with an id update that member; rows without one create a new member
+    id: Optional[int] = None
+
+class RejectedRowSchema(Schema):
+    line: int
+    error: str
+
+class MemberImportResponseSchema(Schema):
+    inserted: int
+    updated: int
+    rejected: int
+    # The first IMPORT_REJECT_SAMPLE rejected rows
+    rejected_rows: List[RejectedRowSchema]
+
+# Most operations one POST /batch request may carry
+BATCH_MAX_OPERATIONS = 500
+
+# Operations accepted by POST /batch, told apart by "op"
+class BatchGetMemberSchema(Schema):
+    op: Literal['get_member']
+    region_id: int
+    member_id: int
+
+class BatchUpdateMemberSchema(Schema):
+    op: Literal['update_member']
+    region_id: int
+    member_id: int
+    # Same body as PUT {region_id}/members/{member_id}
+    payload: MemberUpdateSchema
+    # When given, the update only applies on top of this version (409 otherwise)
+    version: Optional[int] = None
+
+class BatchDeleteMemberSchema(Schema):
+    op: Literal['delete_member']
+    region_id: int
+    member_id: int
+
+class BatchCreateRegionSchema(Schema):
+    op: Literal['create_region']
+    payload: RegionUpdateSchema
+
+BatchOperationSchema = Annotated[
+    Union[BatchGetMemberSchema, BatchUpdateMemberSchema, BatchDeleteMemberSchema, BatchCreateRegionSchema],
+    Field(discriminator='op'),
+]
+
+class BatchRequestSchema(Schema):
+    operations: List[BatchOperationSchema] = Field(max_length=BATCH_MAX_OPERATIONS)
+    # Roll back every operation when any of them fails
+    all_or_nothing: bool = False
+
+class BatchResultSchema(Schema):
+    # The status the single-operation endpoint would have returned
+    status: int
+    # The member or region, or {"detail": ...} for a failed operation
+    body: Optional[Any] = None
+
+class BatchResponseSchema(Schema):
+    committed: bool
+    results: List[BatchResultSchema]
@@ -0,0 +1,83 @@
+"""
+Ranked full-text search over the members of the current tenant schema.
+
+Every member table has a tsvector column, search, holding the member's name
+(weight A), email split at its punctuation (B) and phone digits (C), with a GIN
+index (migration 0011). A row trigger computes it on every insert and on updates
+of those columns, so the ORM, the COPY + MERGE import, tenant clones and
+promotions all keep it current without knowing about it; partitioning moves the
+trigger to the partitioned parent. A generated column would have done the same,
+but adding one rewrites the whole table under an ACCESS EXCLUSIVE lock. Django
+4.2 has no field for a column the database maintains, so the column is not on
+the model and is reached through SEARCH_VECTOR.
+
+A query matches the members that have every one of its words as a prefix of
+one of theirs, in the 'simple' configuration: no stemming or stop words, which
+suit names and email addresses poorly. A query made of digits and phone
+punctuation is searched as one run of digits. Results are ranked with ts_rank
+and paged by (rank, id), so a deep page is found without OFFSET skipping the
+pages before it.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db.models import FloatField, Q
+from django.db.models.functions import Cast
+from django.db.models.expressions import RawSQL
+
+from .models import Member
+
+SEARCH_PAGE_SIZE = 50
+# Words of a query beyond this many are ignored
+MAX_SEARCH_TERMS = 8
+
+SEARCH_COLUMN = 'search'
+SEARCH_VECTOR = RawSQL(f'"{Member._meta.db_table}"."{SEARCH_COLUMN}"', [], output_field=SearchVectorField())
+
+_WORD = re.compile(r'[^\W_]+')
+_PHONE = re.compile(r'\+?[\d\s().-]+')
+
+
+def search_terms(q):
+    """The lower-cased words of q, or its digits alone when q looks like a phone number."""
+    if _PHONE.fullmatch(q.strip()):
+        digits = re.sub(r'\D', '', q)
+        return [digits] if digits else []
+    return [word.lower() for word in _WORD.findall(q)][:MAX_SEARCH_TERMS]
+
+
+def search_members(q, after=None, limit=SEARCH_PAGE_SIZE):
+    """
+    The members matching q, best first, each with its rank, and the cursor to
+    pass as after for the next page (None on the last one). Raises ValueError
+    for a query without words and for a malformed cursor.
+    """
+    terms = search_terms(q)
+    if not terms:
+        raise ValueError("q must contain at least one letter or digit.")
+    # Words only hold letters and digits, so nothing in them is tsquery syntax
+    query = SearchQuery(' & '.join(f'{term}:*' for term in terms), search_type='raw', config='simple')
+    members = (
+        Member.objects.alias(document=SEARCH_VECTOR)
+        .filter(document=query)
+        # ts_rank is a real, whose text form does not read back as the same value;
+        # as a double precision the cursor's rank compares equal to the row's
+        .annotate(rank=Cast(SearchRank(SEARCH_VECTOR, query), FloatField()))
+    )
+    if after is not None:
+        rank, member_id = parse_cursor(after)
+        members = members.filter(Q(rank__lt=rank) | Q(rank=rank, id__gt=member_id))
+    page = list(members.order_by('-rank', 'id')[:limit + 1])
+    if len(page) > limit:
+        last = page[limit - 1]
+        return page[:limit], f'{last.rank!r}:{last.id}'
+    return page, None
+
+
+def parse_cursor(after):
+    """(rank, id) from a cursor returned by search_members."""
+    rank, _, member_id = after.partition(':')
+    try:
+        return float(rank), int(member_id)
+    except ValueError:
+        raise ValueError("after must be a cursor returned by a previous search.")
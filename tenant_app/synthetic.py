@@ -0,0 +1,205 @@
+"""
+Deterministic synthetic regions and members, for dev, perf and load-test
+environments that must not hold real member data.
+
+The same seed and shape always give the same rows. Distributions are skewed
+the way real enrollments are:
+  - members across regions follow a Zipf law, so a few regions are big;
+  - first names are Zipf-weighted and last names come from a pool of a few
+    thousand, so names repeat;
+  - email domains are weighted towards the big providers;
+  - signup times cluster around recent dates;
+  - some members have no email or phone.
+A share of members can be planted duplicates of earlier ones, in the ways
+manage.py bench_dedupe measures: typos, tagged emails, reformatted phones.
+
+fill_schema() writes into the schema the connection is set to, with COPY,
+COPY_BATCH_SIZE rows at a time, and never builds model instances.
+"""
+import bisect
+import io
+import itertools
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.db import connection, transaction
+
+from . import history
+from .maintenance import analyze_after_bulk_write
+from .models import Member, Region
+
+FIRST_NAMES = [
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William', 'Elizabeth',
+    'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Charles', 'Karen',
+    'Daniel', 'Nancy', 'Matthew', 'Lisa', 'Anthony', 'Betty', 'Mark', 'Sandra', 'Steven', 'Ashley',
+    'Paul', 'Emily', 'Andrew', 'Donna', 'Kevin', 'Michelle', 'Brian', 'Carol', 'George', 'Amanda',
+    'Omar', 'Yuki', 'Priya', 'Chen', 'Fatima', 'Ivan', 'Lucia', 'Kwame', 'Aiko', 'Mateo',
+]
+LAST_SYLLABLES = [
+    'an', 'ber', 'cor', 'dal', 'en', 'fer', 'gan', 'har', 'is', 'kow', 'lan', 'mor', 'nel', 'o', 'per',
+    'quin', 'ros', 'sten', 'tor', 'vick', 'wal', 'zen', 'bra', 'chi', 'dro', 'gue', 'ja', 'ki', 'lu', 'mi',
+    'na', 'pa', 'ri', 'sa', 'ta', 'ya', 'zu', 'ell', 'ow', 'ski',
+]
+# Email domains with their share of members
+DOMAINS = {
+    'gmail.com': 40, 'example.com': 20, 'outlook.com': 15, 'yahoo.com': 10,
+    'mail.example.org': 10, 'corp.example.net': 5,
+}
+REGION_NAMES = ['North', 'South', 'East', 'West', 'Central', 'Coast', 'Valley', 'Highlands', 'Lakes', 'Metro']
+
+# Zipf exponent of members over regions
+DEFAULT_REGION_SKEW = 1.0
+# Last names drawn per schema; the members share them
+LAST_NAME_POOL = 5000
+# Signups span this many days back, clustered towards recent ones (mean age a quarter of it)
+SIGNUP_DAYS = 3 * 365
+MISSING_EMAIL_RATE = 0.05
+MISSING_PHONE_RATE = 0.15
+# Rows per COPY
+COPY_BATCH_SIZE = 50_000
+
+MEMBER_COLUMNS = ('name', 'email', 'phone', 'created_at', 'region_id', 'version')
+
+
+def zipf_cumulative(count, s):
+    """Cumulative Zipf weights of ranks 1..count, for random.choices(cum_weights=...)."""
+    return list(itertools.accumulate(1 / rank ** s for rank in range(1, count + 1)))
+
+
+def last_names(rng, count=LAST_NAME_POOL):
+    return [''.join(rng.choice(LAST_SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize() for _ in range(count)]
+
+
+def region_rows(count, rng):
+    """(id, name) of count regions; ids start at 1."""
+    return [(number, f'{rng.choice(REGION_NAMES)} {number}') for number in range(1, count + 1)]
+
+
+def member_rows(count, region_ids, rng, region_skew=DEFAULT_REGION_SKEW, duplicate_rate=0.0, now=None):
+    """
+    Yields count (name, email, phone, created_at, region_id) tuples. Planted
+    duplicates copy a member generated shortly before, in a changed form.
+    Signup times count back from now, by default the start of the current day
+    (UTC), so reruns on the same day give the same rows.
+    """
+    now = now or datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    surnames = last_names(rng)
+    # Shuffled, so the biggest region is not always region 1
+    ranked_regions = rng.sample(list(region_ids), len(region_ids))
+    region_weights = zipf_cumulative(len(ranked_regions), region_skew)
+    name_weights = zipf_cumulative(len(FIRST_NAMES), 0.8)
+    domains, domain_weights = list(DOMAINS), list(itertools.accumulate(DOMAINS.values()))
+    recent = []
+    for start in range(0, count, COPY_BATCH_SIZE):
+        size = min(COPY_BATCH_SIZE, count - start)
+        firsts = rng.choices(FIRST_NAMES, cum_weights=name_weights, k=size)
+        regions = rng.choices(ranked_regions, cum_weights=region_weights, k=size)
+        for first, region_id in zip(firsts, regions):
+            age = min(rng.expovariate(4 / SIGNUP_DAYS), SIGNUP_DAYS)
+            created_at = now - timedelta(days=age)
+            if recent and rng.random() < duplicate_rate:
+                name, email, phone = duplicate_variant(rng.choice(recent), rng)
+                yield name, email, phone, created_at, region_id
+                continue
+            last = rng.choice(surnames)
+            email = '' if rng.random() < MISSING_EMAIL_RATE else (
+                f'{first.lower()}.{last.lower()}{rng.randrange(1000)}@'
+                f'{domains[bisect.bisect(domain_weights, rng.random() * domain_weights[-1])]}'
+            )
+            phone = '' if rng.random() < MISSING_PHONE_RATE else f'555-{rng.randrange(1000):03d}-{rng.randrange(10000):04d}'
+            member = (f'{first} {last}', email, phone)
+            if len(recent) < 1000:
+                recent.append(member)
+            else:
+                recent[rng.randrange(1000)] = member
+            yield (*member, created_at, region_id)
+
+
+def duplicate_variant(member, rng):
+    """
+    The same person as entered by someone else: a name typo, a tagged email, a
+    reformatted phone, or a mistyped phone digit.
+    """
+    name, email, phone = member
+    change = rng.randrange(4)
+    if change == 0 and len(name) > 4:
+        position = rng.randrange(1, len(name) - 1)
+        name = name[:position] + name[position + 1:]
+    elif change == 1 and email:
+        local, _, domain = email.partition('@')
+        email = f'{local.upper()}+portal@{domain}'
+        phone = ''
+    elif change == 2 and phone:
+        phone = '+1 ' + phone.replace('-', ' ')
+        email = ''
+    elif len(phone) > 4:
+        digit = rng.choice([index for index, char in enumerate(phone) if char.isdigit() and index >= 4])
+        phone = phone[:digit] + str((int(phone[digit]) + 1) % 10) + phone[digit + 1:]
+        email = ''
+    return name, email, phone
+
+
+def fill_schema(seed, regions, members, region_skew=DEFAULT_REGION_SKEW, duplicate_rate=0.0, with_history=False,
+                now=None):
+    """
+    Writes regions and members into the current schema, which must have no
+    regions yet, and returns the number of members written. The rows depend
+    only on seed, the schema name, the shape and now (see member_rows). Each
+    batch of members is its own transaction. With with_history, every region
+    and member also gets its create entry, as if made through the API.
+    """
+    rng = random.Random(f'{seed}:{connection.schema_name}')
+    quote = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {quote(Region._meta.db_table)} (id, name) FROM STDIN",
+            io.StringIO(''.join(f'{number}\t{name}\n' for number, name in region_rows(regions, rng))),
+        )
+        # COPY with explicit ids leaves the sequence behind; regions created later would collide
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, %s)",
+            [Region._meta.db_table, max(regions, 1), regions > 0],
+        )
+        cursor.execute(f"SELECT coalesce(max(id), 0) FROM {quote(Member._meta.db_table)}")
+        first_id = cursor.fetchone()[0]
+
+    written = 0
+    rows = member_rows(members, range(1, regions + 1), rng, region_skew, duplicate_rate, now)
+    # Generated names, emails and phones hold nothing COPY's text format would need escaped
+    while batch := list(itertools.islice(rows, COPY_BATCH_SIZE)):
+        data = ''.join(
+            f'{name}\t{email}\t{phone}\t{created_at.isoformat()}\t{region_id}\t1\n'
+            for name, email, phone, created_at, region_id in batch
+        )
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {quote(Member._meta.db_table)} ({', '.join(MEMBER_COLUMNS)}) FROM STDIN", io.StringIO(data)
+            )
+        written += len(batch)
+
+    if with_history:
+        _record_created(first_id)
+    analyze_after_bulk_write(Region, regions)
+    analyze_after_bulk_write(Member, written)
+    return written
+
+
+def _record_created(first_id):
+    """Writes the create entries of every region, and of the members after first_id, in two statements."""
+    quote = connection.ops.quote_name
+    region = history.changes_sql(history.REGION_FIELDS, {'name': 'r.name'})
+    member = history.changes_sql(history.MEMBER_FIELDS, {field: f'm.{field}' for field in history.MEMBER_FIELDS})
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            history.insert_sql(
+                f"SELECT %s, r.id, r.id, %s, {region}, NULL, now(), r.client_key FROM {quote(Region._meta.db_table)} r"
+            ),
+            [history.REGION, history.CREATE],
+        )
+        cursor.execute(
+            history.insert_sql(
+                f"SELECT %s, m.id, m.region_id, %s, {member}, m.version, m.created_at, m.client_key "
+                f"FROM {quote(Member._meta.db_table)} m WHERE m.id > %s"
+            ),
+            [history.MEMBER, history.CREATE, first_id],
+        )
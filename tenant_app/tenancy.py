@@ -0,0 +1,200 @@
+"""
+Tenancy layers for tenant_app models.
+
+Every tenant has its own schema (django-tenants), and on top of that the models
+use django_multitenant, which scopes queries to the row-level tenant set with
+set_current_tenant(). When settings.TENANT_SCHEMA_ONLY is true the schema is the
+only isolation boundary: the classes below skip django_multitenant's filter
+injection, thread-local lookups and per-attribute checks, and behave like plain
+Django models, managers and foreign keys. Views that need to scope to a region
+filter on region_id explicitly (see scope_to_region in tenant_app.api).
+
+With the setting off (the default) they behave exactly like their
+django_multitenant counterparts.
+
+Pooled tenants (Client.is_pooled) have no schema of their own: their rows live
+in the shared settings.TENANT_POOL_SCHEMA schema, tagged with the Client id in a
+client_key column. For a pooled tenant's request the middleware sets the
+current client key, and every manager below then scopes its queries to it and
+tags the rows it creates with it. In dedicated schemas client_key stays NULL
+and no key is ever set, so nothing changes there.
+"""
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django_multitenant.fields import TenantForeignKey
+from django_multitenant.models import TenantManager, TenantModel
+
+
+def schema_only_tenancy():
+    return getattr(settings, 'TENANT_SCHEMA_ONLY', False)
+
+
+_pooled_client_key = ContextVar('pooled_client_key', default=None)
+
+
+def pooled_client_key():
+    """The Client id pooled rows are scoped to in this context, or None."""
+    return _pooled_client_key.get()
+
+
+def set_pooled_client_key(client_key):
+    """Scopes the pooled models to client_key (None: unscoped) until it is set again."""
+    _pooled_client_key.set(client_key)
+
+
+@contextmanager
+def pooled_client(client_key):
+    """Scopes the pooled models to client_key for the duration of the block."""
+    token = _pooled_client_key.set(client_key)
+    try:
+        yield
+    finally:
+        _pooled_client_key.reset(token)
+
+
+def scope_to_pooled_client(queryset):
+    client_key = pooled_client_key()
+    if client_key is None:
+        return queryset
+    return queryset.filter(client_key=client_key)
+
+
+def claim_for_pooled_client(instance):
+    """
+    Tags a row about to be saved with the current client key, and checks that
+    its foreign keys point at rows of the same client: in the pool schema a
+    region id of another pooled tenant is a valid foreign key as far as
+    PostgreSQL is concerned.
+    """
+    client_key = pooled_client_key()
+    if client_key is None:
+        return
+    if instance.client_key is None:
+        instance.client_key = client_key
+    elif instance.client_key != client_key:
+        raise IntegrityError(f"{instance._meta.object_name} {instance.pk} belongs to another pooled tenant.")
+    for field in instance._meta.concrete_fields:
+        if not field.is_relation or not issubclass(field.related_model, PooledModel):
+            continue
+        value = getattr(instance, field.attname)
+        related = field.related_model._base_manager.using(instance._state.db or 'default')
+        if value is not None and not related.filter(**{field.target_field.attname: value, 'client_key': client_key}).exists():
+            raise IntegrityError(f"{field.related_model._meta.object_name} {value} does not exist.")
+
+
+def pooled_bulk_create(create, model, objs, **kwargs):
+    """
+    Runs create(objs, **kwargs) with every object tagged with the current client
+    key. An upsert (update_conflicts) can match a row of another pooled tenant
+    that has the same primary key; that is detected after the fact and rolled
+    back as an IntegrityError.
+    """
+    client_key = pooled_client_key()
+    if client_key is None:
+        return create(objs, **kwargs)
+    objs = list(objs)
+    for obj in objs:
+        obj.client_key = client_key
+    if not kwargs.get('update_conflicts'):
+        return create(objs, **kwargs)
+    with transaction.atomic(using=model.objects.db):
+        created = create(objs, **kwargs)
+        taken = model._base_manager.filter(pk__in=[obj.pk for obj in objs]).exclude(client_key=client_key)
+        if taken.exists():
+            raise IntegrityError(f"Some {model._meta.verbose_name_plural} belong to another pooled tenant.")
+    return created
+
+
+class PooledManager(models.Manager):
+    use_in_migrations = True
+
+    def get_queryset(self):
+        return scope_to_pooled_client(super().get_queryset())
+
+    def bulk_create(self, objs, **kwargs):
+        return pooled_bulk_create(super().bulk_create, self.model, objs, **kwargs)
+
+
+class PooledModel(models.Model):
+    # Client id of the owning tenant for rows in the pool schema; NULL in dedicated schemas
+    client_key = models.BigIntegerField(null=True, blank=True, editable=False)
+
+    objects = PooledManager()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        claim_for_pooled_client(self)
+        return super().save(*args, **kwargs)
+
+
+class SchemaAwareTenantManager(TenantManager):
+    use_in_migrations = True
+
+    def get_queryset(self):
+        if schema_only_tenancy():
+            queryset = self._queryset_class(self.model, using=self._db, hints=self._hints)
+        else:
+            queryset = super().get_queryset()
+        return scope_to_pooled_client(queryset)
+
+    def bulk_create(self, objs, **kwargs):
+        if schema_only_tenancy():
+            create = functools.partial(models.Manager.bulk_create, self)
+        else:
+            create = super().bulk_create
+        return pooled_bulk_create(create, self.model, objs, **kwargs)
+
+
+class SchemaAwareTenantForeignKey(TenantForeignKey):
+
+    def deconstruct(self):
+        # Same column and constraint as TenantForeignKey; migrations needn't rebuild the foreign key
+        name, path, args, kwargs = super().deconstruct()
+        return name, 'django_multitenant.fields.TenantForeignKey', args, kwargs
+
+    def get_extra_descriptor_filter(self, instance):
+        if schema_only_tenancy():
+            return models.ForeignKey.get_extra_descriptor_filter(self, instance)
+        return super().get_extra_descriptor_filter(instance)
+
+    def get_extra_restriction(self, alias, related_alias):
+        if schema_only_tenancy():
+            return None
+        return super().get_extra_restriction(alias, related_alias)
+
+
+class SchemaAwareTenantModel(PooledModel, TenantModel):
+    objects = SchemaAwareTenantManager()
+
+    class Meta:
+        abstract = True
+
+    def __init__(self, *args, **kwargs):
+        if schema_only_tenancy():
+            # Skips the check-and-patch of Django's query classes on every instantiation
+            models.Model.__init__(self, *args, **kwargs)
+        else:
+            super().__init__(*args, **kwargs)
+
+    def __setattr__(self, name, value):
+        if schema_only_tenancy():
+            object.__setattr__(self, name, value)
+        else:
+            super().__setattr__(name, value)
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        if schema_only_tenancy():
+            return models.Model._do_update(self, base_qs, using, pk_val, values, update_fields, forced_update)
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+    def save(self, *args, **kwargs):
+        if schema_only_tenancy():
+            claim_for_pooled_client(self)
+            return models.Model.save(self, *args, **kwargs)
+        return super().save(*args, **kwargs)
@@ -0,0 +1,40 @@
+import pytest
+import json
+from tenant_app.models import Member, Region
+from django.db import connection
+
+# Mark all tests in this module to use the database
+pytestmark = pytest.mark.django_db(transaction=True)
+
+def test_batch_operations(tenant_client, test_tenant):
+    """Test that a batch creates, reads, updates and deletes in order, reporting each result"""
+    connection.set_tenant(test_tenant)
+    region = Region.objects.create(id=1, name="Region 1")
+    keep = Member.objects.create(name="Keep", region=region)
+    doomed = Member.objects.create(name="Doomed", region=region)
+    connection.set_schema_to_public()
+
+    operations = [
+        {"op": "create_region", "payload": {"region_id": 2, "name": "Region 2"}},
+        {"op": "update_member", "region_id": 1, "member_id": keep.id, "payload": {"name": "Kept", "region_id": 1}},
+        {"op": "get_member", "region_id": 1, "member_id": keep.id},
+        {"op": "delete_member", "region_id": 1, "member_id": doomed.id},
+        {"op": "get_member", "region_id": 1, "member_id": doomed.id},
+        {"op": "create_region", "payload": {"region_id": 1, "name": "Duplicate"}},
+    ]
+    response = tenant_client.post(
+        f'/client/{test_tenant.test_domain}/api/batch',
+        data=json.dumps({"operations": operations}),
+        content_type='application/json'
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data['committed'] is True
+    assert [result['status'] for result in data['results']] == [200, 200, 200, 200, 404, 409]
+    assert data['results'][2]['body']['name'] == "Kept"
+
+    connection.set_tenant(test_tenant)
+    assert Region.objects.filter(id=2).exists()
+    assert list(Member.objects.values_list('name', flat=True)) == ["Kept"]
+    connection.set_schema_to_public()
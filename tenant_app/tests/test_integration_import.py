@@ -0,0 +1,42 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from tenant_app.models import Member, Region
+from django.db import connection
+
+# Mark all tests in this module to use the database
+pytestmark = pytest.mark.django_db(transaction=True)
+
+def import_url(tenant_domain, format='csv'):
+    """Helper to get the member import URL, including tenant domain prefix"""
+    return f'/client/{tenant_domain}/api/members/import?format={format}'
+
+def test_import_members_csv(tenant_client, test_tenant):
+    """Test that a CSV import inserts, updates and rejects rows in one pass"""
+    connection.set_tenant(test_tenant)
+    region = Region.objects.create(id=1, name="Region 1")
+    existing = Member.objects.create(name="Old Name", phone="111", region=region)
+    connection.set_schema_to_public()
+
+    content = (
+        "id,name,phone,email,region_id\n"
+        f"{existing.id},New Name,,,1\n"
+        ",Jane Doe,555-0100,jane@example.com,1\n"
+        ",Nobody,,,99\n"
+        ",,,,1\n"
+    ).encode()
+
+    response = tenant_client.post(
+        import_url(test_tenant.test_domain),
+        {'file': SimpleUploadedFile('members.csv', content, content_type='text/csv')},
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert (data["inserted"], data["updated"], data["rejected"]) == (1, 1, 2)
+    assert [row["line"] for row in data["rejected_rows"]] == [4, 5]
+
+    connection.set_tenant(test_tenant)
+    existing.refresh_from_db()
+    assert (existing.name, existing.phone) == ("New Name", "111")
+    assert Member.objects.filter(name="Jane Doe", email="jane@example.com").exists()
+    connection.set_schema_to_public()
@@ -33,6 +33,25 @@ def test_list_members(tenant_client, test_tenant, member1, member2):
     assert members_data[1]['id'] == member2.id
     assert members_data[1]['name'] == member2.name
 
+def test_list_members_sparse_fields(tenant_client, test_tenant, member1, member2):
+    """Test that fields= narrows each member to the requested fields, also in columnar format"""
+    list_url = f'/client/{test_tenant.test_domain}/api/members'
+
+    response = tenant_client.get(list_url, {'fields': 'id,name'})
+    assert response.status_code == 200
+    assert sorted(response.json(), key=lambda x: x['id']) == [
+        {'id': member1.id, 'name': member1.name},
+        {'id': member2.id, 'name': member2.name},
+    ]
+
+    response = tenant_client.get(list_url, {'fields': 'id,name', 'format': 'columnar'})
+    data = response.json()
+    assert data['columns'] == ['id', 'name']
+    assert sorted(map(tuple, data['rows'])) == [(member1.id, member1.name), (member2.id, member2.name)]
+
+    response = tenant_client.get(list_url, {'fields': 'id,ssn'})
+    assert response.status_code == 400
+
 def test_create_member(tenant_client, test_tenant):
     """Test creating a new member"""
     domain = test_tenant.test_domain
@@ -233,4 +252,56 @@ def test_delete_nonexistent_member(tenant_client, test_tenant):
     nonexistent_url = f'/client/{domain}/api/members/{NONEXISTENT_ID}' # Construct URL dynamically
 
     response = tenant_client.delete(nonexistent_url)
-    assert response.status_code == 404 
\ No newline at end of file
+    assert response.status_code == 404 
+
+def test_patch_member_optimistic_locking(tenant_client, test_tenant, member1):
+    """Test that PATCH writes only the given fields, bumps the version and refuses a stale one"""
+    url = f'/client/{test_tenant.test_domain}/api/{member1.region_id}/members/{member1.id}'
+
+    response = tenant_client.patch(url, data=json.dumps({'phone': '555-0100', 'version': 1}), content_type='application/json')
+    assert response.status_code == 200
+    assert response.json()['version'] == 2
+    assert response.json()['name'] == member1.name
+
+    response = tenant_client.patch(url, data=json.dumps({'phone': '555-0199', 'version': 1}), content_type='application/json')
+    assert response.status_code == 409
+    assert response.json()['current_version'] == 2
+
+    connection.set_tenant(test_tenant)
+    assert Member.objects.get(id=member1.id).phone == '555-0100'
+
+def test_member_history_records_diffs_and_pages(tenant_client, test_tenant, member1):
+    """Test that updates and deletes are recorded as diffs, paged oldest first by keyset"""
+    url = f'/client/{test_tenant.test_domain}/api/{member1.region_id}/members/{member1.id}'
+    history_url = f'/client/{test_tenant.test_domain}/api/members/{member1.id}/history'
+
+    tenant_client.patch(url, data=json.dumps({'phone': '555-0100', 'version': 1}), content_type='application/json')
+    tenant_client.patch(url, data=json.dumps({'phone': '555-0100', 'email': 'new@example.com', 'version': 2}), content_type='application/json')
+    assert tenant_client.delete(url).status_code == 200
+
+    response = tenant_client.get(history_url, {'limit': 2})
+    assert response.status_code == 200
+    page = response.json()
+    assert [(entry['action'], entry['changes']) for entry in page['entries']] == [
+        ('update', {'phone': '555-0100'}),
+        ('update', {'email': 'new@example.com'}),
+    ]
+    assert page['entries'][1]['version'] == 3
+
+    page = tenant_client.get(history_url, {'limit': 2, 'after': page['next']}).json()
+    assert [entry['action'] for entry in page['entries']] == ['delete']
+    assert page['next'] is None
+
+def test_member_search_ranks_and_pages(tenant_client, test_tenant, member1, member2):
+    """Test that search matches word prefixes and phone digits, paged by keyset on rank and id"""
+    search_url = f'/client/{test_tenant.test_domain}/api/members/search'
+
+    page = tenant_client.get(search_url, {'q': 'tes us', 'limit': 1}).json()
+    assert [result['id'] for result in page['results']] == [member1.id]
+    page = tenant_client.get(search_url, {'q': 'tes us', 'limit': 1, 'after': page['next']}).json()
+    assert [result['id'] for result in page['results']] == [member2.id]
+    assert page['next'] is None
+
+    assert [r['id'] for r in tenant_client.get(search_url, {'q': 'test1'}).json()['results']] == [member1.id]
+    assert [r['id'] for r in tenant_client.get(search_url, {'q': '(098) 765'}).json()['results']] == [member2.id]
+    assert tenant_client.get(search_url, {'q': '--'}).status_code == 400
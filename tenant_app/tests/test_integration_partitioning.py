@@ -0,0 +1,24 @@
+import pytest
+from django.db import connection
+from django.utils import timezone
+from tenant_app.models import Member, Region
+from tenant_app.partitioning import add_months, is_partitioned, member_partitions, month_start, partition_member_table
+
+# Mark all tests in this module to use the database
+pytestmark = pytest.mark.django_db(transaction=True)
+
+def test_partition_table_with_member_created_now(test_tenant):
+    """Test that a table holding a member created this month can be partitioned, and still takes inserts"""
+    connection.set_tenant(test_tenant)
+    region = Region.objects.create(name="Region")
+    member = Member.objects.create(name="Now", email="now@example.com", phone="123", region=region)
+
+    partition_member_table(months_ahead=1)
+
+    assert is_partitioned()
+    bounds = dict(member_partitions())
+    assert bounds['tenant_app_member_legacy'] == add_months(month_start(timezone.now()), 1)
+    assert Member.objects.filter(pk=member.pk).exists()
+    Member.objects.create(name="Later", email="later@example.com", phone="456", region=region)
+    assert Member.objects.count() == 2
+    connection.set_schema_to_public()
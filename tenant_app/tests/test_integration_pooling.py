@@ -0,0 +1,61 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client as HttpClient
+from shared_app.lifecycle import promote_tenant
+from shared_app.models import Client, Domain
+from tenant_app.models import Member, Region
+from tenant_app.tenancy import pooled_client
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+@pytest.fixture
+def pooled_tenants():
+    connection.set_schema_to_public()
+    tenants = []
+    for name in ('tiny_a', 'tiny_b'):
+        tenant = Client.objects.create(schema_name=name, name=name, is_pooled=True)
+        Domain.objects.create(tenant=tenant, domain=name, is_primary=True)
+        tenants.append(tenant)
+    yield tenants
+    connection.set_schema_to_public()
+
+def test_pooled_tenants_isolated_and_promoted(pooled_tenants, settings):
+    """Test that pooled tenants only see their own rows, and keep them when promoted to a schema"""
+    tiny_a, tiny_b = pooled_tenants
+    http = HttpClient()
+    for tenant, region_id in ((tiny_a, 1), (tiny_b, 2)):
+        assert http.post(f'/client/{tenant.schema_name}/api/region', {'region_id': region_id, 'name': tenant.name},
+                         content_type='application/json').status_code == 200
+        assert http.post(f'/client/{tenant.schema_name}/api/members',
+                         {'name': f'{tenant.name} member', 'phone': '1', 'email': 'a@example.com', 'region_id': region_id},
+                         content_type='application/json').status_code == 200
+
+    members_a = http.get('/client/tiny_a/api/members').json()
+    assert [member['name'] for member in members_a] == ['tiny_a member']
+    # A region of another pooled tenant is not a valid foreign key
+    with pytest.raises(Exception):
+        http.post('/client/tiny_a/api/members', {'name': 'x', 'phone': '1', 'email': 'x@example.com', 'region_id': 2},
+                  content_type='application/json')
+
+    promote_tenant(tiny_a, drain=0)
+
+    assert not Client.objects.get(schema_name='tiny_a').is_pooled
+    assert [member['name'] for member in http.get('/client/tiny_a/api/members').json()] == ['tiny_a member']
+    assert [member['name'] for member in http.get('/client/tiny_b/api/members').json()] == ['tiny_b member']
+    connection.set_schema(settings.TENANT_POOL_SCHEMA)
+    with pooled_client(tiny_a.pk):
+        assert not Member.objects.exists() and not Region.objects.exists()
+
+def test_pooled_tenant_login_not_shared(pooled_tenants, settings):
+    """Test that a user in the pool cannot log in through one pooled tenant's admin and reach another's"""
+    tiny_a, tiny_b = pooled_tenants
+    connection.set_schema(settings.TENANT_POOL_SCHEMA)
+    get_user_model().objects.create_superuser('owner_a', 'owner_a@example.com', 'secret')
+    connection.set_schema_to_public()
+    http = HttpClient()
+
+    response = http.post('/client/tiny_a/admin/login/', {'username': 'owner_a', 'password': 'secret'})
+    assert response.status_code == 404
+    assert 'sessionid' not in response.cookies
+    assert http.get('/client/tiny_b/admin/').status_code == 404
@@ -0,0 +1,95 @@
+import pytest
+import json
+from tenant_app.models import Member, Region
+from django.db import connection
+
+# Mark all tests in this module to use the database
+pytestmark = pytest.mark.django_db(transaction=True)
+
+def sync_url(tenant_domain):
+    """Helper to get the region sync URL, including tenant domain prefix"""
+    return f'/client/{tenant_domain}/api/region/sync'
+
+def test_sync_regions_creates_and_updates(tenant_client, test_tenant):
+    """Test that a sync inserts new regions and renames existing ones"""
+    connection.set_tenant(test_tenant)
+    Region.objects.create(id=1, name="Old Name")
+    Region.objects.create(id=2, name="Unchanged")
+    connection.set_schema_to_public()
+
+    payload = {
+        "regions": [
+            {"region_id": 1, "name": "New Name"},
+            {"region_id": 2, "name": "Unchanged"},
+            {"region_id": 3, "name": "Brand New"},
+        ]
+    }
+
+    response = tenant_client.post(
+        sync_url(test_tenant.test_domain),
+        data=json.dumps(payload),
+        content_type='application/json'
+    )
+    data = response.json()
+
+    assert response.status_code == 200
+    assert data == {"created": 1, "updated": 1, "deleted": 0}
+
+    # Verify in database
+    connection.set_tenant(test_tenant)
+    assert dict(Region.objects.values_list('id', 'name')) == {
+        1: "New Name",
+        2: "Unchanged",
+        3: "Brand New",
+    }
+    connection.set_schema_to_public()
+
+def test_sync_regions_duplicate_id_is_not_an_error(tenant_client, test_tenant):
+    """Test that repeating a region_id upserts instead of raising an integrity error"""
+    payload = {
+        "regions": [
+            {"region_id": 10, "name": "First"},
+            {"region_id": 10, "name": "Second"},
+        ]
+    }
+
+    response = tenant_client.post(
+        sync_url(test_tenant.test_domain),
+        data=json.dumps(payload),
+        content_type='application/json'
+    )
+
+    assert response.status_code == 200
+    assert response.json()["created"] == 1
+
+    connection.set_tenant(test_tenant)
+    assert Region.objects.get(id=10).name == "Second"
+    connection.set_schema_to_public()
+
+def test_sync_regions_replace_deletes_missing(tenant_client, test_tenant):
+    """Test that replace mode removes regions (and their members) absent from the payload"""
+    connection.set_tenant(test_tenant)
+    kept = Region.objects.create(id=1, name="Kept")
+    dropped = Region.objects.create(id=2, name="Dropped")
+    Member.objects.create(name="Kept Member", region=kept)
+    Member.objects.create(name="Dropped Member", region=dropped)
+    connection.set_schema_to_public()
+
+    payload = {
+        "regions": [{"region_id": 1, "name": "Kept"}],
+        "replace": True,
+    }
+
+    response = tenant_client.post(
+        sync_url(test_tenant.test_domain),
+        data=json.dumps(payload),
+        content_type='application/json'
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"created": 0, "updated": 0, "deleted": 1}
+
+    connection.set_tenant(test_tenant)
+    assert list(Region.objects.values_list('id', flat=True)) == [1]
+    assert list(Member.objects.values_list('name', flat=True)) == ["Kept Member"]
+    connection.set_schema_to_public()
@@ -1,7 +1,7 @@
 import pytest
 import json
 from django.db import connection
-from tenant_app.models import Member
+from tenant_app.models import Member, Region
 
 # Mark all tests to use database
 pytestmark = pytest.mark.django_db(transaction=True)
@@ -221,4 +221,41 @@ def test_list_endpoint_isolation(tenant_client, another_tenant_client, test_tena
     assert not any(name.startswith("Tenant A") for name in member_names_b), "Should not see any Tenant A members"
     
     # Reset connection to public schema
-    connection.set_schema_to_public() 
\ No newline at end of file
+    connection.set_schema_to_public() 
+
+def test_schema_only_tenancy_isolation(settings, tenant_client, another_tenant_client, test_tenant, another_tenant):
+    """Test that with TENANT_SCHEMA_ONLY the schema alone keeps tenants and regions apart"""
+    settings.TENANT_SCHEMA_ONLY = True
+
+    connection.set_tenant(test_tenant)
+    region_a = Region.objects.create(id=1, name="Region A")
+    other_region = Region.objects.create(id=2, name="Other Region")
+    member_a = Member.objects.create(name="Schema Only A", region=region_a)
+    other_member = Member.objects.create(name="Other Region Member", region=other_region)
+
+    connection.set_tenant(another_tenant)
+    region_b = Region.objects.create(id=1, name="Region B")
+    # An id tenant A does not have, so a leak could not be mistaken for A's own member
+    member_b = Member.objects.create(id=other_member.id + 1000, name="Schema Only B", region=region_b)
+    connection.set_schema_to_public()
+
+    domain_a = test_tenant.test_domain
+    domain_b = another_tenant.test_domain
+
+    # Each tenant lists only its own members
+    names_a = [m['name'] for m in tenant_client.get(f'/client/{domain_a}/api/members').json()]
+    names_b = [m['name'] for m in another_tenant_client.get(f'/client/{domain_b}/api/members').json()]
+    assert sorted(names_a) == ["Other Region Member", "Schema Only A"]
+    assert names_b == ["Schema Only B"]
+
+    # Region-scoped endpoints still filter by region within the schema
+    region_list = tenant_client.get(f'/client/{domain_a}/api/1/members').json()
+    assert [m['name'] for m in region_list] == ["Schema Only A"]
+
+    # Region-scoped lookups never cross regions or schemas
+    assert tenant_client.get(f'/client/{domain_a}/api/1/members/{member_a.id}').status_code == 200
+    assert tenant_client.get(f'/client/{domain_a}/api/1/members/{other_member.id}').status_code == 404
+    assert tenant_client.get(f'/client/{domain_a}/api/1/members/{member_b.id}').status_code == 404
+    response = another_tenant_client.get(f'/client/{domain_b}/api/1/members/{member_b.id}')
+    assert response.status_code == 200
+    assert response.json()['name'] == "Schema Only B"
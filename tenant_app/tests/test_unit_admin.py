@@ -0,0 +1,39 @@
+from starterapp.admin_performance import EstimatedCountPaginator, ESTIMATED_COUNT_THRESHOLD
+from tenant_app.models import Member
+
+# --- Unit Tests (no DB interaction) ---
+def exact_count(mocker, value):
+    """Patches the exact COUNT(*) of the base Paginator"""
+    return mocker.patch(
+        'django.core.paginator.Paginator.count',
+        new_callable=mocker.PropertyMock,
+        return_value=value
+    )
+
+def test_unit_estimated_count_for_large_unfiltered_table(mocker):
+    """Test that a large unfiltered changelist uses the planner estimate"""
+    mock_estimate = mocker.patch('starterapp.admin_performance.estimated_row_count')
+    mock_estimate.return_value = ESTIMATED_COUNT_THRESHOLD * 10
+    mock_count = exact_count(mocker, 0)
+
+    paginator = EstimatedCountPaginator(Member.objects.order_by('id'), 100)
+
+    assert paginator.count == ESTIMATED_COUNT_THRESHOLD * 10
+    mock_estimate.assert_called_once_with(Member)
+    mock_count.assert_not_called()
+
+def test_unit_exact_count_for_small_table(mocker):
+    """Test that tables below the threshold still get an exact COUNT(*)"""
+    mocker.patch('starterapp.admin_performance.estimated_row_count', return_value=10)
+    exact_count(mocker, 12)
+
+    assert EstimatedCountPaginator(Member.objects.order_by('id'), 100).count == 12
+
+def test_unit_exact_count_for_filtered_queryset(mocker):
+    """Test that searches and filters are never estimated"""
+    mock_estimate = mocker.patch('starterapp.admin_performance.estimated_row_count')
+    exact_count(mocker, 3)
+    queryset = Member.objects.filter(name__icontains="smith").order_by('id')
+
+    assert EstimatedCountPaginator(queryset, 100).count == 3
+    mock_estimate.assert_not_called()
@@ -0,0 +1,66 @@
+from django.test import RequestFactory
+from starterapp.auth import SignedTokenAuth, StaffTokenAuth, issue_api_token
+from starterapp.middleware.ApiMiddleware import ApiAwareSessionMiddleware, is_api_request
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_is_api_request():
+    """Test that tenant and public API paths are recognised, and nothing else"""
+    factory = RequestFactory()
+
+    assert is_api_request(factory.get('/client/tenant1/api/members'))
+    assert is_api_request(factory.get('/api/clients'))
+    assert not is_api_request(factory.get('/client/tenant1/admin/'))
+    assert not is_api_request(factory.get('/admin/'))
+
+def test_unit_session_middleware_skipped_for_api():
+    """Test that API requests never get a session attached"""
+    middleware = ApiAwareSessionMiddleware(lambda request: request)
+    factory = RequestFactory()
+
+    assert not hasattr(middleware(factory.get('/client/tenant1/api/members')), 'session')
+    assert hasattr(middleware(factory.get('/client/tenant1/admin/')), 'session')
+
+def test_unit_signed_token_bound_to_schema(mocker):
+    """Test that a token is accepted on its own schema only"""
+    connection = mocker.patch('starterapp.auth.connection')
+    token = issue_api_token('tenant1', 'integration')
+    auth = SignedTokenAuth()
+
+    connection.schema_name = 'tenant1'
+    assert auth.authenticate(None, token) == {'schema': 'tenant1', 'sub': 'integration'}
+
+    connection.schema_name = 'tenant2'
+    assert auth.authenticate(None, token) is None
+
+def test_unit_signed_token_rejects_tampering(mocker):
+    """Test that a modified token fails verification"""
+    mocker.patch('starterapp.auth.connection').schema_name = 'tenant1'
+    token = issue_api_token('tenant1', 'integration')
+
+    assert SignedTokenAuth().authenticate(None, token[:-2] + 'xx') is None
+
+def test_unit_staff_token_required_for_lifecycle_routes(mocker, settings):
+    """Test that lifecycle routes need a public-schema token of an active staff user, whatever API_AUTH_MODE is"""
+    from shared_app.api import api
+
+    settings.API_AUTH_MODE = None
+    operations = {
+        (path, method): operation.auth_callbacks
+        for path, path_operation in api.default_router.path_operations.items()
+        for operation in path_operation.operations for method in operation.methods
+    }
+    for route in [('/clients/{client_id}/clone', 'POST'), ('/clients/{client_id}', 'DELETE'),
+                  ('/clients/{client_id}/rename', 'POST'), ('/clients/{client_id}/promote', 'POST'),
+                  ('/jobs/{job_id}', 'GET')]:
+        assert [type(auth) for auth in operations[route]] == [StaffTokenAuth]
+
+    mocker.patch('starterapp.auth.connection').schema_name = 'public'
+    User = mocker.patch('starterapp.auth.get_user_model').return_value
+    User.USERNAME_FIELD = 'username'
+    users = User.objects.filter.return_value
+    auth = StaffTokenAuth()
+    users.exists.return_value = True
+    assert auth.authenticate(None, issue_api_token('public', 'ops'))['sub'] == 'ops'
+    assert auth.authenticate(None, issue_api_token('tenant1', 'ops')) is None
+    users.exists.return_value = False
+    assert auth.authenticate(None, issue_api_token('public', 'ops')) is None
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+from tenant_app.batch import run_batch
+from tenant_app.models import Member
+from tenant_app.schemas import BatchRequestSchema
+
+def _batch(*operations, all_or_nothing=False):
+    return BatchRequestSchema(operations=list(operations), all_or_nothing=all_or_nothing)
+
+def _member(member_id, region_id):
+    return Member(id=member_id, name=f'Member {member_id}', email='', phone='', region_id=region_id,
+                  created_at=datetime(2026, 1, 1, tzinfo=timezone.utc))
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_batch_reads_members_in_one_query(mocker):
+    """Test that every member in the batch is fetched with one in_bulk call, scoped by region"""
+    in_bulk = mocker.patch('tenant_app.batch.Member.objects.in_bulk', return_value={1: _member(1, 10), 2: _member(2, 20)})
+    mocker.patch('tenant_app.batch.transaction.atomic')
+    batch = _batch(
+        {'op': 'get_member', 'region_id': 10, 'member_id': 1},
+        {'op': 'get_member', 'region_id': 10, 'member_id': 2},
+        {'op': 'get_member', 'region_id': 20, 'member_id': 2},
+    )
+
+    committed, results = run_batch(batch.operations)
+
+    in_bulk.assert_called_once_with({1, 2})
+    assert committed
+    assert [status for status, _ in results] == [200, 404, 200]
+    assert results[0][1]['name'] == 'Member 1'
+
+def test_unit_batch_update_then_get_sees_the_update(mocker):
+    """Test that later operations see earlier writes, and all_or_nothing reports a rollback"""
+    member = _member(1, 10)
+    mocker.patch('tenant_app.batch.Member.objects.in_bulk', return_value={1: member})
+    mocker.patch('tenant_app.batch.transaction.atomic')
+    update = mocker.patch('tenant_app.batch.update_member_fields', return_value={
+        'id': 1, 'name': 'Renamed', 'phone': '', 'email': '', 'created_at': member.created_at, 'version': 2,
+    })
+    batch = _batch(
+        {'op': 'update_member', 'region_id': 10, 'member_id': 1, 'payload': {'name': 'Renamed', 'region_id': 10}},
+        {'op': 'get_member', 'region_id': 10, 'member_id': 1},
+        {'op': 'delete_member', 'region_id': 10, 'member_id': 99},
+        all_or_nothing=True,
+    )
+
+    committed, results = run_batch(batch.operations, all_or_nothing=batch.all_or_nothing)
+
+    update.assert_called_once_with(1, 10, {'name': 'Renamed'}, version=None)
+    assert results[1] == (200, mocker.ANY) and results[1][1]['name'] == 'Renamed'
+    assert results[1][1]['version'] == 2
+    assert results[2][0] == 404
+    assert not committed
@@ -0,0 +1,67 @@
+import asyncio
+import gzip
+import json
+from django.http import HttpResponse, StreamingHttpResponse
+from starterapp.middleware.CompressionMiddleware import (
+    CompressionMiddleware, GzipCodec, accepted_encodings, compress_async_stream,
+)
+
+MEMBERS = json.dumps([{'id': n, 'name': f'Member {n}', 'email': f'member{n}@example.com'} for n in range(200)]).encode()
+
+def _middleware(response, settings, routes=()):
+    settings.COMPRESSION_ENCODINGS = ('gzip',)
+    settings.COMPRESSION_MIN_SIZE = 1024
+    settings.COMPRESSION_ROUTES = routes
+    settings.COMPRESSION_STREAM_FLUSH_SIZE = 16 * 1024
+    return CompressionMiddleware(lambda request: response)
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_accepted_encodings():
+    """Test that codings refused with q=0 are not accepted"""
+    assert accepted_encodings('gzip;q=0, br, zstd;q=0.5') == {'br', 'zstd'}
+
+def test_unit_compression_threshold_and_routes(rf, settings):
+    """Test that large JSON is gzipped, small bodies are not, and routes can opt out"""
+    request = rf.get('/client/tenant1/api/members', HTTP_ACCEPT_ENCODING='gzip')
+
+    response = _middleware(HttpResponse(MEMBERS, content_type='application/json'), settings)(request)
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['Vary'] == 'Accept-Encoding'
+    assert gzip.decompress(response.content) == MEMBERS
+
+    small = _middleware(HttpResponse(b'{"id": 1}', content_type='application/json'), settings)(request)
+    assert not small.has_header('Content-Encoding')
+
+    routes = ((r'/api/members$', None),)
+    skipped = _middleware(HttpResponse(MEMBERS, content_type='application/json'), settings, routes)(request)
+    assert not skipped.has_header('Content-Encoding')
+
+def test_unit_compression_streaming(rf, settings):
+    """Test that streamed exports are flushed every COMPRESSION_STREAM_FLUSH_SIZE bytes, and short streams left alone"""
+    request = rf.get('/client/tenant1/api/members', HTTP_ACCEPT_ENCODING='gzip')
+    lines = [json.dumps({'id': n, 'name': f'Member {n}'}).encode() + b'\n' for n in range(3000)]
+
+    response = _middleware(StreamingHttpResponse(iter(lines), content_type='application/x-ndjson'), settings)(request)
+    chunks = list(response.streaming_content)
+    assert response['Content-Encoding'] == 'gzip'
+    # One flush per 16 KiB of rows, not one per row
+    assert 2 < len(chunks) < 20
+    assert gzip.decompress(b''.join(chunks)) == b''.join(lines)
+    assert len(b''.join(chunks)) < len(b''.join(lines)) / 4
+
+    response = _middleware(StreamingHttpResponse(iter(lines[:3]), content_type='application/x-ndjson'), settings)(request)
+    assert not response.has_header('Content-Encoding')
+    assert b''.join(response.streaming_content) == b''.join(lines[:3])
+
+def test_unit_compression_async_stream_flush_size():
+    """Test that an async stream is flushed once enough bytes have gone in, and finished after the last chunk"""
+    async def rows():
+        for n in range(10):
+            yield b'x' * 1000
+
+    async def collect():
+        return [data async for data in compress_async_stream(rows(), GzipCodec(5), 4000)]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) == 3
+    assert gzip.decompress(b''.join(chunks)) == b'x' * 10000
@@ -0,0 +1,65 @@
+from tenant_app.dedupe import (
+    blocking_keys, find_duplicates_in_memory, member_profile, rekey_changed_members, score_pair, soundex,
+)
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_blocking_keys_normalize():
+    """Test that email tags and case, phone formatting and name spelling collapse to the same keys"""
+    assert soundex('Robert') == soundex('Rupert') == 'R163'
+    assert soundex('Ashcraft') == 'A261'
+    assert blocking_keys('John  Smith', 'J.Smith+portal@GMail.com', '+1 (555) 123-4567') == [
+        ('email', 'jsmith@gmail.com'), ('phone', '5551234567'), ('name', 'S530j'),
+    ]
+    assert blocking_keys('', 'not-an-email', '123') == []
+
+def test_unit_score_pair_needs_name_and_contact():
+    """Test that a similar name plus a contact match scores above the threshold, and either alone does not"""
+    jane = member_profile('Jane Doe', 'jane@example.com', '555-000-1111')
+
+    assert score_pair(jane, member_profile('Jane Do', 'JANE+x@example.com', '')) >= 0.6
+    assert score_pair(jane, member_profile('Jane Doe', '', '555-000-1112'), 0.6) is not None
+    assert score_pair(jane, member_profile('Jane Doe', 'other@example.com', ''), 0.6) is None
+    assert score_pair(jane, member_profile('Bob Roe', 'jane@example.com', '5550001111'), 0.6) is None
+
+def test_unit_find_duplicates_in_memory_compares_within_blocks():
+    """Test that only members sharing a key are compared and duplicates are found"""
+    rows = [
+        (1, 'Jane Doe', 'jane@example.com', '555-000-1111'),
+        (2, 'Bob Roe', 'bob@example.com', '555-999-2222'),
+        (3, 'Jane Doe', 'jane+portal@example.com', ''),
+        (4, 'Ann Lee', 'ann@example.com', '555-333-4444'),
+    ]
+
+    found, compared = find_duplicates_in_memory(rows)
+
+    assert set(found) == {(1, 3)}
+    # 1 and 3 share the email and the name block; nobody else shares anything
+    assert compared == 2
+
+def test_unit_rekey_changed_members(mocker):
+    """Test that members changed since the last run lose their keys and candidates and are keyed and compared again"""
+    state = mocker.Mock(last_member_id=100, last_history_id=40)
+    state_objects = mocker.patch('tenant_app.dedupe.DedupeState.objects')
+    state_objects.get_or_create.return_value = (state, False)
+    mocker.patch('tenant_app.dedupe._last_history_id', return_value=55)
+    history = mocker.patch('tenant_app.dedupe.HistoryEntry.objects.filter')
+    history.return_value.order_by.return_value.values_list.return_value.distinct.return_value = [3, 7]
+    keys = mocker.patch('tenant_app.dedupe.MemberBlockKey.objects.filter')
+    candidates = mocker.patch('tenant_app.dedupe.DuplicateCandidate.objects.filter')
+    rows = [(3, 'Ann Lee', 'ann@example.com', '', None), (7, 'Bo Ray', '', '5551234567', None)]
+    mocker.patch('tenant_app.dedupe.Member.objects.filter').return_value.values_list.return_value = rows
+    mocker.patch('tenant_app.dedupe.transaction')
+    store_keys = mocker.patch('tenant_app.dedupe._store_keys', return_value=4)
+    blocked = mocker.patch('tenant_app.dedupe._blocked_pairs', return_value={(3, 9): 'email'})
+    mocker.patch('tenant_app.dedupe._store_candidates', return_value=1)
+
+    result = rekey_changed_members(batch_size=10)
+
+    lookup = history.call_args.kwargs
+    assert (lookup['id__gt'], lookup['id__lte'], lookup['object_id__lte']) == (40, 55, 100)
+    keys.assert_called_once_with(member_id__in=[3, 7])
+    assert keys.return_value.delete.called and candidates.return_value.delete.called
+    store_keys.assert_called_once_with(rows)
+    assert blocked.call_args.args[1] == [[3, 7]]
+    assert (result.rekeyed, result.keys, result.candidates) == (2, 4, 1)
+    state_objects.filter.return_value.update.assert_called_once_with(last_history_id=55)
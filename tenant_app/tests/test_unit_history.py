@@ -0,0 +1,42 @@
+from tenant_app import history
+from tenant_app.models import HistoryEntry
+
+def _entry(action, changes=None):
+    return HistoryEntry(entity=history.MEMBER, object_id=1, region_id=1, action=action, changes=changes or {})
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_fold_history_entries():
+    """Test that folding entries gives the state after them, starting over after a delete"""
+    entries = [
+        _entry(history.CREATE, {'name': 'Jane', 'phone': '555-0100', 'email': ''}),
+        _entry(history.UPDATE, {'phone': '555-0199'}),
+        _entry(history.UPDATE, {'email': 'jane@example.com'}),
+    ]
+    assert history.fold(entries) == (history.SNAPSHOT, {'name': 'Jane', 'phone': '555-0199', 'email': 'jane@example.com'})
+    assert history.fold(entries + [_entry(history.DELETE)]) == (history.DELETE, {})
+    assert history.fold([_entry(history.DELETE), _entry(history.CREATE, {'name': 'Joe'})]) == (history.SNAPSHOT, {'name': 'Joe'})
+
+def test_unit_batched_history_writes_once(mocker):
+    """Test that entries recorded in batched() are written with one bulk insert, and not at all on error"""
+    record_many = mocker.patch('tenant_app.history.record_many')
+    with history.batched():
+        history.record(history.REGION, 1, 1, history.CREATE, {'name': 'North'})
+        history.record(history.REGION, 2, 2, history.CREATE, {'name': 'South'})
+    record_many.assert_called_once()
+    assert [entry.object_id for entry in record_many.call_args.args[0]] == [1, 2]
+
+    record_many.reset_mock()
+    try:
+        with history.batched():
+            history.record(history.REGION, 3, 3, history.DELETE)
+            raise ValueError
+    except ValueError:
+        pass
+    record_many.assert_not_called()
+
+def test_unit_changes_sql_keeps_changed_fields_only():
+    """Test that the SQL diff compares each field with its old value and strips the unchanged ones"""
+    sql = history.changes_sql(('name', 'phone'), {'name': 's.name', 'phone': 's.phone'}, {'name': 'm.name', 'phone': 'm.phone'})
+    assert sql.startswith('jsonb_strip_nulls(jsonb_build_object(')
+    assert "'phone', CASE WHEN s.phone IS DISTINCT FROM m.phone THEN s.phone END" in sql
+    assert history.changes_sql(('name',), {'name': 's.name'}) == "jsonb_strip_nulls(jsonb_build_object('name', s.name))"
@@ -0,0 +1,51 @@
+import io
+import pytest
+from tenant_app.importer import _copy_value, import_members, read_records, validate_batch
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_read_records_csv_drops_empty_cells():
+    """Test that empty CSV cells are treated as missing fields"""
+    lines = io.StringIO("name,phone,email,region_id\nJane,,jane@example.com,1\n")
+
+    assert list(read_records(lines, 'csv')) == [
+        (2, {'name': 'Jane', 'email': 'jane@example.com', 'region_id': '1'}),
+    ]
+
+def test_unit_read_records_ndjson_keeps_invalid_lines():
+    """Test that unparseable NDJSON lines are passed on to be rejected, and blank lines skipped"""
+    lines = io.StringIO('{"name": "Jane", "region_id": 1}\n\n{not json\n')
+
+    assert list(read_records(lines, 'ndjson')) == [
+        (1, {'name': 'Jane', 'region_id': 1}),
+        (3, '{not json\n'),
+    ]
+
+def test_unit_validate_batch_splits_valid_and_rejected():
+    """Test that one batch validation call reports every invalid row with its line"""
+    batch = [
+        (2, {'name': 'Jane', 'region_id': '1'}),
+        (3, {'name': 'No Region'}),
+        (4, {'id': 'abc', 'name': 'Bad Id', 'region_id': 1}),
+        (5, {'id': 7, 'name': 'John', 'region_id': 2, 'phone': '555'}),
+    ]
+
+    valid, rejected = validate_batch(batch)
+
+    assert [(line, row.name, row.region_id) for line, row in valid] == [(2, 'Jane', 1), (5, 'John', 2)]
+    assert [line for line, _ in rejected] == [3, 4]
+    assert rejected[0][1].startswith('region_id:')
+    assert rejected[1][1].startswith('id:')
+
+def test_unit_copy_value_escapes_text_format():
+    """Test that values are escaped for COPY's text format"""
+    assert _copy_value(None) == r'\N'
+    assert _copy_value('a\tb\nc\\d') == r'a\tb\nc\\d'
+    assert _copy_value(42) == '42'
+
+def test_unit_import_refused_on_pool_schema(mocker, settings):
+    """Test that the importer refuses the pool schema, whose rows would lack client keys"""
+    settings.TENANT_POOL_SCHEMA = 'pool'
+    mocker.patch('tenant_app.importer.connection').schema_name = 'pool'
+
+    with pytest.raises(ValueError):
+        import_members(['name,email,phone,region_id'])
@@ -0,0 +1,133 @@
+import threading
+import time
+from datetime import datetime, timezone
+import pytest
+from shared_app.lifecycle import CloneAborted, CopyPipe, drop_tenant, get_job, rename_tenant, run_job, tombstone_name
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_copy_pipe_streams_between_threads():
+    """Test that everything written on one thread is read back in order on another"""
+    pipe = CopyPipe(max_chunks=2)
+    chunks = [bytes([i]) * 1000 for i in range(50)]
+
+    def writer():
+        for chunk in chunks:
+            pipe.write(chunk)
+        pipe.close_writer()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    received = b''
+    while data := pipe.read(8192):
+        received += data
+    thread.join()
+
+    assert received == b''.join(chunks)
+    assert pipe.bytes == len(received)
+
+def test_unit_copy_pipe_propagates_writer_error():
+    """Test that a failure on the reading connection surfaces on the writing side"""
+    pipe = CopyPipe()
+    pipe.write(b'partial')
+    pipe.close_writer(error=RuntimeError("source gone"))
+
+    assert pipe.read(100) == b'partial'
+    assert pipe.read(100) == b''
+    with pytest.raises(RuntimeError):
+        pipe.raise_for_error()
+
+def test_unit_copy_pipe_aborted_stops_writer():
+    """Test that the writer gives up instead of blocking once the reader has failed"""
+    pipe = CopyPipe(max_chunks=1)
+    pipe.aborted = True
+
+    with pytest.raises(CloneAborted):
+        pipe.write(b'data')
+
+def test_unit_tombstone_name_is_a_valid_schema_name():
+    """Test that schemas being dropped get a prefixed name within PostgreSQL's limit"""
+    name = tombstone_name('t' * 63)
+
+    assert name.startswith('_drop_')
+    assert len(name) <= 63
+
+def test_unit_drop_frees_the_schema_after_cached_tenants_expire(mocker):
+    """Test that a dropped tenant's schema keeps its name, marked as dropping, until every worker's cache has expired"""
+    mocker.patch('shared_app.lifecycle.TENANT_CACHE_SECONDS', 60)
+    mocker.patch('shared_app.lifecycle.transaction')
+    connection = mocker.patch('shared_app.lifecycle.connection')
+    connection.ops.quote_name = lambda name: f'"{name}"'
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.return_value = []
+    steps = []
+    cursor.execute.side_effect = lambda sql, params=None: steps.append(sql)
+    mocker.patch('time.sleep', side_effect=lambda seconds: steps.append(f'sleep {seconds}'))
+    tenant = mocker.Mock(is_pooled=False, schema_name='acme')
+    tenant.delete.side_effect = lambda: steps.append('delete')
+
+    drop_tenant(tenant)
+
+    assert steps[:3] == ['COMMENT ON SCHEMA "acme" IS %s', 'delete', 'sleep 60']
+    assert steps[3].startswith('ALTER SCHEMA "acme" RENAME TO "_drop_')
+
+def test_unit_rename_waits_for_cached_tenants(mocker):
+    """Test that a rename clears the tenant cache and returns only once other workers' entries have expired"""
+    mocker.patch('shared_app.lifecycle.TENANT_CACHE_SECONDS', 60)
+    mocker.patch('shared_app.lifecycle.validate_rename_target')
+    mocker.patch('shared_app.lifecycle.connection')
+    clear = mocker.patch('shared_app.lifecycle.clear_tenant_cache')
+    sleep = mocker.patch('time.sleep')
+    tenant = mocker.Mock(is_pooled=True, schema_name='tiny')
+
+    rename_tenant(tenant, 'acme', wait=False)
+    assert not sleep.called
+
+    events = []
+    rename_tenant(tenant, 'acme2', progress=events.append)
+    sleep.assert_called_once_with(60)
+    assert clear.called and tenant.schema_name == 'acme2'
+    assert [event['step'] for event in events] == ['renamed', 'caches']
+
+def test_unit_run_job_writes_heartbeats_until_done(mocker):
+    """Test that a running job's row is written while the operation waits, and records its outcome"""
+    mocker.patch('shared_app.lifecycle.JOB_HEARTBEAT_SECONDS', 0.01)
+    mocker.patch('shared_app.lifecycle.connection')
+    jobs = mocker.patch('shared_app.lifecycle.LifecycleJob')
+    client = mocker.patch('shared_app.lifecycle.Client')
+    operation = mocker.Mock(side_effect=lambda tenant, progress, **args: time.sleep(0.1))
+    mocker.patch.dict('shared_app.lifecycle.JOB_KINDS', {'drop': operation})
+    job = mocker.Mock(pk='abc', kind='drop', args={'client_id': 7, 'pause': 1})
+
+    run_job(job)
+
+    client.all_tenants.get.assert_called_once_with(pk=7)
+    operation.assert_called_once_with(client.all_tenants.get.return_value, progress=mocker.ANY, pause=1)
+    updates = [call.kwargs for call in jobs.objects.filter.return_value.update.call_args_list]
+    assert any(update.keys() == {'updated_at'} for update in updates[:-1])
+    assert updates[-1]['status'] == 'done'
+
+def test_unit_run_job_records_failure(mocker):
+    """Test that an operation's exception marks the job failed with its message"""
+    mocker.patch('shared_app.lifecycle.connection')
+    jobs = mocker.patch('shared_app.lifecycle.LifecycleJob')
+    mocker.patch('shared_app.lifecycle.Client')
+    mocker.patch.dict('shared_app.lifecycle.JOB_KINDS', {'clone': mocker.Mock(side_effect=ValueError("schema exists"))})
+
+    run_job(mocker.Mock(pk='abc', kind='clone', args={'client_id': 7}))
+
+    jobs.objects.filter.return_value.update.assert_called_with(
+        updated_at=mocker.ANY, status='failed', error='schema exists'
+    )
+
+def test_unit_get_job_fails_jobs_without_heartbeat(mocker):
+    """Test that polling a running job whose heartbeat is too old reports it failed"""
+    mocker.patch('shared_app.lifecycle.JOB_HEARTBEAT_TIMEOUT', 120)
+    mocker.patch('shared_app.lifecycle.timezone.now', return_value=datetime(2026, 3, 5, 12, 0, tzinfo=timezone.utc))
+    jobs = mocker.patch('shared_app.lifecycle.LifecycleJob')
+
+    job = get_job('abc')
+
+    stale = jobs.objects.filter.call_args_list[0]
+    assert stale.kwargs == {'pk': 'abc', 'status': 'running', 'updated_at__lt': datetime(2026, 3, 5, 11, 58, tzinfo=timezone.utc)}
+    assert jobs.objects.filter.return_value.update.call_args.kwargs['status'] == 'failed'
+    assert job == jobs.objects.filter.return_value.first.return_value
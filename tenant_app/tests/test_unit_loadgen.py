@@ -0,0 +1,64 @@
+import asyncio
+import random
+from shared_app.loadgen import TenantTarget, mix_weights, pick, read_response, run_load, zipf_weights
+
+def _tenant(name):
+    return TenantTarget(name, name, region_ids=[1, 2], member_ids=[(1, 10), (2, 20)])
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_zipf_tenant_popularity_is_skewed():
+    """Test that the most popular tenant gets far more picks than the least popular one"""
+    tenants = list(range(10))
+    weights = zipf_weights(len(tenants), s=1.1)
+    rng = random.Random(1)
+
+    picks = [pick(tenants, weights, rng) for _ in range(10_000)]
+
+    assert picks.count(0) > 5 * picks.count(9)
+    _, flat = mix_weights({'get_member': 1, 'list_regions': 1})
+    assert flat == [1, 2]
+
+def test_unit_read_response_handles_chunked_and_length():
+    """Test that both Content-Length and chunked responses are framed correctly"""
+    async def parse(raw):
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await read_response(reader)
+
+    status, _, body = asyncio.run(parse(b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n[]'))
+    assert (status, body) == (200, b'[]')
+    status, headers, body = asyncio.run(
+        parse(b'HTTP/1.1 404 Not Found\r\nTransfer-Encoding: chunked\r\n\r\n3\r\nabc\r\n2\r\nde\r\n0\r\n\r\n')
+    )
+    assert (status, body, headers['transfer-encoding']) == (404, b'abcde', 'chunked')
+
+def test_unit_run_load_reports_latency_and_errors():
+    """Test a short run against a local server that fails every member lookup"""
+    async def handle(reader, writer):
+        while True:
+            try:
+                request = await reader.readuntil(b'\r\n\r\n')
+            except asyncio.IncompleteReadError:
+                return writer.close()
+            length = int(request.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+            await reader.readexactly(length)
+            status = b'500 Internal Server Error' if b'/members/' in request else b'200 OK'
+            writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Length: 2\r\n\r\n{}')
+            await writer.drain()
+
+    async def scenario():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await run_load(
+                f'http://127.0.0.1:{port}', [_tenant('a'), _tenant('b')],
+                mix={'get_member': 1, 'list_regions': 1}, concurrency=4, duration=0.3, seed=7,
+            )
+
+    summary = asyncio.run(scenario()).summary()
+
+    assert summary['total']['requests'] > 10
+    assert summary['operations']['get_member']['error_rate'] == 1.0
+    assert summary['operations']['list_regions']['errors'] == 0
+    assert summary['total']['p99_ms'] >= summary['total']['p50_ms'] > 0
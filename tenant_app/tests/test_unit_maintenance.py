@@ -0,0 +1,73 @@
+from tenant_app import maintenance
+from tenant_app.maintenance import TableHealth, analyze_after_bulk_write, analyze_in_background, maintain
+from tenant_app.models import Member
+
+def _health(table, live, dead, modified, analyzed=True, parent=None):
+    return TableHealth(table, live, dead, modified, 'yesterday' if analyzed else None, None, 8192 * 100, parent)
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_table_health_needed_action():
+    """Test that dead tuples trigger VACUUM, stale statistics ANALYZE, and small tables nothing"""
+    assert _health('bloated', 10_000, 5_000, 0).needed_action() == 'VACUUM'
+    assert _health('stale', 10_000, 0, 2_000).needed_action() == 'ANALYZE'
+    assert _health('never_analyzed', 10_000, 0, 0, analyzed=False).needed_action() == 'ANALYZE'
+    assert _health('healthy', 10_000, 100, 100).needed_action() is None
+    assert _health('tiny', 10, 90, 10).needed_action() is None
+
+def test_unit_maintain_analyzes_partitioned_parent(mocker):
+    """Test that a maintained partition also gets its parent ANALYZEd, and dry runs execute nothing"""
+    run = mocker.patch('tenant_app.maintenance.run_maintenance')
+    tables = [
+        _health('tenant_app_member_p2026_01', 10_000, 5_000, 0, parent='tenant_app_member'),
+        _health('tenant_app_region', 10_000, 0, 0),
+    ]
+
+    report = maintain(tables, dry_run=True)
+    assert [action for _, action in report] == ['VACUUM', None]
+    assert not run.called
+
+    maintain(tables, connection=mocker.sentinel.connection)
+    assert [call.args for call in run.call_args_list] == [
+        ('tenant_app_member_p2026_01', 'VACUUM', mocker.sentinel.connection),
+        ('tenant_app_member', 'ANALYZE', mocker.sentinel.connection),
+    ]
+
+def test_unit_analyze_after_bulk_write_threshold(mocker):
+    """Test that ANALYZE, and the GIN pending-list cleanup after it, only run when the write is large relative to the table estimate"""
+    connection = mocker.MagicMock()
+    connection.ops.quote_name = lambda name: f'"{name}"'
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (100_000,)
+
+    assert not analyze_after_bulk_write(Member, 500, connection=connection)
+    assert analyze_after_bulk_write(Member, 50_000, connection=connection)
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert statements[-2] == 'ANALYZE "tenant_app_member"'
+    assert 'gin_clean_pending_list' in statements[-1]
+    assert not analyze_after_bulk_write(Member, 0, connection=connection)
+
+def test_unit_analyze_after_bulk_write_never_analyzed_table(mocker):
+    """Test that a table without an estimate is only analyzed for a write of at least MIN_ROWS rows"""
+    connection = mocker.MagicMock()
+    connection.ops.quote_name = lambda name: f'"{name}"'
+    mocker.patch('tenant_app.maintenance.estimated_row_count', return_value=0)
+    mocker.patch('tenant_app.maintenance.clean_gin_pending_lists')
+
+    assert not analyze_after_bulk_write(Member, maintenance.MIN_ROWS - 1, connection=connection)
+    assert analyze_after_bulk_write(Member, maintenance.MIN_ROWS, connection=connection)
+
+def test_unit_analyze_in_background_after_commit_and_merged(mocker):
+    """Test that request-path ANALYZE waits for the commit and queues a table once, adding up the rows"""
+    mocker.patch.object(maintenance, '_pending', {})
+    put = mocker.patch.object(maintenance._queue, 'put')
+    mocker.patch.object(maintenance, '_worker', mocker.Mock())
+    connection = mocker.Mock(schema_name='tenant1')
+
+    analyze_in_background(Member, 500, connection=connection)
+    analyze_in_background(Member, 700, connection=connection)
+    assert not put.called
+    for call in connection.on_commit.call_args_list:
+        call.args[0]()
+
+    put.assert_called_once_with(('tenant1', 'tenant_app.Member'))
+    assert maintenance._pending[('tenant1', 'tenant_app.Member')][0] == 1200
@@ -0,0 +1,33 @@
+import json
+import pytest
+from tenant_app.api import FieldSelectionError, member_list_response, parse_fields
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_parse_fields():
+    """Test that fields= keeps the requested order, drops duplicates and rejects unknown names"""
+    assert parse_fields(None) is None
+    assert parse_fields('name, id,name') == ['name', 'id']
+    with pytest.raises(FieldSelectionError, match='region_secret'):
+        parse_fields('id,region_secret')
+    with pytest.raises(FieldSelectionError):
+        parse_fields(',')
+
+def test_unit_member_list_response_projects_columns(mocker, rf):
+    """Test that a field selection narrows the query to those columns, in both formats"""
+    queryset = mocker.MagicMock()
+    queryset.values.return_value = [{'id': 1, 'name': 'Jane'}]
+    queryset.values_list.return_value = [(1, 'Jane'), (2, 'John')]
+    request = rf.get('/')
+
+    assert member_list_response(request, queryset, None, 'json') is queryset
+
+    response = member_list_response(request, queryset, 'id,name', 'json')
+    queryset.values.assert_called_once_with('id', 'name')
+    assert json.loads(response.content) == [{'id': 1, 'name': 'Jane'}]
+
+    response = member_list_response(request, queryset, 'id,name', 'columnar')
+    queryset.values_list.assert_called_once_with('id', 'name')
+    assert json.loads(response.content) == {'columns': ['id', 'name'], 'rows': [[1, 'Jane'], [2, 'John']]}
+
+    with pytest.raises(FieldSelectionError):
+        member_list_response(request, queryset, None, 'xml')
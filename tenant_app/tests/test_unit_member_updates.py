@@ -0,0 +1,70 @@
+from datetime import datetime, timezone
+import pytest
+from django.db.models import F
+from tenant_app.api import patch_member
+from tenant_app.models import Member
+from tenant_app.schemas import MemberPatchSchema
+from tenant_app.updates import VersionConflict, update_member_fields
+
+ROW = (1, 'Jane', '555', 'jane@example.com', datetime(2026, 1, 1, tzinfo=timezone.utc), 4)
+
+@pytest.fixture
+def cursor(mocker):
+    connection = mocker.patch('tenant_app.updates.connection')
+    connection.ops.quote_name.side_effect = lambda name: f'"{name}"'
+    return connection.cursor.return_value.__enter__.return_value
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_update_writes_changed_columns_and_returns_row(cursor):
+    """Test that an update is one UPDATE ... RETURNING of the changed columns, guarded by the version and logged to history"""
+    cursor.fetchone.return_value = ROW
+
+    row = update_member_fields(1, 10, {'email': 'jane@example.com'}, version=3)
+
+    cursor.execute.assert_called_once()
+    sql, params = cursor.execute.call_args.args
+    assert 'WHERE "id" = %s AND "region_id" = %s AND "version" = %s FOR UPDATE' in sql
+    assert 'SET "email" = %s, "version" = m."version" + 1' in sql
+    assert '"name" =' not in sql and 'RETURNING' in sql
+    assert 'INSERT INTO "tenant_app_history"' in sql and 'IS DISTINCT FROM u.old_email' in sql
+    assert params == [1, 10, 3, 'jane@example.com', 'member', 'update']
+    assert row['version'] == 4 and row['name'] == 'Jane'
+
+def test_unit_update_tells_conflict_from_missing(cursor):
+    """Test that a stale version raises VersionConflict with the current one, and a missing member DoesNotExist"""
+    cursor.fetchone.side_effect = [None, (7,)]
+    with pytest.raises(VersionConflict) as conflict:
+        update_member_fields(1, 10, {'name': 'Jane'}, version=3)
+    assert conflict.value.current_version == 7
+
+    cursor.fetchone.side_effect = [None, None]
+    with pytest.raises(Member.DoesNotExist):
+        update_member_fields(1, 10, {'name': 'Jane'}, version=3)
+
+def test_unit_patch_member_sends_only_given_fields(mocker):
+    """Test that PATCH passes on only the fields present in the body, and rejects an empty one"""
+    update = mocker.patch('tenant_app.api.update_member_fields', return_value={'id': 1})
+
+    assert patch_member(None, 10, 1, MemberPatchSchema(phone='555', version=3)) == {'id': 1}
+    update.assert_called_once_with(1, 10, {'phone': '555'}, version=3)
+
+    status, body = patch_member(None, 10, 1, MemberPatchSchema(version=3))
+    assert status == 400
+
+def test_unit_orm_save_bumps_version(mocker):
+    """Test that saving an existing member through the ORM, as the admin does, bumps its version in the UPDATE"""
+    saved_versions = []
+    save = mocker.patch('tenant_app.tenancy.SchemaAwareTenantModel.save', autospec=True,
+                        side_effect=lambda member, **kwargs: saved_versions.append(member.version))
+    refresh = mocker.patch.object(Member, 'refresh_from_db', autospec=True,
+                                  side_effect=lambda member, fields: setattr(member, 'version', 4))
+    member = Member(id=1, region_id=10, name='Jane')
+
+    member.save()
+    assert saved_versions == [1] and not refresh.called
+
+    member._state.adding = False
+    member.save(update_fields=['name'])
+    assert str(saved_versions[1]) == str(F('version') + 1)
+    assert save.call_args.kwargs['update_fields'] == {'name', 'version'}
+    assert member.version == 4
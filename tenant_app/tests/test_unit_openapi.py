@@ -0,0 +1,41 @@
+from django.test import RequestFactory
+from tenant_app.api import api
+from starterapp.openapi import openapi_json
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_openapi_schema_is_generated_once(mocker):
+    """Test that the base document is built once and reused for every prefix"""
+    api._base_openapi_schema = None
+    generate = mocker.spy(api, 'generate_openapi_schema')
+
+    api.get_openapi_schema(path_prefix='/client/one/api/')
+    api.get_openapi_schema(path_prefix='/client/two/api/')
+
+    generate.assert_called_once()
+
+def test_unit_openapi_schema_is_prefixed_per_tenant():
+    """Test that the tenant subfolder is patched into every path"""
+    schema = api.get_openapi_schema(path_prefix='/client/tenant1/api/')
+
+    assert '/client/tenant1/api/members' in schema['paths']
+    assert all(key.startswith('/client/tenant1/api/') for key in schema['paths'])
+    # The cached base document itself is left untouched
+    assert '/members' in api.get_base_openapi_schema()['paths']
+
+def test_unit_openapi_view_etag():
+    """Test that the view sends an ETag and answers a matching If-None-Match with 304"""
+    factory = RequestFactory()
+    url = '/client/tenant1/api/openapi.json'
+
+    response = openapi_json(factory.get(url), api=api)
+    etag = response['ETag']
+
+    assert response.status_code == 200
+    assert b'/client/tenant1/api/members' in response.content
+
+    cached = openapi_json(factory.get(url, HTTP_IF_NONE_MATCH=etag), api=api)
+    assert cached.status_code == 304
+
+    # A different tenant gets a different document and ETag
+    other = openapi_json(factory.get('/client/tenant2/api/openapi.json'), api=api)
+    assert other['ETag'] != etag
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+from tenant_app.api import list_members
+from tenant_app.partitioning import (
+    DEFAULT_PARTITION, add_months, ensure_member_partitions, legacy_upper_bound, monthly_ranges,
+)
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_add_months_rolls_over_year():
+    """Test month arithmetic across a year boundary"""
+    start = datetime(2025, 11, 1, tzinfo=timezone.utc)
+
+    assert add_months(start, 1) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+    assert add_months(start, 2) == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert add_months(start, 14) == datetime(2027, 1, 1, tzinfo=timezone.utc)
+
+def test_unit_monthly_ranges_are_contiguous():
+    """Test that monthly partitions start at the month boundary and do not overlap"""
+    ranges = monthly_ranges(datetime(2025, 12, 17, 13, 45, tzinfo=timezone.utc), 3)
+
+    assert [name for name, _, _ in ranges] == [
+        'tenant_app_member_p2025_12',
+        'tenant_app_member_p2026_01',
+        'tenant_app_member_p2026_02',
+    ]
+    assert ranges[0][1] == datetime(2025, 12, 1, tzinfo=timezone.utc)
+    for (_, _, upper), (_, lower, _) in zip(ranges, ranges[1:]):
+        assert upper == lower
+
+def test_unit_legacy_upper_bound_covers_newest_member():
+    """Test that the legacy partition ends after the month of its newest row, and no earlier than this month"""
+    now = datetime(2026, 3, 5, tzinfo=timezone.utc)
+
+    assert legacy_upper_bound(None, now) == datetime(2026, 3, 1, tzinfo=timezone.utc)
+    assert legacy_upper_bound(datetime(2025, 7, 9, tzinfo=timezone.utc), now) == datetime(2026, 3, 1, tzinfo=timezone.utc)
+    assert legacy_upper_bound(datetime(2026, 3, 4, 23, 59, tzinfo=timezone.utc), now) == datetime(2026, 4, 1, tzinfo=timezone.utc)
+
+def test_unit_list_members_excludes_archive_by_default(mocker):
+    """Test that archived members are only read when explicitly requested"""
+    mock_all = mocker.patch('tenant_app.api.Member.objects.all')
+    mock_archive = mocker.patch('tenant_app.api.ArchivedMember.objects.values')
+
+    list_members(None)
+
+    mock_all.assert_called_once()
+    mock_archive.assert_not_called()
+
+def test_unit_list_members_include_archived(mocker):
+    """Test that include_archived unions the archive table into the listing"""
+    mock_values = mocker.patch('tenant_app.api.Member.objects.values')
+    mock_archive = mocker.patch('tenant_app.api.ArchivedMember.objects.values')
+
+    result = list_members(None, include_archived=True)
+
+    mock_archive.assert_called_once_with('id', 'name', 'phone', 'email', 'created_at', 'version')
+    mock_values.return_value.union.assert_called_once_with(mock_archive.return_value, all=True)
+    assert result == mock_values.return_value.union.return_value
+
+def test_unit_ensure_partitions_moves_rows_out_of_default(mocker):
+    """Test that a missing DEFAULT partition is created, and a month with rows in it is attached after moving them"""
+    mocker.patch('tenant_app.partitioning.is_partitioned', return_value=True)
+    mocker.patch('tenant_app.partitioning.member_partitions', return_value=[])
+    mocker.patch('tenant_app.partitioning.transaction')
+    mocker.patch('tenant_app.partitioning.timezone.now', return_value=datetime(2026, 3, 5, tzinfo=timezone.utc))
+    connection = mocker.MagicMock()
+    connection.ops.quote_name = lambda name: f'"{name}"'
+    cursor = connection.cursor.return_value.__enter__.return_value
+    # Only March has rows waiting in the DEFAULT partition
+    cursor.fetchone.side_effect = [(True,), (False,)]
+
+    created = ensure_member_partitions(months_ahead=1, connection=connection)
+
+    assert created == [DEFAULT_PARTITION, 'tenant_app_member_p2026_03', 'tenant_app_member_p2026_04']
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert statements[0] == f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "tenant_app_member" DEFAULT'
+    assert any(s.startswith('CREATE TABLE "tenant_app_member_p2026_03" (LIKE') for s in statements)
+    assert any('ATTACH PARTITION "tenant_app_member_p2026_03"' in s for s in statements)
+    assert any(s.startswith('CREATE TABLE "tenant_app_member_p2026_04" PARTITION OF') for s in statements)
+    assert sum('CREATE UNIQUE INDEX' in s for s in statements) == 3
+
+def test_unit_ensure_partitions_skips_months_in_legacy(mocker):
+    """Test that months already covered by the legacy partition are not created again"""
+    mocker.patch('tenant_app.partitioning.is_partitioned', return_value=True)
+    mocker.patch('tenant_app.partitioning.member_partitions', return_value=[
+        ('tenant_app_member_legacy', datetime(2026, 4, 1, tzinfo=timezone.utc)),
+        (DEFAULT_PARTITION, None),
+    ])
+    mocker.patch('tenant_app.partitioning.transaction')
+    mocker.patch('tenant_app.partitioning.timezone.now', return_value=datetime(2026, 3, 5, tzinfo=timezone.utc))
+    connection = mocker.MagicMock()
+    connection.ops.quote_name = lambda name: f'"{name}"'
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (False,)
+
+    created = ensure_member_partitions(months_ahead=1, connection=connection)
+
+    assert created == ['tenant_app_member_p2026_04']
@@ -0,0 +1,92 @@
+import pytest
+from django.db import IntegrityError
+from django.test import RequestFactory
+from shared_app.lifecycle import pooled_tables
+from shared_app.models import Client
+from starterapp.middleware.PoolMiddleware import PooledTenantSubfolderMiddleware
+from tenant_app.models import ArchivedMember, Member, Region
+from tenant_app.tenancy import pooled_bulk_create, pooled_client, pooled_client_key, set_pooled_client_key
+
+def compiled_sql(queryset):
+    sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    return sql, params
+
+# --- Unit Tests (no DB interaction) ---
+@pytest.mark.parametrize('schema_only', [False, True])
+def test_unit_pooled_client_scopes_queries(settings, schema_only):
+    """Test that every pooled model is filtered on client_key only while a client key is set"""
+    settings.TENANT_SCHEMA_ONLY = schema_only
+
+    assert '"client_key" = %s' not in compiled_sql(Member.objects.all())[0]
+    with pooled_client(7):
+        for queryset in (Member.objects.all(), Region.objects.filter(id=1), ArchivedMember.objects.all()):
+            sql, params = compiled_sql(queryset)
+            assert '"client_key" = %s' in sql
+            assert 7 in params
+    assert pooled_client_key() is None
+
+def test_unit_pooled_rows_tagged_and_owned(mocker):
+    """Test that created rows get the client key, and rows of another pooled tenant are refused"""
+    create = mocker.Mock(side_effect=lambda objs, **kwargs: objs)
+    with pooled_client(7):
+        created = pooled_bulk_create(create, Region, [Region(id=1, name='North'), Region(id=2, name='South')])
+        with pytest.raises(IntegrityError):
+            Region(id=3, name='West', client_key=8).save()
+
+    assert [region.client_key for region in created] == [7, 7]
+
+def test_unit_pooled_tenant_routed_to_pool_schema(settings, mocker):
+    """Test that a pooled tenant's request runs on the pool schema, scoped to its client key"""
+    settings.TENANT_POOL_SCHEMA = 'pool'
+    tenant = Client(id=5, schema_name='small', is_pooled=True)
+
+    def resolve(self, request):
+        tenant.domain_subfolder = 'small'
+        request.tenant = tenant
+
+    mocker.patch('django_tenants.middleware.TenantSubfolderMiddleware.process_request', resolve)
+    connection = mocker.patch('starterapp.middleware.PoolMiddleware.connection')
+    middleware = PooledTenantSubfolderMiddleware(lambda request: None)
+    try:
+        middleware.process_request(RequestFactory().get('/client/small/api/members'))
+        assert pooled_client_key() == 5
+        pool = connection.set_tenant.call_args.args[0]
+        assert (pool.schema_name, pool.domain_subfolder) == ('pool', 'small')
+
+        tenant.is_pooled = False
+        middleware.process_request(RequestFactory().get('/client/small/api/members'))
+        assert pooled_client_key() is None
+    finally:
+        set_pooled_client_key(None)
+
+def test_unit_pooled_tenant_refused_session_routes(settings, mocker):
+    """Test that a pooled tenant's admin is not served, since its users and sessions would be the pool's"""
+    settings.TENANT_POOL_SCHEMA = 'pool'
+    tenant = Client(id=5, schema_name='small', is_pooled=True)
+
+    def resolve(self, request):
+        tenant.domain_subfolder = 'small'
+        request.tenant = tenant
+
+    mocker.patch('django_tenants.middleware.TenantSubfolderMiddleware.process_request', resolve)
+    connection = mocker.patch('starterapp.middleware.PoolMiddleware.connection')
+    middleware = PooledTenantSubfolderMiddleware(lambda request: None)
+    try:
+        response = middleware.process_request(RequestFactory().post('/client/small/admin/login/'))
+        assert response.status_code == 404
+        assert not connection.set_tenant.called and pooled_client_key() is None
+
+        tenant.is_pooled = False
+        assert middleware.process_request(RequestFactory().get('/client/small/admin/')) is None
+    finally:
+        set_pooled_client_key(None)
+
+def test_unit_pooled_tables_children_first():
+    """Test that promotion copies every pooled table without client_key, deleting members before regions"""
+    tables = {model: columns for model, columns in pooled_tables()}
+    models = [model for model, _ in pooled_tables()]
+
+    assert set(tables) >= {Member, Region, ArchivedMember}
+    assert models.index(Member) < models.index(Region)
+    assert all('client_key' not in columns for columns in tables.values())
+    assert 'region_id' in tables[Member]
@@ -0,0 +1,68 @@
+import json
+from types import SimpleNamespace
+from starterapp.querylog import SlowQueryBuffer, SlowQueryLogger, explain, query_shape, request_context
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_query_shape_groups_literals_and_in_lists():
+    """Test that queries differing only in literals or IN list length share a shape"""
+    one = query_shape('SELECT * FROM "m" WHERE "id" IN (%s, %s) AND "name" = \'x\' LIMIT 21')
+    two = query_shape('SELECT *\n FROM "m" WHERE "id" IN (%s, %s, %s) AND "name" = \'y\' LIMIT 5')
+
+    assert one == two == 'SELECT * FROM "m" WHERE "id" IN (...) AND "name" = ? LIMIT ?'
+    assert query_shape('SELECT 1 FROM "tenant_app_member_p2024_01"').endswith('"tenant_app_member_p2024_01"')
+
+def test_unit_buffer_keeps_slowest_shapes_per_schema():
+    """Test that a full buffer evicts its fastest shape and aggregates repeated shapes"""
+    buffer = SlowQueryBuffer(top_n=2)
+    buffer.record('tenant1', 'SELECT 1 FROM a', 300)
+    buffer.record('tenant1', 'SELECT 1 FROM b', 500)
+    buffer.record('tenant1', 'SELECT 2 FROM b', 700)
+    buffer.record('tenant1', 'SELECT 1 FROM c', 400)  # evicts the shape on a
+    buffer.record('tenant1', 'SELECT 1 FROM d', 100)  # faster than everything kept
+    buffer.record('tenant2', 'SELECT 1 FROM a', 50)
+
+    stats = {(s.schema_name, s.sql): s for s in buffer.drain()}
+
+    assert set(stats) == {('tenant1', 'SELECT ? FROM b'), ('tenant1', 'SELECT ? FROM c'), ('tenant2', 'SELECT ? FROM a')}
+    assert stats['tenant1', 'SELECT ? FROM b'].calls == 2
+    assert stats['tenant1', 'SELECT ? FROM b'].max_ms == 700
+    assert buffer.drain() == []
+
+def test_unit_slow_query_logged_with_request_context(settings, mocker):
+    """Test that a query over the threshold is logged with schema, route and request id"""
+    settings.SLOW_QUERY_THRESHOLD_MS = 0
+    settings.SLOW_QUERY_EXPLAIN_RATE = 0
+    log = mocker.patch('starterapp.querylog.logger')
+    record = mocker.patch('starterapp.querylog.buffer.record')
+    connection = SimpleNamespace(schema_name='tenant1')
+    execute = mocker.Mock(return_value='result')
+
+    token = request_context.set({'request_id': 'abc123', 'route': 'api/members'})
+    try:
+        result = SlowQueryLogger()(execute, 'SELECT 1', None, False, {'connection': connection})
+    finally:
+        request_context.reset(token)
+
+    assert result == 'result'
+    entry = json.loads(log.warning.call_args[0][0])
+    assert (entry['schema'], entry['route'], entry['request_id']) == ('tenant1', 'api/members', 'abc123')
+    assert record.call_args.args[0] == 'tenant1'
+
+def test_unit_fast_query_not_logged(settings, mocker):
+    """Test that queries under the threshold are not logged"""
+    settings.SLOW_QUERY_THRESHOLD_MS = 10_000
+    log = mocker.patch('starterapp.querylog.logger')
+
+    SlowQueryLogger()(mocker.Mock(), 'SELECT 1', None, False, {'connection': None})
+
+    assert not log.warning.called
+
+def test_unit_explain_does_not_execute_the_query(mocker):
+    """Test that the sampled plan comes from a plain EXPLAIN, which does not run the query again"""
+    connection = mocker.MagicMock()
+    connection.get_autocommit.return_value = True
+    cursor = connection.connection.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = ([{'Plan': {}}],)
+
+    assert explain(connection, "SELECT nextval('member_id_seq')", None) == [{'Plan': {}}]
+    assert cursor.execute.call_args.args[0] == "EXPLAIN (FORMAT JSON) SELECT nextval('member_id_seq')"
@@ -0,0 +1,52 @@
+from importlib import import_module
+import pytest
+from tenant_app.search import parse_cursor, search_members, search_terms
+from tenant_app.tenancy import pooled_client
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_search_terms():
+    """Test that queries split into lower-cased words, and phone-like queries into their digits"""
+    assert search_terms("Jane O'Brien") == ['jane', 'o', 'brien']
+    assert search_terms('jane.doe@exa') == ['jane', 'doe', 'exa']
+    assert search_terms('+1 (555) 123-45') == ['155512345']
+    assert search_terms(' - ') == []
+
+def test_unit_search_query_scoped_and_paged(mocker):
+    """Test that a search is ranked, scoped to the pooled client and resumed after the cursor's rank and id"""
+    fetch = mocker.patch(
+        'django.db.models.query.QuerySet._fetch_all', autospec=True,
+        side_effect=lambda queryset: setattr(queryset, '_result_cache', []),
+    )
+    with pooled_client(7):
+        search_members('jane', after='0.25:40', limit=10)
+    queryset = fetch.call_args.args[0]
+    sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+
+    assert '"search") @@ (to_tsquery(' in sql
+    assert 'ORDER BY' in sql and 'DESC' in sql
+    assert '"client_key" = %s' in sql
+    assert {'jane:*', 7, 0.25, 40} <= set(params)
+
+    with pytest.raises(ValueError):
+        search_members('--')
+    with pytest.raises(ValueError):
+        parse_cursor('not-a-cursor')
+
+def test_unit_search_index_built_concurrently_per_partition(mocker):
+    """Test that migration 0011 indexes a partitioned member table one partition at a time, without blocking writes"""
+    migration = import_module('tenant_app.migrations.0011_member_search')
+    schema_editor = mocker.MagicMock()
+    cursor = schema_editor.connection.cursor.return_value.__enter__.return_value
+    cursor.fetchall.side_effect = [[], [('tenant_app_member_default',), ('tenant_app_member_legacy',)]]
+    cursor.fetchone.side_effect = [(True,), (False,), (True,)]
+
+    migration.create_search_index(None, schema_editor)
+
+    statements = [call.args[0] for call in cursor.execute.call_args_list]
+    assert 'CREATE INDEX IF NOT EXISTS member_search ON ONLY tenant_app_member USING gin (search)' in statements
+    assert sum(s.startswith('CREATE INDEX CONCURRENTLY') for s in statements) == 2
+    # The legacy partition's index was attached by an earlier, interrupted run
+    assert [s for s in statements if 'ATTACH PARTITION' in s] == [
+        'ALTER INDEX member_search ATTACH PARTITION "tenant_app_member_default_search"',
+    ]
+    assert migration.Migration.atomic is False
@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from starterapp.db_backend.base import DatabaseWrapper
+
+@pytest.fixture
+def backend(settings, mocker):
+    """A tenant backend connection in the given search_path mode, with a mocked database connection"""
+    def make(mode):
+        settings.TENANT_SEARCH_PATH_MODE = mode
+        wrapper = DatabaseWrapper(dict(connection.settings_dict), alias='search_path_test')
+        wrapper.connection = mocker.MagicMock()
+        raw = mocker.MagicMock()
+        mocker.patch('django.db.backends.base.base.BaseDatabaseWrapper._cursor', autospec=True,
+                     side_effect=lambda db, name=None: db.make_cursor(raw))
+        mocker.patch('django.db.backends.base.base.BaseDatabaseWrapper._rollback')
+        return wrapper, raw
+    return make
+
+def sent_sets(wrapper):
+    # Statements sent on their own, on a cursor of the raw connection
+    statements = wrapper.connection.cursor.return_value.__enter__.return_value.execute.call_args_list
+    return [call.args[0] for call in statements]
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_search_path_skipped_when_unchanged(backend):
+    """Test that SET search_path is only sent on a schema change or after a rollback, and counted"""
+    wrapper, _ = backend('skip')
+    wrapper.set_schema('tenant1')
+    wrapper.cursor()
+    wrapper.cursor()
+    wrapper.set_schema('tenant1')
+    wrapper.cursor()
+    wrapper.set_schema('tenant2')
+    wrapper.cursor()
+    wrapper._rollback()
+    wrapper.cursor()
+
+    assert sent_sets(wrapper) == [
+        "SET search_path = 'tenant1','public'",
+        "SET search_path = 'tenant2','public'",
+        "SET search_path = 'tenant2','public'",
+    ]
+    assert (wrapper.search_path_stats.switched, wrapper.search_path_stats.avoided) == (3, 2)
+
+def test_unit_search_path_pipelined_with_next_statement(backend):
+    """Test that the SET rides along with the next query, and is sent on its own before VACUUM or COPY"""
+    wrapper, raw = backend('pipeline')
+    wrapper.set_schema('tenant1')
+    wrapper.cursor().execute('SELECT 1 WHERE 1 = %s', [1])
+    wrapper.cursor().execute('SELECT 2')
+
+    assert [call.args[0] for call in raw.execute.call_args_list] == [
+        "SET search_path = 'tenant1','public'; SELECT 1 WHERE 1 = %s",
+        'SELECT 2',
+    ]
+    assert sent_sets(wrapper) == []
+
+    wrapper.set_schema('tenant2')
+    wrapper.cursor().execute('VACUUM "tenant_app_member"')
+    wrapper.set_schema('tenant3')
+    wrapper.cursor().copy_expert
+    assert sent_sets(wrapper) == ["SET search_path = 'tenant2','public'", "SET search_path = 'tenant3','public'"]
+    assert raw.execute.call_args.args[0] == 'VACUUM "tenant_app_member"'
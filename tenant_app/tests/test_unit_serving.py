@@ -0,0 +1,53 @@
+import json
+import pytest
+from starterapp import readiness as readiness_module
+from starterapp.serving import ConnectionBudgetError, compute_profile, connection_budget, gunicorn_argv, server_environ
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_server_profiles_fit_connection_budget():
+    """Test that worker and thread counts follow the cores but never exceed the connection budget"""
+    assert connection_budget(100, 3, 10, 2) == 43
+    with pytest.raises(ConnectionBudgetError):
+        connection_budget(10, 3, 10, 1)
+
+    wsgi = compute_profile('wsgi', cores=4, budget=43, memory_mb=9000)
+    assert (wsgi.workers, wsgi.threads, wsgi.connections) == (9, 4, 36)
+    assert wsgi.max_worker_memory_mb == 800
+    assert wsgi.max_requests_jitter == 500
+
+    tight = compute_profile('wsgi', cores=16, budget=20)
+    assert (tight.workers, tight.threads) == (20, 1)
+    assert tight.max_worker_memory_mb == 0
+
+    asgi = compute_profile('asgi', cores=4, budget=43)
+    assert (asgi.workers, asgi.threads) == (4, 10)
+    assert asgi.connections <= 43
+
+def test_unit_server_gunicorn_argv():
+    """Test that the gunicorn command preloads the app and passes threads only to gthread workers"""
+    wsgi = compute_profile('wsgi', cores=1, budget=100, max_worker_memory_mb=512)
+    argv = gunicorn_argv(wsgi, '127.0.0.1:9000')
+    assert argv[:2] == ['gunicorn', 'starterapp.wsgi:application']
+    assert argv[argv.index('--threads') + 1] == '4'
+    assert '--preload' in argv
+    assert server_environ(wsgi) == {'SERVER_MAX_WORKER_MEMORY_MB': '512'}
+
+    asgi = compute_profile('asgi', cores=2, budget=100)
+    argv = gunicorn_argv(asgi, '127.0.0.1:9000')
+    assert argv[argv.index('--worker-class') + 1] == 'starterapp.uvicorn_worker.ServerUvicornWorker'
+    assert '--threads' not in argv
+    assert server_environ(asgi)['SERVER_LIMIT_CONCURRENCY'] == '32'
+    assert server_environ(asgi)['CONN_MAX_AGE'] == '0'
+
+def test_unit_readiness_reports_failed_checks(rf, mocker):
+    """Test that /readyz answers 503 naming the failing check, and 200 once every check passes"""
+    mocker.patch.dict(readiness_module._checks, {'database': mocker.Mock(side_effect=OSError('connection refused'))}, clear=True)
+    response = readiness_module.readiness(rf.get('/readyz'))
+    assert response.status_code == 503
+    assert response['Cache-Control'] == 'no-store'
+    assert json.loads(response.content) == {'ready': False, 'checks': {'database': 'connection refused'}}
+
+    readiness_module._checks['database'] = mocker.Mock(return_value=None)
+    response = readiness_module.readiness(rf.get('/readyz'))
+    assert response.status_code == 200
+    assert json.loads(response.content)['ready'] is True
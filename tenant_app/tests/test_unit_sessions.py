@@ -0,0 +1,42 @@
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from starterapp.sessions import SessionStore, session_digest
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_session_cache_key_namespaced_by_schema(mocker):
+    """Test that the same session key maps to a different cache key per schema"""
+    connection = mocker.patch('starterapp.sessions.connection')
+    store = SessionStore('abcdefghijklmnop')
+
+    connection.schema_name = 'tenant1'
+    tenant1_key = store.cache_key
+    connection.schema_name = 'tenant2'
+
+    assert tenant1_key != store.cache_key
+    assert '.tenant1.' in tenant1_key
+
+def test_unit_session_unchanged_is_not_written(mocker):
+    """Test that saving a session whose data did not change skips the write"""
+    write = mocker.patch.object(CachedDBStore, 'save')
+    store = SessionStore('abcdefghijklmnop')
+    store._session_cache = {'_auth_user_id': '1'}
+    store._loaded_digest = session_digest({'_auth_user_id': '1'})
+
+    store['_auth_user_id'] = '1'
+    store.save()
+    assert not write.called
+
+    store['theme'] = 'dark'
+    store.save()
+    assert write.called
+
+def test_unit_session_cache_bypassed_when_process_local(mocker):
+    """Test that sessions skip a per-process cache and use a shared one"""
+    caches = mocker.patch('django.contrib.sessions.backends.cached_db.caches')
+    caches.__getitem__.return_value = LocMemCache('sessions', {})
+    assert isinstance(SessionStore('abcdefghijklmnop')._cache, DummyCache)
+
+    shared = mocker.Mock()
+    caches.__getitem__.return_value = shared
+    assert SessionStore('abcdefghijklmnop')._cache is shared
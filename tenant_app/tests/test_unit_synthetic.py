@@ -0,0 +1,55 @@
+import random
+from collections import Counter
+from datetime import datetime, timezone
+from shared_app.management.commands.generate_data import tenant_sizes
+from tenant_app.synthetic import SIGNUP_DAYS, fill_schema, member_rows
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def rows(seed, count=5000, **kwargs):
+    return list(member_rows(count, range(1, 21), random.Random(seed), now=NOW, **kwargs))
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_synthetic_members_deterministic_and_skewed():
+    """Test that a seed always gives the same members, spread over regions by a Zipf law"""
+    members = rows('1:tenant1')
+    assert members == rows('1:tenant1')
+    assert members != rows('1:tenant2')
+
+    per_region = Counter(region_id for *_, region_id in members).most_common()
+    assert per_region[0][1] > 5 * per_region[-1][1]
+    assert all((NOW - created_at).days <= SIGNUP_DAYS for _, _, _, created_at, _ in members)
+    assert len({name for name, *_ in members}) < len(members)
+
+def repeated_share(members):
+    # Members whose email (untagged) or phone digits belong to an earlier member
+    seen, repeated = set(), 0
+    for _, email, phone, _, _ in members:
+        keys = {('email', email.lower().replace('+portal', ''))} if email else set()
+        if phone:
+            keys.add(('phone', ''.join(filter(str.isdigit, phone))[-10:]))
+        repeated += bool(keys & seen)
+        seen |= keys
+    return repeated / len(members)
+
+def test_unit_synthetic_duplicates_and_tenant_sizes():
+    """Test that planted duplicates repeat earlier members' contacts, and skewed tenant sizes keep the total"""
+    assert repeated_share(rows('1:tenant1')) < 0.05
+    assert repeated_share(rows('1:tenant1', duplicate_rate=0.5)) > 0.3
+
+    assert tenant_sizes(4, 1000, 0) == [1000] * 4
+    sizes = tenant_sizes(4, 1000, 1.0)
+    assert sizes[0] > sizes[-1] and abs(sum(sizes) - 4000) <= 4
+
+def test_unit_fill_schema_moves_region_sequence_past_copied_ids(mocker):
+    """Test that regions copied with ids 1..N leave the id sequence at N, so the next region gets N + 1"""
+    connection = mocker.patch('tenant_app.synthetic.connection', schema_name='synthetic0001')
+    connection.ops.quote_name = lambda name: f'"{name}"'
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchone.return_value = (0,)
+    mocker.patch('tenant_app.synthetic.transaction')
+    mocker.patch('tenant_app.synthetic.analyze_after_bulk_write')
+
+    assert fill_schema(1, regions=12, members=0) == 0
+
+    cursor.execute.assert_any_call("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, %s)", ['tenant_app_region', 12, True])
@@ -0,0 +1,48 @@
+import pytest
+from django_multitenant.utils import set_current_tenant, unset_current_tenant
+from django_multitenant.utils import get_current_tenant_value
+from tenant_app.api import scope_to_region
+from tenant_app.models import Member
+
+def compiled_sql(queryset):
+    sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+    return sql
+
+@pytest.fixture
+def current_tenant():
+    set_current_tenant(Member(id=1, name="Tenant", region_id=1))
+    yield
+    unset_current_tenant()
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_row_tenancy_injects_region_filter(settings, current_tenant):
+    """Test that by default django_multitenant scopes queries to the current tenant"""
+    settings.TENANT_SCHEMA_ONLY = False
+
+    assert '"region_id" = %s' in compiled_sql(Member.objects.all())
+
+def test_unit_schema_only_skips_filter_injection(settings, current_tenant):
+    """Test that with TENANT_SCHEMA_ONLY a leftover current tenant no longer rewrites queries"""
+    settings.TENANT_SCHEMA_ONLY = True
+
+    assert 'WHERE' not in compiled_sql(Member.objects.all())
+    join = compiled_sql(Member.objects.select_related('region'))
+    assert join.count('"tenant_app_member"."region_id"') == 2  # selected column and join condition only
+
+def test_unit_schema_only_explicit_region_filter_kept(settings):
+    """Test that region scoping done by the views themselves is still applied"""
+    settings.TENANT_SCHEMA_ONLY = True
+
+    assert '"region_id" = %s' in compiled_sql(Member.objects.filter(id=1, region_id=2))
+
+def test_unit_scope_to_region_without_member_lookup(settings, mocker):
+    """Test that region scoping needs no query, so regions with many (or no) members work"""
+    settings.TENANT_SCHEMA_ONLY = False
+    lookup = mocker.patch('tenant_app.api.Member.objects.get')
+    try:
+        scope_to_region(7)
+        assert get_current_tenant_value() == 7
+        assert '"region_id" = %s' in compiled_sql(Member.objects.filter(id=1))
+    finally:
+        unset_current_tenant()
+    assert not lookup.called
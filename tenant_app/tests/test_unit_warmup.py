@@ -0,0 +1,34 @@
+from django.db import connection
+from django_tenants.postgresql_backend.base import FakeTenant
+from shared_app.models import Client, Domain
+from starterapp import tenant_resolution
+from starterapp.tenant_resolution import SubfolderPrefixPattern, clear_tenant_cache, prime, resolve_tenant
+
+# --- Unit Tests (no DB interaction) ---
+def test_unit_resolved_tenants_cached_until_cleared(mocker):
+    """Test that a resolved tenant is looked up once, handed out as a copy and looked up again after a clear"""
+    mocker.patch.object(tenant_resolution, 'TENANT_CACHE_SECONDS', 60)
+    tenant = Client(id=1, schema_name='tenant1')
+    manager = mocker.patch.object(tenant_resolution, 'get_tenant_domain_model').return_value.objects
+    manager.select_related.return_value.get.return_value = Domain(domain='tenant1', tenant=tenant)
+    clear_tenant_cache()
+
+    first, second = resolve_tenant('tenant1'), resolve_tenant('tenant1')
+    assert first is not second and first.schema_name == second.schema_name == 'tenant1'
+    assert manager.select_related.return_value.get.call_count == 1
+
+    clear_tenant_cache()
+    prime([Domain(domain='tenant2', tenant=Client(id=2, schema_name='tenant2'))])
+    assert resolve_tenant('tenant2').schema_name == 'tenant2'
+    resolve_tenant('tenant1')
+    assert manager.select_related.return_value.get.call_count == 2
+    clear_tenant_cache()
+
+def test_unit_subfolder_prefix_read_from_connection(mocker):
+    """Test that the URL prefix comes from the subfolder on the connection's tenant, also on the pool schema"""
+    pool = FakeTenant(schema_name='pool')
+    pool.domain_subfolder = 'small'
+    mocker.patch.object(connection, 'tenant', pool)
+    mocker.patch.object(tenant_resolution, 'get_tenant_domain_model', side_effect=AssertionError('queried'))
+
+    assert SubfolderPrefixPattern().tenant_prefix == 'client/small/'
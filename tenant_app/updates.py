@@ -0,0 +1,87 @@
+"""
+Single-statement member updates with optimistic locking.
+
+Every update bumps Member.version. update_member_fields() writes only the
+columns it is given, in one UPDATE ... RETURNING, so an update is a single round
+trip instead of a SELECT followed by a save() that rewrites every column. When
+the caller passes the version it last read, the UPDATE only matches that
+version; if another write got there first, VersionConflict is raised instead of
+silently overwriting it. The same statement appends the member's history
+entry with the fields that actually changed (see tenant_app.history).
+"""
+from django.db import connection
+
+from . import history
+from .models import Member
+from .tenancy import pooled_client_key
+
+# Columns an update may set
+UPDATABLE_FIELDS = ('name', 'phone', 'email')
+# Columns returned for the updated member, in MemberResponseSchema order
+RETURNED_FIELDS = ('id', 'name', 'phone', 'email', 'created_at', 'version')
+
+
+class VersionConflict(Exception):
+
+    def __init__(self, current_version):
+        self.current_version = current_version
+        super().__init__(f"The member was changed by another request; its current version is {current_version}.")
+
+
+def update_member_fields(member_id, region_id, changes, version=None):
+    """
+    Sets changes ({field: value} over UPDATABLE_FIELDS) on member member_id of
+    region_id and returns the updated row as a dict of RETURNED_FIELDS. Raises
+    Member.DoesNotExist, or VersionConflict when version is given and is no
+    longer current. The extra SELECT telling the two apart only runs when the
+    UPDATE matched nothing. A history entry is written only when a value changed.
+    """
+    table = connection.ops.quote_name(Member._meta.db_table)
+
+    where, params = [f"{_column('id')} = %s", f"{_column('region')} = %s"], [member_id, region_id]
+    client_key = pooled_client_key()
+    if client_key is not None:
+        where.append(f"{_column('client_key')} = %s")
+        params.append(client_key)
+    condition = ' AND '.join(where)
+    version_column = _column('version')
+    version_check, version_params = '', []
+    if version is not None:
+        version_check, version_params = f" AND {version_column} = %s", [version]
+
+    assignments = ', '.join(
+        [f"{_column(field)} = %s" for field in changes] + [f"{version_column} = m.{version_column} + 1"]
+    )
+    # The locking subquery reads the row as it was before the update, for the diff
+    old_columns = ', '.join(_column(field) for field in ('id', *changes))
+    returned = ', '.join(f"m.{_column(field)}" for field in (*RETURNED_FIELDS, 'region', 'client_key'))
+    returned_old = ''.join(f", old.{_column(field)} AS old_{field}" for field in changes)
+    diff = history.changes_sql(
+        changes, {field: f"u.{_column(field)}" for field in changes}, {field: f"u.old_{field}" for field in changes},
+    )
+    log = history.insert_sql(
+        f"SELECT %s, u.{_column('id')}, u.{_column('region')}, %s, {diff}, u.{version_column}, now(), "
+        f"u.{_column('client_key')} FROM u WHERE {diff} <> '{{}}'::jsonb"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH old AS (SELECT {old_columns} FROM {table} WHERE {condition}{version_check} FOR UPDATE), "
+            f"u AS ("
+            f"    UPDATE {table} m SET {assignments} FROM old WHERE m.{_column('id')} = old.{_column('id')} "
+            f"    RETURNING {returned}{returned_old}"
+            f"), logged AS ({log}) "
+            f"SELECT {', '.join(f'u.{_column(field)}' for field in RETURNED_FIELDS)} FROM u",
+            [*params, *version_params, *changes.values(), history.MEMBER, history.UPDATE],
+        )
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute(f"SELECT {version_column} FROM {table} WHERE {condition}", params)
+            current = cursor.fetchone()
+            if current is None:
+                raise Member.DoesNotExist("Member matching query does not exist.")
+            raise VersionConflict(current[0])
+    return dict(zip(RETURNED_FIELDS, row))
+
+
+def _column(field):
+    return connection.ops.quote_name(Member._meta.get_field(field).column)
@@ -0,0 +1,4 @@
+from .api import api
+
+# Imported lazily by starterapp.urls on the first request under api/
+urlpatterns = api.urls[0]